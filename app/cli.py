@@ -10,6 +10,8 @@
 from __future__ import annotations
 import argparse, json, os
 from rich import print
+from app.core import settings
+from app.core.rag_utils import ingest_dir
 from app.server.agent import run
 
 def main():
@@ -20,6 +22,8 @@ def main():
     ap.add_argument("--no-auto-approve", action="store_true")
     args = ap.parse_args()
 
+    # 서버(index worker) 없이 실행 → 답변 전에 증분 인덱싱 1회
+    ingest_dir(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, "catalog_docs")
     out = run(args.q, mode=args.mode, top_k=args.top_k, auto_approve=(None if not args.no_auto_approve else False))
     print(json.dumps(out, ensure_ascii=False, indent=2))
 
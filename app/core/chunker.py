@@ -0,0 +1,229 @@
+"""구조/토큰 기반 splitter — heading·표·코드 블록·한국어 문장 경계를 지키며 `tiktoken` token 수로 chunk 크기 결정.
+
+- 입력 Document(markdown heading 구간 / PDF 페이지 / TXT 파일) 단위로 따로 분할
+  → 앞쪽 구간을 고쳐도 뒤쪽 구간의 chunk 경계가 밀리지 않음
+- 블록: heading 줄, 표(`|`로 시작하는 연속 줄), fenced code, 빈 줄로 구분된 문단/목록
+  - 블록은 `CHUNK_TOKENS`까지 합쳐 1 chunk, heading 앞에서는 항상 새 chunk(heading은 본문과 같은 chunk)
+  - 너무 큰 블록: 표는 header 줄을 반복하며 행 단위, 코드는 줄 단위, 문단은 줄 → 문장(`다.`/`요.`/`?`/`!` 등) → token 단위
+  - 크기 때문에 나뉜 chunk는 앞 chunk 끝 문장들을 `CHUNK_OVERLAP_TOKENS` 이내로 겹쳐 시작(표/코드 제외)
+- chunk metadata
+  - `anchor`: `heading_path`(또는 `p<page>`) + 구간 내 순번 → `ingest_manifest.anchor_chunk_id(rel_path, anchor)`
+    내용이 아니라 위치로 정해지므로 바뀌지 않은 구간은 편집 후에도 같은 id
+  - `chunk_index`(구간 내 순번), `start_index`/`end_index`(원문 offset, 입력 Document에 `start_index`가 있으면 파일 기준), `tokens`
+"""
+from __future__ import annotations
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.core import settings
+from app.core.context_packer import count_tokens, token_slices
+
+_HEADING_RE = re.compile(r"^ {0,3}#{1,6}(?:[ \t]|$)")
+_TABLE_RE = re.compile(r"^ {0,3}\|")
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# 한국어 종결(…다. / …요? / …죠!)과 일반 문장부호 뒤 공백, 또는 '다'/'요'로 끝나는 줄바꿈
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。…])\s+|(?<=[다요죠])\n+")
+
+_Block = Tuple[int, int, str]   # (start, end, kind: heading | table | code | text)
+
+
+def _blocks(text: str) -> List[_Block]:
+    out: List[_Block] = []
+    lines = text.splitlines(keepends=True)
+    pos, i = 0, 0
+    offsets = []
+    for line in lines:
+        offsets.append(pos)
+        pos += len(line)
+    offsets.append(pos)
+
+    def span(a: int, b: int, kind: str) -> None:
+        s, e = offsets[a], offsets[b]
+        while e > s and text[e - 1] in "\r\n":
+            e -= 1
+        if text[s:e].strip():
+            out.append((s, e, kind))
+
+    while i < len(lines):
+        body = lines[i].rstrip("\r\n")
+        m = _FENCE_RE.match(body)
+        if m:
+            j = i + 1
+            while j < len(lines) and not lines[j].lstrip().startswith(m.group(1)):
+                j += 1
+            span(i, min(j + 1, len(lines)), "code")
+            i = j + 1
+        elif _HEADING_RE.match(body):
+            span(i, i + 1, "heading")
+            i += 1
+        elif _TABLE_RE.match(body):
+            j = i
+            while j < len(lines) and _TABLE_RE.match(lines[j]):
+                j += 1
+            span(i, j, "table")
+            i = j
+        elif not body.strip():
+            i += 1
+        else:
+            j = i
+            while j < len(lines):
+                nxt = lines[j].rstrip("\r\n")
+                if not nxt.strip() or (j > i and (_HEADING_RE.match(nxt) or _TABLE_RE.match(nxt) or _FENCE_RE.match(nxt))):
+                    break
+                j += 1
+            span(i, j, "text")
+            i = j
+    return out
+
+
+class StructuredTextSplitter:
+    """`RecursiveCharacterTextSplitter` 대체(`split_documents` / `split_text` 동일 사용법)."""
+
+    def __init__(self, chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None, model: str = ""):
+        self.chunk_tokens = chunk_tokens or settings.CHUNK_TOKENS
+        self.overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.model = model
+
+    def _n(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    # -- 큰 블록 쪼개기: [(start, end, text, kind)] ------------------------------
+
+    def _sentences(self, text: str, base: int) -> List[Tuple[int, int, str]]:
+        out, last = [], 0
+        for m in _SENTENCE_END_RE.finditer(text):
+            if text[last:m.start()].strip():
+                out.append((base + last, base + m.start(), text[last:m.start()]))
+            last = m.end()
+        if text[last:].strip():
+            out.append((base + last, base + len(text), text[last:]))
+        return out
+
+    def _pieces(self, text: str, block: _Block) -> List[Tuple[int, int, str, str]]:
+        s, e, kind = block
+        body = text[s:e]
+        if self._n(body) <= self.chunk_tokens:
+            return [(s, e, body, kind)]
+        if kind in ("table", "code"):
+            rows, pos = [], s
+            for line in body.splitlines(keepends=True):
+                rows.append((pos, pos + len(line.rstrip("\r\n")), line.rstrip("\r\n")))
+                pos += len(line)
+            head = "\n".join(r[2] for r in rows[:2]) if kind == "table" and len(rows) > 2 else ""
+            out, cur = [], []
+            for r in rows[2:] if head else rows:
+                cand = "\n".join(([head] if head else []) + [x[2] for x in cur + [r]])
+                if cur and self._n(cand) > self.chunk_tokens:
+                    out.append((cur[0][0], cur[-1][1], "\n".join(([head] if head else []) + [x[2] for x in cur]), kind))
+                    cur = []
+                cur.append(r)
+            if cur:
+                out.append((cur[0][0], cur[-1][1], "\n".join(([head] if head else []) + [x[2] for x in cur]), kind))
+            return out
+        out = []
+        for a, b, sent in self._sentences(body, s):
+            if self._n(sent) <= self.chunk_tokens:
+                out.append((a, b, sent, "sentence"))
+                continue
+            pos = a
+            for part in token_slices(sent, self.chunk_tokens, self.model):
+                out.append((pos, pos + len(part), part, "sentence"))
+                pos += len(part)
+        return out
+
+    def _tail(self, pieces: List[Tuple[int, int, str, str]]) -> List[Tuple[int, int, str, str]]:
+        """다음 chunk 앞에 붙일 겹침: 끝에서부터 문장 단위로 `overlap_tokens` 이내."""
+        if self.overlap_tokens <= 0 or not pieces or pieces[-1][3] in ("table", "code", "heading"):
+            return []
+        s, e, body, kind = pieces[-1]
+        sents = self._sentences(body, s) if kind != "sentence" else [(s, e, body)]
+        out: List[Tuple[int, int, str, str]] = []
+        used = 0
+        for a, b, sent in reversed(sents):
+            n = self._n(sent)
+            if used + n > self.overlap_tokens:
+                break
+            out.insert(0, (a, b, sent, "sentence"))
+            used += n
+        return out if len(out) < len(sents) or len(pieces) > 1 else []
+
+    @staticmethod
+    def _join(text: str, pieces: List[Tuple[int, int, str, str]]) -> str:
+        # 원문에서 이어진 조각은 원래 공백/줄바꿈을 그대로, 아니면(표 header 반복 등) 빈 줄로 연결
+        parts = [pieces[0][2]]
+        for prev, cur in zip(pieces, pieces[1:]):
+            gap = text[prev[1]:cur[0]] if prev[1] <= cur[0] else "\n\n"
+            parts.append(gap if not gap.strip() else "\n\n")
+            parts.append(cur[2])
+        return "".join(parts)
+
+    # -- public ---------------------------------------------------------------
+
+    def split_text(self, text: str) -> List[str]:
+        return [c.page_content for c in self._split_one(Document(page_content=text), "", 0)]
+
+    def _split_one(self, doc: Document, base: str, occurrence: int) -> List[Document]:
+        text = doc.page_content or ""
+        meta = dict(doc.metadata or {})
+        origin = meta.get("start_index") if isinstance(meta.get("start_index"), int) else 0
+        anchor = base + (f"~{occurrence}" if occurrence else "")
+
+        groups: List[List[Tuple[int, int, str, str]]] = []
+        cur: List[Tuple[int, int, str, str]] = []
+        used = 0
+        for block in _blocks(text):
+            if block[2] == "heading" and cur and any(p[3] != "heading" for p in cur):
+                groups.append(cur)
+                cur, used = [], 0
+            for piece in self._pieces(text, block):
+                n = self._n(piece[2])
+                if cur and used + n > self.chunk_tokens and any(p[3] != "heading" for p in cur):
+                    groups.append(cur)
+                    cur = self._tail(cur)
+                    used = sum(self._n(p[2]) for p in cur)
+                    if used + n > self.chunk_tokens:
+                        cur, used = [], 0
+                cur.append(piece)
+                used += n
+        if cur:
+            groups.append(cur)
+
+        out: List[Document] = []
+        for i, g in enumerate(groups):
+            body = self._join(text, g)
+            out.append(Document(page_content=body, metadata={
+                **meta,
+                "anchor": f"{anchor}#{i}",
+                "chunk_index": i,
+                "start_index": origin + g[0][0],
+                "end_index": origin + g[-1][1],
+                "tokens": self._n(body),
+            }))
+        return out
+
+    def split_documents(self, docs: Iterable[Document]) -> List[Document]:
+        out: List[Document] = []
+        seen: dict = {}
+        for d in docs:
+            meta = d.metadata or {}
+            if meta.get("heading_path") is not None:
+                base = str(meta.get("heading_path"))
+            elif isinstance(meta.get("page"), int):
+                base = f"p{meta['page']}"
+            else:
+                base = ""
+            key = (meta.get("source"), base)
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+            out.extend(self._split_one(d, base, occurrence))
+        return out
+
+
+def build_splitter():
+    """설정(`SPLITTER`)에 맞는 splitter: structured(기본) | recursive(기존 문자 수 기반)."""
+    if settings.SPLITTER == "recursive":
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        return RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    return StructuredTextSplitter()
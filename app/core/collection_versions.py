@@ -0,0 +1,171 @@
+"""Blue/green collection versions — 논리 컬렉션(`catalog_docs`) → 실제 컬렉션(`catalog_docs__v3`) pointer.
+
+- 재인덱싱은 새 버전 컬렉션에 쓰고, 끝나면 pointer만 원자적으로 교체 → 읽기는 항상 완성된 버전만 봄
+- pointer: `{persist_dir}/collections/{store_key(collection)}.json` (tmp 파일 + os.replace)
+  - `active`: 현재 읽기 버전, `next`: 다음 버전 번호
+  - `versions[n]`: name / status(building | active | retired | failed) / embed_model / created_at / activated_at / report
+- pointer가 없으면 v0 = 기존 컬렉션 이름 그대로(기존 데이터 마이그레이션 불필요)
+- 버전 이름은 `<collection>__v<n>` (Chroma 컬렉션 이름은 `@`를 허용하지 않음)
+- 조회(`resolve`)는 pointer 파일 mtime 기준 캐시 → 검색마다 stat 1회, 다른 프로세스(index worker)의 교체도 바로 반영
+- 수정(allocate/update/activate/forget)은 `<pointer>.lock` flock 안에서 캐시 없이 다시 읽고 씀 → 프로세스 간 갱신 유실 없음
+"""
+from __future__ import annotations
+import json, os, re, tempfile, threading, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.core import settings
+
+try:
+    import fcntl
+except ImportError:   # Windows 로컬 실행: 프로세스 간 lock 없이 동작
+    fcntl = None
+
+POINTER_DIRNAME = "collections"
+_VERSIONED_RE = re.compile(r"^(.+)__v(\d+)$")
+
+_lock = threading.RLock()
+_cache: Dict[str, Tuple[Tuple[int, int], dict]] = {}
+
+
+def _store_key(collection: str) -> str:
+    # retrieval.store_key와 같은 규칙(여기서 import하면 순환)
+    return collection if settings.VECTOR_BACKEND == "chroma" else f"{collection}.{settings.VECTOR_BACKEND}"
+
+
+def pointer_path(persist_dir: str, collection: str) -> str:
+    return os.path.join(persist_dir, POINTER_DIRNAME, f"{_store_key(collection)}.json")
+
+
+def version_name(collection: str, version: int) -> str:
+    return collection if version == 0 else f"{collection}__v{version}"
+
+
+def load_pointer(persist_dir: str, collection: str, fresh: bool = False) -> Optional[dict]:
+    path = pointer_path(persist_dir, collection)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns)    # os.replace → 새 inode: 같은 mtime tick 안의 교체도 구분
+    hit = _cache.get(path)
+    if hit is not None and hit[0] == stamp and not fresh:
+        return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    _cache[path] = (stamp, data)
+    return data
+
+
+def _save(persist_dir: str, collection: str, data: dict) -> None:
+    path = pointer_path(persist_dir, collection)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _cache.pop(path, None)
+
+
+@contextmanager
+def _locked(persist_dir: str, collection: str):
+    """pointer read-modify-write 구간: 프로세스 안은 `_lock`, 프로세스 간은 flock."""
+    path = pointer_path(persist_dir, collection) + ".lock"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _pointer_or_default(persist_dir: str, collection: str, fresh: bool = False) -> dict:
+    data = load_pointer(persist_dir, collection, fresh)
+    if data is not None:
+        return json.loads(json.dumps(data))    # 캐시된 dict를 직접 수정하지 않도록 복사
+    return {"collection": collection, "active": 0, "next": 1,
+            "versions": {"0": {"name": collection, "status": "active", "embed_model": None}}}
+
+
+def resolve(persist_dir: str, collection: str) -> Tuple[str, Optional[str]]:
+    """(실제 컬렉션 이름, 그 버전을 만든 임베딩 모델 — 모르면 None). 이미 버전 이름이면 그대로."""
+    m = _VERSIONED_RE.match(collection)
+    if m:
+        data = load_pointer(persist_dir, m.group(1)) or {}
+        return collection, ((data.get("versions") or {}).get(m.group(2)) or {}).get("embed_model")
+    data = load_pointer(persist_dir, collection)
+    if data is None:
+        return collection, None
+    v = data["versions"][str(data["active"])]
+    return v["name"], v.get("embed_model")
+
+
+def allocate(persist_dir: str, collection: str, embed_model: Optional[str]) -> Tuple[int, str]:
+    """새 버전 번호를 잡고 status=building으로 기록."""
+    with _locked(persist_dir, collection):
+        data = _pointer_or_default(persist_dir, collection, fresh=True)
+        version = int(data["next"])
+        name = version_name(collection, version)
+        data["next"] = version + 1
+        data["versions"][str(version)] = {"name": name, "status": "building", "embed_model": embed_model,
+                                          "created_at": time.time()}
+        _save(persist_dir, collection, data)
+    return version, name
+
+
+def update(persist_dir: str, collection: str, version: int, **fields) -> None:
+    with _locked(persist_dir, collection):
+        data = _pointer_or_default(persist_dir, collection, fresh=True)
+        if str(version) in data["versions"]:
+            data["versions"][str(version)].update(fields)
+            _save(persist_dir, collection, data)
+
+
+def activate(persist_dir: str, collection: str, version: int, **fields) -> dict:
+    """읽기 버전 교체(pointer 파일 1회 교체). 이전 active는 retired(롤백 대상으로 보관)."""
+    with _locked(persist_dir, collection):
+        data = _pointer_or_default(persist_dir, collection, fresh=True)
+        v = data["versions"].get(str(version))
+        if v is None or v["status"] not in ("building", "retired", "active"):
+            raise ValueError(f"version {version} of {collection} cannot be activated")
+        prev = data["versions"].get(str(data["active"]))
+        if prev is not None and int(data["active"]) != version:
+            prev["status"] = "retired"
+            prev["retired_at"] = time.time()
+        v.update(fields, status="active", activated_at=time.time())
+        data["active"] = version
+        _save(persist_dir, collection, data)
+        return data
+
+
+def gc_candidates(persist_dir: str, collection: str, keep: Optional[int] = None) -> List[Tuple[int, str]]:
+    """지울 버전들: active를 포함해 최근 `keep`개(active + 롤백용 retired)를 남기고 나머지 retired/failed.
+
+    building은 다른 rebuild가 쓰는 중일 수 있으므로, 그보다 새 버전이 active가 된 경우에만(중단된 build) 대상.
+    """
+    keep = settings.COLLECTION_KEEP_VERSIONS if keep is None else keep
+    data = load_pointer(persist_dir, collection)
+    if data is None:
+        return []
+    active = int(data["active"])
+    retired = sorted((int(n) for n, v in data["versions"].items() if v["status"] == "retired"), reverse=True)
+    out = [n for n in retired[max(keep - 1, 0):]]
+    out += [int(n) for n, v in data["versions"].items() if v["status"] == "failed"]
+    out += [int(n) for n, v in data["versions"].items() if v["status"] == "building" and int(n) < active]
+    return [(n, data["versions"][str(n)]["name"]) for n in sorted(set(out))]
+
+
+def forget(persist_dir: str, collection: str, versions: List[int]) -> None:
+    with _locked(persist_dir, collection):
+        data = _pointer_or_default(persist_dir, collection, fresh=True)
+        for n in versions:
+            if int(n) != int(data["active"]):
+                data["versions"].pop(str(n), None)
+        _save(persist_dir, collection, data)
+
+
+def status(persist_dir: str, collection: str) -> dict:
+    return _pointer_or_default(persist_dir, collection)
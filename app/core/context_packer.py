@@ -0,0 +1,209 @@
+"""RAG context packer — 검색 결과를 모델별 token 예산까지 채워 `SOURCE i:` CONTEXT를 만듦.
+
+- token 수는 `tiktoken`으로 계산(모델명 → encoding, 없으면 `RAG_CONTEXT_ENCODING`)
+  - encoding 파일을 받을 수 없는 환경(offline)에서는 문자 수 기반 근사치로 대체
+- 예산: `RAG_CONTEXT_MODEL_BUDGETS`의 모델별 값, 없으면 `RAG_CONTEXT_MAX_TOKENS`
+- 검색 순위(= 가치) 순서로 담음
+  - 같은 source의 인접 chunk는 `CHUNK_OVERLAP`(/`CHUNK_OVERLAP_TOKENS`)으로 겹친 부분을 잘라내고, 이미 담긴 내용과 같은 chunk는 건너뜀
+  - 예산을 넘는 chunk는 문장 경계에서 잘라 남은 예산만큼 담고 종료
+- SOURCE 번호는 담긴 순서 = `PackedContext.docs` 순서 → used_docs와 인용 번호가 일치
+- metrics: `context_packer.{deduped,trimmed,dropped,tokenizer_fallback}`, `context_packer.tokens`
+"""
+from __future__ import annotations
+import hashlib, logging, re, threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from app.core import metrics, settings
+
+log = logging.getLogger(__name__)
+
+_MIN_OVERLAP = 20        # 이보다 짧은 일치는 우연으로 봄
+_MIN_TRIM_TOKENS = 48    # 남은 예산이 이보다 작으면 잘라서라도 담지 않음(첫 SOURCE 제외)
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+_SPACES_RE = re.compile(r"\s+")
+
+_enc_lock = threading.Lock()
+_encoders: Dict[str, Any] = {}
+
+
+def _encoder(model: str):
+    with _enc_lock:
+        if model in _encoders:
+            return _encoders[model]
+        try:
+            import tiktoken
+            try:
+                enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                enc = tiktoken.get_encoding(settings.RAG_CONTEXT_ENCODING)
+        except Exception as e:   # 미설치 / encoding 다운로드 실패 → 근사치(재시도하지 않도록 None도 캐시)
+            log.warning("tiktoken unavailable (%s: %s); using approximate token counts", type(e).__name__, str(e)[:120])
+            metrics.inc("context_packer.tokenizer_fallback")
+            enc = None
+        _encoders[model] = enc
+        return enc
+
+
+def _approx_tokens(text: str) -> int:
+    # cl100k 기준 대략: ASCII 4자 ≈ 1 token, 한글 등 비ASCII 1자 ≈ 1 token
+    ascii_n = sum(1 for ch in text if ch.isascii())
+    return (ascii_n + 3) // 4 + (len(text) - ascii_n)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    enc = _encoder(model or "")
+    if enc is None:
+        return _approx_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def token_slices(text: str, limit: int, model: Optional[str] = None) -> List[str]:
+    """`limit` token 단위로 자른 조각들(문장 경계가 없는 긴 텍스트용)."""
+    enc = _encoder(model or "")
+    if enc is None:
+        out, cur, used = [], [], 0.0
+        for ch in text:
+            w = 0.25 if ch.isascii() else 1.0
+            if cur and used + w > limit:
+                out.append("".join(cur))
+                cur, used = [], 0.0
+            cur.append(ch)
+            used += w
+        return out + (["".join(cur)] if cur else [])
+    ids = enc.encode(text, disallowed_special=())
+    return [enc.decode(ids[i:i + limit]) for i in range(0, len(ids), max(limit, 1))]
+
+
+def budget_for(model: Optional[str]) -> int:
+    return settings.RAG_CONTEXT_MODEL_BUDGETS.get(model or "", settings.RAG_CONTEXT_MAX_TOKENS)
+
+
+def _truncate_tokens(text: str, limit: int, model: str) -> str:
+    enc = _encoder(model)
+    if enc is None:
+        out, used = [], 0
+        for ch in text:
+            used += 1 if not ch.isascii() else 0.25
+            if used > limit:
+                break
+            out.append(ch)
+        return "".join(out)
+    return enc.decode(enc.encode(text, disallowed_special=())[:limit])
+
+
+def trim_to_sentences(text: str, limit: int, model: Optional[str] = None) -> str:
+    """앞에서부터 문장 단위로 `limit` token 이내만 남김. 첫 문장도 안 들어가면 token 단위로 자르고 '…'."""
+    model = model or ""
+    parts = [p for p in _SENTENCE_RE.split(text) if p.strip()]
+    kept: List[str] = []
+    used = 0
+    for p in parts:
+        n = count_tokens(p, model) + 1
+        if used + n > limit:
+            break
+        kept.append(p)
+        used += n
+    if kept:
+        return "\n".join(kept) if "\n" in text else " ".join(kept)
+    return _truncate_tokens(text, max(limit - 1, 0), model).rstrip() + "…"
+
+
+def _overlap(prev: str, cur: str, max_len: int) -> int:
+    """prev의 끝 == cur의 앞부분인 가장 긴 길이(`_MIN_OVERLAP` 미만이면 0)."""
+    for n in range(min(len(prev), len(cur), max_len), _MIN_OVERLAP - 1, -1):
+        if prev.endswith(cur[:n]):
+            return n
+    return 0
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(_SPACES_RE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PackedContext:
+    text: str
+    docs: List[Document] = field(default_factory=list)   # SOURCE 1..n 순서, page_content는 실제로 담긴 텍스트
+    tokens: int = 0
+    budget: int = 0
+    deduped: int = 0
+    trimmed: int = 0
+    dropped: int = 0
+
+    def used_docs(self, preview_chars: int = 200) -> List[Dict[str, Any]]:
+        return [{"meta": d.metadata, "preview": d.page_content[:preview_chars]} for d in self.docs]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sources": len(self.docs), "tokens": self.tokens, "budget": self.budget,
+                "deduped": self.deduped, "trimmed": self.trimmed, "dropped": self.dropped}
+
+
+def pack_context(docs: Sequence[Any], budget: Optional[int] = None, model: Optional[str] = None) -> PackedContext:
+    """검색 순위 순서의 docs → token 예산 안의 `SOURCE i:` CONTEXT."""
+    model = model or ""
+    budget = budget if budget is not None else budget_for(model)
+    out = PackedContext(text="", budget=budget)
+    seen: set = set()
+    originals: List[Any] = []      # 담긴 chunk의 원문(overlap 비교용)
+    parts: List[str] = []
+    used = 0
+    # 겹침 길이 상한: 문자 기준(recursive) 또는 token 기준(structured, 1 token ≤ ~4자)
+    max_overlap = max(settings.CHUNK_OVERLAP, settings.CHUNK_OVERLAP_TOKENS * 4, _MIN_OVERLAP)
+
+    for i, d in enumerate(docs):
+        text = (getattr(d, "page_content", "") or "").strip()
+        meta = dict(getattr(d, "metadata", None) or {})
+        fp = _fingerprint(text)
+        if not text or fp in seen:
+            out.deduped += 1
+            continue
+        src = meta.get("source")
+        body = text
+        contained = False
+        for prev_text, prev_src in originals:
+            if src is None or prev_src != src:
+                continue
+            if text in prev_text:
+                contained = True
+                break
+            n = _overlap(prev_text, body, max_overlap)      # prev 바로 뒤 chunk → 앞부분 제거
+            if n:
+                body = body[n:].lstrip()
+            n = _overlap(body, prev_text, max_overlap)      # prev 바로 앞 chunk → 뒷부분 제거
+            if n:
+                body = body[:-n].rstrip()
+        if contained or not body:
+            out.deduped += 1
+            continue
+
+        header = f"SOURCE {len(out.docs) + 1}:\n"
+        cost = count_tokens(header + body, model) + 1
+        if used + cost > budget:
+            remaining = budget - used - count_tokens(header, model) - 1
+            if out.docs and remaining < _MIN_TRIM_TOKENS:
+                out.dropped += len(docs) - i
+                break
+            body = trim_to_sentences(body, max(remaining, 1), model)
+            cost = count_tokens(header + body, model) + 1
+            out.trimmed += 1
+            out.dropped += len(docs) - i - 1
+            parts.append(header + body)
+            out.docs.append(Document(page_content=body, metadata=meta))
+            used += cost
+            break
+        seen.add(fp)
+        originals.append((text, src))
+        parts.append(header + body)
+        out.docs.append(Document(page_content=body, metadata=meta))
+        used += cost
+
+    out.text = "\n\n".join(parts)
+    out.tokens = used
+    for k in ("deduped", "trimmed", "dropped"):
+        if getattr(out, k):
+            metrics.inc(f"context_packer.{k}", getattr(out, k))
+    metrics.observe("context_packer.tokens", used)
+    return out
@@ -0,0 +1,182 @@
+"""문서 로더 — 파일 파싱(PDF/MD/TXT)을 process pool에서 병렬 실행하고 파일 단위로 결과를 흘려보냄.
+
+- `iter_load(paths)`: 입력 순서대로 `LoadResult`(docs, 파싱 시간, 오류)를 yield
+  - pool 크기 `LOADER_WORKERS`(0 = 사용 가능한 CPU 수), 동시에 처리 중인 파일은 worker × 2개까지만
+    → 코퍼스 전체를 메모리에 올리지 않고, 호출 측(분할/임베딩)과 파싱이 겹쳐서 진행
+  - 파일이 `LOADER_PARALLEL_MIN_FILES`보다 적거나 worker가 1개면 현재 프로세스에서 순차 처리
+  - 파서 예외는 파일별 `error`로 기록(건너뛰지만 조용히 버리지 않음), worker 프로세스가 죽으면 pool을 새로 만들고
+    처리 중이던 파일을 1개씩 재시도(원인 파일만 실패로 기록)
+- pool은 프로세스당 1개를 재사용(spawn 비용 1회), 종료 시 `shutdown_pool()`
+- Markdown은 `markdown_loader.MarkdownLoader`(heading 구간별 Document), `MARKDOWN_LOADER=unstructured`면 기존 loader
+- PDF(와 unstructured markdown) 파싱 결과는 `parse_cache`(content hash 기준)에 저장 → 같은 파일 버전은 다시 파싱하지 않음
+- metrics: `loader.{files,failed,pool_restarts,parse_cache_hit}`, `loader.file_ms`
+"""
+from __future__ import annotations
+import logging, multiprocessing, os, threading, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pypdf
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+from app.core import metrics, settings
+from app.core.markdown_loader import MarkdownLoader
+from app.core.parse_cache import cached_parse
+
+log = logging.getLogger(__name__)
+
+SUPPORTED_EXTS = (".pdf", ".md", ".txt")
+
+
+def _unstructured_md(path: str):
+    # MARKDOWN_LOADER=unstructured 일 때만 import(무거운 의존성 트리를 기동 시 올리지 않음)
+    from langchain_community.document_loaders import UnstructuredMarkdownLoader
+    return UnstructuredMarkdownLoader(path).load()
+
+
+# 확장자 → (parser 버전 태그, 파서). 결과는 parse cache에 저장(태그가 바뀌면 다시 파싱)
+_CACHED_PARSERS = {
+    ".pdf": (f"pypdf-{pypdf.__version__}", lambda p: PyPDFLoader(p).load()),
+    ".md": ("unstructured-md", _unstructured_md),
+}
+
+
+def load_file_cached(path: str, max_pages: Optional[int] = None) -> Tuple[List[Any], bool]:
+    """(docs, parse cache hit 여부). txt와 native markdown은 읽기가 캐시 조회보다 싸므로 그대로 읽음."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".md" and settings.MARKDOWN_LOADER != "unstructured":
+        return MarkdownLoader(path).load(), False
+    if ext in _CACHED_PARSERS:
+        parser, parse = _CACHED_PARSERS[ext]
+        return cached_parse(path, parser, parse, max_pages)
+    if ext == ".txt":
+        return TextLoader(path, encoding="utf-8").load(), False
+    return [], False
+
+
+def load_file(path: str, max_pages: Optional[int] = None):
+    return load_file_cached(path, max_pages)[0]
+
+
+@dataclass
+class LoadResult:
+    path: str
+    docs: List[Any] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+
+    def record(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """ingest report용 요약(문서 본문 제외)."""
+        out: Dict[str, Any] = {"file": name or self.path, "ms": self.elapsed_ms, "docs": len(self.docs)}
+        if self.cached:
+            out["cached"] = True
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+def _load_timed(path: str) -> LoadResult:
+    # worker 프로세스에서 실행: 예외도 결과로 돌려줘야 나머지 파일이 계속 처리됨
+    t0 = time.perf_counter()
+    cached = False
+    try:
+        (docs, cached), error = load_file_cached(path), None
+    except Exception as e:
+        docs, error = [], f"{type(e).__name__}: {str(e)[:180]}"
+    return LoadResult(path, docs, round((time.perf_counter() - t0) * 1000, 2), error, cached)
+
+
+def loader_workers() -> int:
+    if settings.LOADER_WORKERS > 0:
+        return settings.LOADER_WORKERS
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)   # cgroup/affinity로 제한된 컨테이너 기준
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: Dict[str, Any] = {"executor": None, "workers": 0}
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    with _POOL_LOCK:
+        ex = _POOL["executor"]
+        if ex is None or _POOL["workers"] != workers:
+            if ex is not None:
+                ex.shutdown(wait=False, cancel_futures=True)
+            ctx = multiprocessing.get_context(settings.LOADER_MP_START)
+            ex = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _POOL.update(executor=ex, workers=workers)
+        return ex
+
+
+def _discard_pool(ex: ProcessPoolExecutor) -> None:
+    with _POOL_LOCK:
+        if _POOL["executor"] is ex:
+            _POOL.update(executor=None, workers=0)
+    ex.shutdown(wait=False, cancel_futures=True)
+    metrics.inc("loader.pool_restarts")
+
+
+def shutdown_pool() -> None:
+    with _POOL_LOCK:
+        ex = _POOL["executor"]
+        _POOL.update(executor=None, workers=0)
+    if ex is not None:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+def _observe(res: LoadResult) -> LoadResult:
+    metrics.inc("loader.files")
+    metrics.observe("loader.file_ms", res.elapsed_ms)
+    if res.cached:
+        metrics.inc("loader.parse_cache_hit")
+    if res.error:
+        metrics.inc("loader.failed")
+        log.warning("failed to load %s: %s", res.path, res.error)
+    return res
+
+
+def iter_load(paths: Iterable[str], workers: Optional[int] = None) -> Iterator[LoadResult]:
+    """paths 순서대로 LoadResult를 yield. 결과를 소비하는 속도만큼만 다음 파일을 제출."""
+    paths = list(paths)
+    workers = min(workers or loader_workers(), max(len(paths), 1))
+    if workers <= 1 or len(paths) < settings.LOADER_PARALLEL_MIN_FILES:
+        for p in paths:
+            yield _observe(_load_timed(p))
+        return
+
+    todo = deque(paths)
+    pending: deque = deque()
+    isolate = 0   # worker가 죽은 뒤 재제출한 파일 수: 이 파일들은 1개씩 처리해 원인 파일만 실패로 기록
+    ex = _pool(workers)
+    while todo or pending:
+        while todo and len(pending) < (1 if isolate else workers * 2):
+            p = todo.popleft()
+            pending.append((p, ex.submit(_load_timed, p)))
+        p, fut = pending.popleft()
+        try:
+            res = fut.result()
+        except BrokenProcessPool:
+            # 파서가 worker를 죽인 경우(segfault/OOM) — 어느 파일 때문인지 모르므로 처리 중이던 파일을 모두 다시 제출
+            _discard_pool(ex)
+            ex = _pool(workers)
+            if isolate:
+                isolate -= 1
+                res = LoadResult(p, error="BrokenProcessPool: loader worker died")
+            else:
+                requeue = [p] + [q for q, _ in pending]
+                pending.clear()
+                todo.extendleft(reversed(requeue))
+                isolate = len(requeue)
+                continue
+        except Exception as e:   # 결과 pickling 실패 등
+            res = LoadResult(p, error=f"{type(e).__name__}: {str(e)[:180]}")
+        else:
+            isolate = max(isolate - 1, 0)
+        yield _observe(res)
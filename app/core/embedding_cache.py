@@ -0,0 +1,207 @@
+"""Persistent embedding cache (model + text hash → float32 vector).
+
+- `build_embeddings()`가 반환하는 embeddings를 감싸서, 이미 본 텍스트는 모델을 다시 호출하지 않음
+  (컬렉션/스토어(Chroma·FAISS)를 바꿔 재인덱싱해도 동일 텍스트는 cache hit)
+- 저장 구조 (`EMBED_CACHE_DIR`):
+  - `index.sqlite` : (model, text sha1) → slot, last_used
+  - `<model>.f32`  : slot 단위 float32 행렬(np.memmap)
+- `EMBED_CACHE_MAX_ENTRIES` 초과 시 last_used 오래된 slot부터 재사용(LRU)
+- 프로세스 간 일관성(API 프로세스 ↔ 인덱스 워커):
+  - 쓰기는 `BEGIN IMMEDIATE` 안에서 벡터 기록 → slot 행 커밋, evict된 slot은 다음 트랜잭션부터 재사용
+  - 읽기는 벡터를 복사한 뒤 (hash, slot) 행을 다시 확인해 바뀐 항목은 miss로 처리
+"""
+from __future__ import annotations
+import os, re, sqlite3, threading, time, hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core import settings
+from app.core import metrics
+
+_SQL_BATCH = 500
+_MIN_CAPACITY = 1024
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _slug(model: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", model)[:120]
+
+
+class EmbeddingCacheStore:
+    def __init__(self, cache_dir: str, max_entries: int = 200_000):
+        self.dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.memmap] = {}
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS models(model TEXT PRIMARY KEY, dim INTEGER, capacity INTEGER, next_slot INTEGER);
+        CREATE TABLE IF NOT EXISTS emb(model TEXT, h TEXT, slot INTEGER, last_used REAL, PRIMARY KEY(model, h));
+        CREATE INDEX IF NOT EXISTS emb_lru ON emb(model, last_used);
+        CREATE TABLE IF NOT EXISTS free_slots(model TEXT, slot INTEGER, PRIMARY KEY(model, slot));
+        """)
+        self._db.commit()
+
+    def _vec_path(self, model: str) -> str:
+        return os.path.join(self.dir, _slug(model) + ".f32")
+
+    def _mmap(self, model: str, dim: int, capacity: int) -> np.memmap:
+        mm = self._maps.get(model)
+        if mm is not None and mm.shape == (capacity, dim):
+            return mm
+        path = self._vec_path(model)
+        need = capacity * dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < need:
+                f.truncate(need)
+        mm = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+        self._maps[model] = mm
+        return mm
+
+    def _slots(self, cur, model: str, hashes: Sequence[str]) -> List[Tuple[str, int]]:
+        found: List[Tuple[str, int]] = []
+        for i in range(0, len(hashes), _SQL_BATCH):
+            part = list(hashes[i:i + _SQL_BATCH])
+            q = f"SELECT h, slot FROM emb WHERE model=? AND h IN ({','.join('?' * len(part))})"
+            found.extend(cur.execute(q, (model, *part)).fetchall())
+        return found
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not hashes:
+            return {}
+        with self._lock:
+            row = self._db.execute("SELECT dim, capacity FROM models WHERE model=?", (model,)).fetchone()
+            if row is None:
+                return {}
+            found = self._slots(self._db, model, hashes)
+            if not found:
+                return {}
+            mm = self._mmap(model, row[0], row[1])
+            read = {h: (slot, np.array(mm[slot])) for h, slot in found}
+            # 읽는 사이 다른 프로세스가 slot을 evict/재사용했을 수 있음 → (h, slot)이 그대로인 것만 반환
+            still = set(self._slots(self._db, model, list(read)))
+            out = {h: v for h, (slot, v) in read.items() if (h, slot) in still}
+            if len(out) < len(read):
+                metrics.inc("embed_cache.slot_race", len(read) - len(out))
+            now = time.time()
+            self._db.executemany("UPDATE emb SET last_used=? WHERE model=? AND h=?", [(now, model, h) for h in out])
+            self._db.commit()
+        return out
+
+    def put_many(self, model: str, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        if not items:
+            return
+        dim = len(items[0][1])
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                row = cur.execute("SELECT dim, capacity, next_slot FROM models WHERE model=?", (model,)).fetchone()
+                if row is None:
+                    row = (dim, _MIN_CAPACITY, 0)
+                    cur.execute("INSERT INTO models(model, dim, capacity, next_slot) VALUES (?,?,?,?)", (model, *row))
+                if row[0] != dim:
+                    # 같은 이름에 차원이 다른 모델이 연결된 경우: 캐시하지 않음
+                    cur.execute("ROLLBACK")
+                    return
+                _, capacity, next_slot = row
+
+                existing = {h for h, _ in self._slots(cur, model, [h for h, _ in items])}
+                new = [(h, v) for h, v in dict(items).items() if h not in existing]
+                if not new:
+                    cur.execute("COMMIT")
+                    return
+
+                # 이전 트랜잭션에서 해제(커밋)된 slot만 재사용: 이번에 evict한 slot은 삭제가 커밋되기 전까지
+                # 다른 프로세스가 옛 행으로 읽을 수 있으므로 다음 put_many부터 사용
+                free = [r[0] for r in cur.execute(
+                    "SELECT slot FROM free_slots WHERE model=? LIMIT ?", (model, len(new))
+                ).fetchall()]
+                cur.executemany("DELETE FROM free_slots WHERE model=? AND slot=?", [(model, s) for s in free])
+
+                count = cur.execute("SELECT COUNT(*) FROM emb WHERE model=?", (model,)).fetchone()[0]
+                overflow = count + len(new) - self.max_entries
+                if overflow > 0:
+                    victims = cur.execute(
+                        "SELECT h, slot FROM emb WHERE model=? ORDER BY last_used ASC LIMIT ?", (model, overflow)
+                    ).fetchall()
+                    cur.executemany("DELETE FROM emb WHERE model=? AND h=?", [(model, h) for h, _ in victims])
+                    cur.executemany("INSERT OR IGNORE INTO free_slots(model, slot) VALUES (?,?)", [(model, s) for _, s in victims])
+                    metrics.inc("embed_cache.evicted", len(victims))
+
+                fresh = len(new) - len(free)
+                slots = free + list(range(next_slot, next_slot + fresh))
+                next_slot += fresh
+                while capacity < next_slot:
+                    capacity *= 2
+                cur.execute("UPDATE models SET capacity=?, next_slot=? WHERE model=?", (capacity, next_slot, model))
+
+                # 벡터를 먼저 쓰고 같은 트랜잭션에서 slot 행을 커밋 → 커밋된 행은 항상 써진 벡터를 가리킴
+                mm = self._mmap(model, dim, capacity)
+                for slot, (_, vec) in zip(slots, new):
+                    mm[slot] = np.asarray(vec, dtype=np.float32)
+                mm.flush()
+                now = time.time()
+                cur.executemany(
+                    "INSERT INTO emb(model, h, slot, last_used) VALUES (?,?,?,?)",
+                    [(model, h, slot, now) for slot, (h, _) in zip(slots, new)],
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT m.model, m.dim, m.capacity, (SELECT COUNT(*) FROM emb e WHERE e.model=m.model) FROM models m"
+            ).fetchall()
+        return {"dir": self.dir, "models": {r[0]: {"dim": r[1], "capacity": r[2], "entries": r[3]} for r in rows}}
+
+
+class CachedEmbeddings(Embeddings):
+    """embed_documents만 캐시(질의 임베딩은 그대로 전달)."""
+
+    def __init__(self, base: Embeddings, model_name: str, store: EmbeddingCacheStore):
+        self.base = base
+        self.model_name = model_name
+        self.store = store
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        found = self.store.get_many(self.model_name, list(dict.fromkeys(hashes)))
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = t
+        metrics.inc("embed_cache.hit", len(texts) - len(missing))
+        metrics.inc("embed_cache.miss", len(missing))
+        if missing:
+            vecs = self.base.embed_documents(list(missing.values()))
+            items = list(zip(missing.keys(), vecs))
+            self.store.put_many(self.model_name, items)
+            found.update({h: np.asarray(v, dtype=np.float32) for h, v in items})
+        return [found[h].tolist() for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+
+_STORE: dict = {"instance": None}
+_STORE_LOCK = threading.Lock()
+
+
+def cache_store() -> Optional[EmbeddingCacheStore]:
+    if not settings.EMBED_CACHE_ENABLED:
+        return None
+    with _STORE_LOCK:
+        if _STORE["instance"] is None:
+            _STORE["instance"] = EmbeddingCacheStore(settings.EMBED_CACHE_DIR, max_entries=settings.EMBED_CACHE_MAX_ENTRIES)
+        return _STORE["instance"]
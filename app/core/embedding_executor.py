@@ -0,0 +1,160 @@
+"""Embedding executor — 문서 임베딩을 token 예산 batch로 나눠 backend별 thread pool에서 병렬 호출.
+
+- batch: `EMBED_BATCH_TOKENS`(token 합) 와 현재 batch 크기(text 수) 중 먼저 닿는 쪽에서 끊음
+- 동시 요청: backend(provider)별 공유 pool, `EMBED_MAX_CONCURRENCY`개까지 → 여러 ingest가 동시에 돌아도 한도 공유
+  - community `OllamaEmbeddings`는 text마다 순차 HTTP 요청 → batch 여러 개를 동시에 보내야 Ollama 서버 병렬 처리를 씀
+- 일시 오류(timeout/연결/429/5xx)는 `EMBED_MAX_RETRIES`회까지 지수 backoff(+jitter) 후 재시도, 그 외 오류는 바로 전파
+- batch 크기 자동 조정(AIMD): batch 지연이 `EMBED_TARGET_BATCH_MS`보다 짧으면 +25%, 길거나 일시 오류면 절반
+  (`EMBED_BATCH_MIN` ~ `EMBED_BATCH_MAX`, 시작값 `EMBED_BATCH_SIZE`, backend별로 유지)
+- 순서: 반환 벡터는 입력 texts 순서 그대로
+- metrics: `embed_executor.{batches,texts,retries,errors}`, `embed_executor.batch_ms`, gauge `embed_executor.{batch_size,chunks_per_sec}`
+"""
+from __future__ import annotations
+import logging, random, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from app.core import metrics, settings
+from app.core.context_packer import count_tokens
+
+log = logging.getLogger(__name__)
+
+_TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+_TRANSIENT_NAME_RE = re.compile(r"Timeout|Connection|RateLimit|ServiceUnavailable|Overloaded|RemoteProtocol")
+
+_POOLS: Dict[str, ThreadPoolExecutor] = {}
+_TUNERS: Dict[str, "BatchTuner"] = {}
+_LOCK = threading.Lock()
+
+
+def is_transient(e: BaseException) -> bool:
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None:
+        return int(status) in _TRANSIENT_STATUS
+    if isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    return any(_TRANSIENT_NAME_RE.search(t.__name__) for t in type(e).__mro__)
+
+
+class BatchTuner:
+    """관측한 batch 지연으로 다음 batch 크기(text 수)를 정함."""
+
+    def __init__(self, size: int, lo: int, hi: int, target_ms: float):
+        self.lo, self.hi, self.target_ms = max(lo, 1), max(hi, lo, 1), target_ms
+        self._size = min(max(size, self.lo), self.hi)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def observe(self, n: int, ms: float) -> None:
+        with self._lock:
+            if ms > self.target_ms:
+                self._size = max(self.lo, self._size // 2)
+            elif n >= self._size:        # 꽉 찬 batch가 목표 안에 끝났을 때만 키움
+                self._size = min(self.hi, self._size + max(1, self._size // 4))
+        metrics.set_gauge("embed_executor.batch_size", self._size)
+
+    def backoff(self) -> None:
+        with self._lock:
+            self._size = max(self.lo, self._size // 2)
+        metrics.set_gauge("embed_executor.batch_size", self._size)
+
+
+def _pool(key: str) -> ThreadPoolExecutor:
+    with _LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ThreadPoolExecutor(max_workers=max(settings.EMBED_MAX_CONCURRENCY, 1),
+                                                   thread_name_prefix=f"embed-{key}")
+        return pool
+
+
+def _tuner(key: str) -> BatchTuner:
+    with _LOCK:
+        t = _TUNERS.get(key)
+        if t is None:
+            t = _TUNERS[key] = BatchTuner(settings.EMBED_BATCH_SIZE, settings.EMBED_BATCH_MIN,
+                                          settings.EMBED_BATCH_MAX, settings.EMBED_TARGET_BATCH_MS)
+        return t
+
+
+def shutdown_pools() -> None:
+    with _LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for p in pools:
+        p.shutdown(wait=False, cancel_futures=True)
+
+
+def make_batches(texts: Sequence[str], max_texts: int, max_tokens: int) -> List[List[int]]:
+    """입력 순서를 유지한 index batch들. text 하나가 예산보다 커도 단독 batch로 보냄."""
+    out: List[List[int]] = []
+    cur: List[int] = []
+    used = 0
+    for i, t in enumerate(texts):
+        n = count_tokens(t or "")
+        if cur and (len(cur) >= max_texts or used + n > max_tokens):
+            out.append(cur)
+            cur, used = [], 0
+        cur.append(i)
+        used += n
+    return out + ([cur] if cur else [])
+
+
+class BatchedEmbeddings(Embeddings):
+    """`embed_documents`를 batch + 병렬 + 재시도로 실행(질의 임베딩은 그대로 전달)."""
+
+    def __init__(self, base: Embeddings, key: str = "default"):
+        self.base = base
+        self.key = key
+
+    def _call(self, texts: List[str]) -> List[List[float]]:
+        tuner = _tuner(self.key)
+        for attempt in range(settings.EMBED_MAX_RETRIES + 1):
+            t0 = time.perf_counter()
+            try:
+                vecs = self.base.embed_documents(texts)
+            except Exception as e:
+                if attempt >= settings.EMBED_MAX_RETRIES or not is_transient(e):
+                    metrics.inc("embed_executor.errors")
+                    raise
+                delay = settings.EMBED_RETRY_BASE_SEC * (2 ** attempt) * (1 + random.random() * 0.5)
+                log.warning("embedding batch failed (%s), retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+                metrics.inc("embed_executor.retries")
+                tuner.backoff()
+                time.sleep(delay)
+                continue
+            ms = (time.perf_counter() - t0) * 1000
+            tuner.observe(len(texts), ms)
+            metrics.observe("embed_executor.batch_ms", ms)
+            return vecs
+        raise RuntimeError("unreachable")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        t0 = time.perf_counter()
+        batches = make_batches(texts, _tuner(self.key).size, settings.EMBED_BATCH_TOKENS)
+        if len(batches) == 1 or settings.EMBED_MAX_CONCURRENCY <= 1:
+            results = [self._call([texts[i] for i in b]) for b in batches]
+        else:
+            pool = _pool(self.key)
+            futures = [pool.submit(self._call, [texts[i] for i in b]) for b in batches]
+            results = [f.result() for f in futures]
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        for b, vecs in zip(batches, results):
+            for i, v in zip(b, vecs):
+                out[i] = v
+        elapsed = time.perf_counter() - t0
+        metrics.inc("embed_executor.batches", len(batches))
+        metrics.inc("embed_executor.texts", len(texts))
+        metrics.set_gauge("embed_executor.chunks_per_sec", round(len(texts) / max(elapsed, 1e-9), 1))
+        return out  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
@@ -0,0 +1,138 @@
+"""Provider별 HTTP keep-alive connection pool.
+
+- OpenAI / OpenAI-호환: `httpx.Client` / `httpx.AsyncClient`를 provider마다 1개씩 만들어 모델 인스턴스가 공유
+- Ollama: langchain_community의 ChatOllama/OllamaEmbeddings는 모듈 전역 `requests.post`를
+  호출(요청마다 새 Session → 매번 TCP 연결)하므로, 해당 모듈의 `requests`를
+  pooled `requests.Session`으로 위임하는 얇은 proxy로 교체합니다.
+  - async 경로(`ainvoke`/`astream`)는 호출마다 `aiohttp.ClientSession()`을 새로 만듦 → 모듈의 `aiohttp`도
+    event loop별 공유 `TCPConnector`(`connector_owner=False`: session을 닫아도 연결 유지)를 쓰는 proxy로 교체
+  - 공유 connector는 lifespan 종료 시 `aclose_ollama()`로 닫음
+"""
+from __future__ import annotations
+import asyncio
+import threading
+from typing import Dict
+
+import aiohttp
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core import settings
+
+_LOCK = threading.Lock()
+_SYNC: Dict[str, httpx.Client] = {}
+_ASYNC: Dict[str, httpx.AsyncClient] = {}
+_OLLAMA: dict = {"session": None}
+_OLLAMA_ASYNC: Dict[asyncio.AbstractEventLoop, aiohttp.TCPConnector] = {}
+
+
+def pool_size(provider: str) -> int:
+    return {
+        "ollama": settings.OLLAMA_POOL_SIZE,
+        "openai_compatible": settings.OPENAI_COMPAT_POOL_SIZE,
+        "openai": settings.OPENAI_POOL_SIZE,
+    }.get(provider, 10)
+
+
+def _limits(provider: str) -> httpx.Limits:
+    n = pool_size(provider)
+    return httpx.Limits(max_connections=n, max_keepalive_connections=n, keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SEC)
+
+
+def http_client(provider: str) -> httpx.Client:
+    with _LOCK:
+        c = _SYNC.get(provider)
+        if c is None:
+            c = _SYNC[provider] = httpx.Client(limits=_limits(provider))
+        return c
+
+
+def http_async_client(provider: str) -> httpx.AsyncClient:
+    with _LOCK:
+        c = _ASYNC.get(provider)
+        if c is None:
+            c = _ASYNC[provider] = httpx.AsyncClient(limits=_limits(provider))
+        return c
+
+
+class _PooledRequests:
+    """`requests` 모듈 대용: post만 공유 Session으로 보내고 나머지 속성은 원래 모듈로 위임."""
+
+    def __init__(self, session: requests.Session):
+        self._session = session
+
+    def post(self, url, **kwargs):
+        return self._session.post(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+def _ollama_connector() -> aiohttp.TCPConnector:
+    """현재 event loop의 공유 connector(connector는 loop에 묶이므로 loop별 1개)."""
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        for old in [lp for lp in _OLLAMA_ASYNC if lp.is_closed()]:
+            del _OLLAMA_ASYNC[old]   # asyncio.run()이 끝난 loop → 참조만 정리
+        conn = _OLLAMA_ASYNC.get(loop)
+        if conn is None or conn.closed:
+            n = pool_size("ollama")
+            conn = _OLLAMA_ASYNC[loop] = aiohttp.TCPConnector(
+                limit=n, limit_per_host=n, keepalive_timeout=settings.HTTP_KEEPALIVE_EXPIRY_SEC)
+        return conn
+
+
+class _PooledAiohttp:
+    """`aiohttp` 모듈 대용: `ClientSession()`이 공유 connector를 쓰고 나머지 속성은 원래 모듈로 위임."""
+
+    def ClientSession(self, *args, **kwargs):
+        kwargs.setdefault("connector", _ollama_connector())
+        kwargs.setdefault("connector_owner", False)
+        return aiohttp.ClientSession(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(aiohttp, name)
+
+
+def install_ollama_pool() -> requests.Session:
+    """ChatOllama / OllamaEmbeddings가 공유 keep-alive Session을 쓰도록 1회 설치."""
+    with _LOCK:
+        if _OLLAMA["session"] is not None:
+            return _OLLAMA["session"]
+        n = pool_size("ollama")
+        s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=n, pool_maxsize=n)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        proxy = _PooledRequests(s)
+
+        import langchain_community.llms.ollama as _llm_mod
+        import langchain_community.embeddings.ollama as _emb_mod
+        _llm_mod.requests = proxy
+        _emb_mod.requests = proxy
+        _llm_mod.aiohttp = _PooledAiohttp()
+        _OLLAMA["session"] = s
+        return s
+
+
+def close_all() -> None:
+    with _LOCK:
+        for c in _SYNC.values():
+            c.close()
+        _SYNC.clear()
+        # AsyncClient는 event loop 안에서 aclose 해야 하므로 참조만 정리
+        _ASYNC.clear()
+        if _OLLAMA["session"] is not None:
+            _OLLAMA["session"].close()
+            _OLLAMA["session"] = None   # 다음 install_ollama_pool()이 새 Session을 설치
+        # aiohttp connector도 loop 안에서 닫아야 함(aclose_ollama) → 여기서는 참조만 정리
+        _OLLAMA_ASYNC.clear()
+
+
+async def aclose_ollama() -> None:
+    """현재 event loop의 Ollama 공유 connector 닫기(lifespan 종료 시)."""
+    with _LOCK:
+        conn = _OLLAMA_ASYNC.pop(asyncio.get_running_loop(), None)
+    if conn is not None and not conn.closed:
+        await conn.close()
@@ -0,0 +1,97 @@
+"""Ingestion manifest: 소스 파일별 content hash / mtime / chunk id 기록.
+
+- `{persist_dir}/manifests/{collection}.json` 에 저장
+- stat(mtime, size)이 그대로면 해시 계산 없이 skip → no-op ingest는 ms 단위
+- 저장은 tmp 파일 + os.replace 로 원자적으로 교체
+"""
+from __future__ import annotations
+import os, json, hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+MANIFEST_DIRNAME = "manifests"
+MANIFEST_VERSION = 1
+
+
+def file_sha1(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            b = f.read(bufsize)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+
+
+def json_sha1(obj) -> str:
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def chunk_id(rel_path: str, file_hash: str, index: int) -> str:
+    """결정론적 chunk id: 같은 파일 내용 → 같은 id (Chroma upsert 키)."""
+    return hashlib.sha1(f"{rel_path}:{file_hash}:{index}".encode("utf-8")).hexdigest()
+
+
+def anchor_chunk_id(rel_path: str, anchor: str) -> str:
+    """위치 기반 chunk id: 파일 경로 + chunk anchor(heading 경로/페이지 + 순번) → 편집되지 않은 구간은 같은 id."""
+    return hashlib.sha1(f"{rel_path}#{anchor}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FileEntry:
+    sha1: str
+    mtime_ns: int
+    size: int
+    meta_sha1: str = ""
+    chunk_ids: List[str] = field(default_factory=list)
+    chunk_hashes: List[str] = field(default_factory=list)   # chunk_ids와 같은 순서, 내용+메타데이터 hash
+    error: Optional[str] = None
+
+    def same_stat(self, st: os.stat_result) -> bool:
+        return self.mtime_ns == st.st_mtime_ns and self.size == st.st_size
+
+
+class IngestManifest:
+    def __init__(self, path: str, signature: str = "", files: Dict[str, FileEntry] | None = None):
+        self.path = path
+        self.signature = signature
+        self.files: Dict[str, FileEntry] = files or {}
+
+    @classmethod
+    def for_collection(cls, persist_dir: str, collection: str) -> "IngestManifest":
+        path = os.path.join(persist_dir, MANIFEST_DIRNAME, f"{collection}.json")
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "IngestManifest":
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception:
+            return cls(path)
+        if raw.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        files = {k: FileEntry(**v) for k, v in (raw.get("files") or {}).items()}
+        return cls(path, signature=raw.get("signature", ""), files=files)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        data = {
+            "version": MANIFEST_VERSION,
+            "signature": self.signature,
+            "files": {k: vars(v) for k, v in sorted(self.files.items())},
+        }
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def all_chunk_ids(self) -> List[str]:
+        out: List[str] = []
+        for e in self.files.values():
+            out.extend(e.chunk_ids)
+        return out
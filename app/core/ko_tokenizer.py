@@ -0,0 +1,133 @@
+"""Korean-aware tokenizer for lexical indexing (FTS5 / BM25).
+
+- 정규화: Unicode NFKC + 소문자
+- 한글 어절: 조사 제거("관객개발을" → "관객개발") 후 원형/어간 + 글자 bigram(관객, 객개, 개발)
+  → 띄어쓰기/조사가 달라도 같은 토큰으로 매칭 (형태소 분석기 없이)
+- 영문/숫자: 단어 그대로
+- `TokenCache`: 텍스트 content hash → 토큰 결과(SQLite + 메모리 LRU)
+  → 재인덱싱 시 바뀌지 않은 chunk는 다시 토큰화하지 않음
+"""
+from __future__ import annotations
+import os, re, sqlite3, threading, hashlib, unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+from app.core import metrics
+
+TOKENIZER_VERSION = "ko-1"
+
+# 긴 것부터 매칭 (예: "에서는" → "에서" → "에")
+_PARTICLES = sorted(
+    [
+        "이", "가", "은", "는", "을", "를", "의", "에", "도", "만", "와", "과", "로", "으로",
+        "에서", "에게", "께서", "부터", "까지", "처럼", "보다", "이나", "나", "랑", "이랑",
+        "한테", "에서는", "에서도", "으로는", "으로도", "로는", "로도", "에는", "에도", "와는",
+        "과는", "이란", "란", "이며", "며", "이고", "고", "들", "들은", "들이", "들을", "들의",
+    ],
+    key=len,
+    reverse=True,
+)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_HANGUL_RE = re.compile(r"^[가-힣]+$")
+_MIN_STEM = 2
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def strip_particle(word: str) -> str:
+    for p in _PARTICLES:
+        if word.endswith(p) and len(word) - len(p) >= _MIN_STEM:
+            return word[: -len(p)]
+    return word
+
+
+def _bigrams(word: str) -> List[str]:
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for w in _WORD_RE.findall(normalize(text)):
+        if not _HANGUL_RE.match(w):
+            out.append(w)
+            continue
+        stem = strip_particle(w)
+        out.append(w)
+        if stem != w:
+            out.append(stem)
+        if len(stem) > 2:
+            out.extend(_bigrams(stem))
+    return out
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(f"{TOKENIZER_VERSION}\x00{text or ''}".encode("utf-8", errors="ignore")).hexdigest()
+
+
+class TokenCache:
+    """content hash → 공백으로 이은 토큰 문자열. 메모리 LRU 앞단 + SQLite 영속."""
+
+    def __init__(self, path: str, memory_entries: int = 20000):
+        self.path = path
+        self.memory_entries = memory_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS tokens(h TEXT PRIMARY KEY, body TEXT)")
+        self._db.commit()
+
+    def _remember(self, h: str, body: str) -> None:
+        self._mem[h] = body
+        self._mem.move_to_end(h)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    def bodies(self, texts: Sequence[str]) -> List[str]:
+        """texts 순서대로 토큰 문자열 반환(miss만 토큰화 후 저장)."""
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[str, str] = {}
+        with self._lock:
+            for h in hashes:
+                if h in self._mem:
+                    found[h] = self._mem[h]
+                    self._mem.move_to_end(h)
+            need = [h for h in dict.fromkeys(hashes) if h not in found]
+            for i in range(0, len(need), 500):
+                part = need[i:i + 500]
+                q = f"SELECT h, body FROM tokens WHERE h IN ({','.join('?' * len(part))})"
+                for h, body in self._db.execute(q, part).fetchall():
+                    found[h] = body
+                    self._remember(h, body)
+        new = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in new:
+                new[h] = " ".join(tokenize(t))
+        metrics.inc("token_cache.hit", len(texts) - len(new))
+        metrics.inc("token_cache.miss", len(new))
+        if new:
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO tokens(h, body) VALUES (?,?)", list(new.items()))
+                self._db.commit()
+                for h, body in new.items():
+                    self._remember(h, body)
+            found.update(new)
+        return [found[h] for h in hashes]
+
+    def body(self, text: str) -> str:
+        return self.bodies([text])[0]
+
+
+_CACHES: Dict[str, TokenCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def token_cache(path: str) -> TokenCache:
+    with _CACHES_LOCK:
+        c = _CACHES.get(path)
+        if c is None:
+            c = _CACHES[path] = TokenCache(path)
+        return c
@@ -0,0 +1,145 @@
+"""Persistent lexical index (SQLite FTS5 + bm25) — 벡터 컬렉션과 같은 chunk id로 동기화.
+
+- `{persist_dir}/lexical/{collection}.sqlite`
+  - `chunks(rowid, id, text, metadata)` : 원문 + 메타데이터(JSON)
+  - `fts(body)`                         : rowid를 공유하는 FTS5 테이블(bm25 점수)
+- ingest가 Chroma에 upsert/delete 할 때 같은 id로 함께 갱신 → 질의 시 재구축 없음
+- 비어 있거나 컬렉션과 어긋나면 vector store 내용으로 1회 backfill(`rebuild`)
+- 토큰화: `ko_tokenizer`(NFKC + 조사 제거 + 한글 bigram), chunk 토큰 결과는 content hash로 캐시
+  → FTS5에는 미리 토큰화한 문자열을 넣고 unicode61은 공백 분리만 담당
+"""
+from __future__ import annotations
+import os, json, sqlite3, threading
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.ko_tokenizer import TOKENIZER_VERSION, tokenize, token_cache
+from app.core.metadata_filter import match_where
+
+LEXICAL_DIRNAME = "lexical"
+_SQL_BATCH = 500
+
+
+def _match_expr(tokens: Sequence[str]) -> str:
+    # 각 토큰을 phrase로 감싸 FTS5 문법 문자(-, :, * 등)를 무력화, OR 결합(bm25가 순위 결정)
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(tokens))
+
+
+class LexicalIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS chunks(rowid INTEGER PRIMARY KEY, id TEXT UNIQUE, text TEXT, metadata TEXT);
+        CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(body, tokenize='unicode61');
+        CREATE TABLE IF NOT EXISTS info(key TEXT PRIMARY KEY, value TEXT);
+        """)
+        row = self._db.execute("SELECT value FROM info WHERE key='tokenizer'").fetchone()
+        if row is None or row[0] != TOKENIZER_VERSION:
+            # 토큰화 규칙이 바뀌면 비우고 backfill로 재구축
+            self._db.executescript("DELETE FROM fts; DELETE FROM chunks;")
+            self._db.execute("INSERT OR REPLACE INTO info(key, value) VALUES ('tokenizer', ?)", (TOKENIZER_VERSION,))
+        self._db.commit()
+        self._tokens = token_cache(os.path.join(os.path.dirname(path) or ".", "token_cache.sqlite"))
+
+    @classmethod
+    def for_collection(cls, persist_dir: str, collection: str) -> "LexicalIndex":
+        return cls(os.path.join(persist_dir, LEXICAL_DIRNAME, f"{collection}.sqlite"))
+
+    def _delete_locked(self, cur: sqlite3.Cursor, ids: Sequence[str]) -> int:
+        n = 0
+        for i in range(0, len(ids), _SQL_BATCH):
+            part = list(ids[i:i + _SQL_BATCH])
+            marks = ",".join("?" * len(part))
+            rowids = [r[0] for r in cur.execute(f"SELECT rowid FROM chunks WHERE id IN ({marks})", part).fetchall()]
+            if rowids:
+                rmarks = ",".join("?" * len(rowids))
+                cur.execute(f"DELETE FROM fts WHERE rowid IN ({rmarks})", rowids)
+                cur.execute(f"DELETE FROM chunks WHERE rowid IN ({rmarks})", rowids)
+                n += len(rowids)
+        return n
+
+    def upsert(self, ids: Sequence[str], docs: Sequence[Document]) -> None:
+        if not ids:
+            return
+        rows = [(i, d.page_content or "", json.dumps(d.metadata or {}, ensure_ascii=False, default=str)) for i, d in zip(ids, docs)]
+        bodies = self._tokens.bodies([text for _, text, _ in rows])
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_locked(cur, list(ids))
+                for (cid, text, meta), body in zip(rows, bodies):
+                    cur.execute("INSERT INTO chunks(id, text, metadata) VALUES (?,?,?)", (cid, text, meta))
+                    cur.execute("INSERT INTO fts(rowid, body) VALUES (?,?)", (cur.lastrowid, body))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    def delete(self, ids: Sequence[str]) -> int:
+        if not ids:
+            return 0
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                n = self._delete_locked(cur, list(ids))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.executescript("DELETE FROM fts; DELETE FROM chunks;")
+            self._db.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def rebuild(self, items: Iterable[Tuple[str, Document]]) -> int:
+        """전체 교체(vector store → lexical backfill)."""
+        items = list(items)
+        self.clear()
+        for i in range(0, len(items), _SQL_BATCH):
+            part = items[i:i + _SQL_BATCH]
+            self.upsert([cid for cid, _ in part], [d for _, d in part])
+        return len(items)
+
+    def search_with_scores(self, query: str, k: int = 4, where: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """bm25 순위 상위 k개 (점수는 클수록 관련; FTS5 bm25()의 부호 반전)."""
+        tokens = tokenize(query)
+        if not tokens or k <= 0:
+            return []
+        out: List[Tuple[Document, float]] = []
+        with self._lock:
+            cur = self._db.execute(
+                "SELECT c.id, c.text, c.metadata, bm25(fts) AS s FROM fts JOIN chunks c ON c.rowid = fts.rowid "
+                "WHERE fts MATCH ? ORDER BY s",
+                (_match_expr(tokens),),
+            )
+            # 필터는 순위 순서대로 평가하며 k개가 차면 중단(cursor는 lazy)
+            for cid, text, meta_raw, score in cur:
+                meta = json.loads(meta_raw or "{}")
+                if not match_where(meta, where):
+                    continue
+                meta.setdefault("chunk_id", cid)
+                out.append((Document(page_content=text, metadata=meta), -float(score)))
+                if len(out) >= k:
+                    break
+            cur.close()
+        return out
+
+    def search(self, query: str, k: int = 4, where: Optional[dict] = None) -> List[Document]:
+        return [d for d, _ in self.search_with_scores(query, k=k, where=where)]
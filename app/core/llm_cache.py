@@ -0,0 +1,135 @@
+"""Exact-match LLM response cache (SQLite, TTL + LRU).
+
+- LangChain `BaseCache` 구현 → chat model의 `cache=` 인자로 연결(`build_chat_model`)
+- 키: 정규화된 메시지 목록(prompt) + llm_string(model/params) 의 sha256
+- 결정론적 호출(temperature=0, non-streaming)에만 사용: `LLM_CACHE_ENABLED=true`
+- 만료(`LLM_CACHE_TTL_SEC`) 항목은 조회 시 삭제, `LLM_CACHE_MAX_ENTRIES` 초과 시 last_access 오래된 순으로 제거
+"""
+from __future__ import annotations
+import os, json, sqlite3, threading, time, hashlib
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+from app.core import settings
+from app.core import metrics
+
+
+def _strip_strings(obj: Any) -> Any:
+    if isinstance(obj, str):
+        return obj.strip()
+    if isinstance(obj, list):
+        return [_strip_strings(x) for x in obj]
+    if isinstance(obj, dict):
+        return {k: _strip_strings(v) for k, v in obj.items()}
+    return obj
+
+
+def normalize_prompt(prompt: str) -> str:
+    """직렬화된 메시지 목록을 key 순서/앞뒤 공백에 무관한 형태로 정규화."""
+    try:
+        return json.dumps(_strip_strings(json.loads(prompt)), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    except Exception:
+        return (prompt or "").strip()
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    raw = normalize_prompt(prompt) + "\x00" + (llm_string or "")
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SQLiteLRUCache(BaseCache):
+    def __init__(self, path: str, ttl_sec: float = 86400, max_entries: int = 5000):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS llm_cache(
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            created_at REAL,
+            last_access REAL,
+            hits INTEGER DEFAULT 0
+        )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache(last_access)")
+        self._db.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM llm_cache WHERE key=?", (key,)).fetchone()
+            if row and self.ttl_sec and now - row[1] > self.ttl_sec:
+                self._db.execute("DELETE FROM llm_cache WHERE key=?", (key,))
+                self._db.commit()
+                metrics.inc("llm_cache.expired")
+                row = None
+            if not row:
+                metrics.inc("llm_cache.miss")
+                return None
+            self._db.execute("UPDATE llm_cache SET last_access=?, hits=hits+1 WHERE key=?", (now, key))
+            self._db.commit()
+        metrics.inc("llm_cache.hit")
+        try:
+            return loads(row[0])
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        value = dumps(list(return_val))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache(key, value, created_at, last_access, hits) VALUES (?,?,?,?,0)",
+                (key, value, now, now),
+            )
+            n = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if self.max_entries and n > self.max_entries:
+                over = n - self.max_entries
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (over,),
+                )
+                metrics.inc("llm_cache.evicted", over)
+                n = self.max_entries
+            self._db.commit()
+        metrics.set_gauge("llm_cache.entries", n)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+        metrics.set_gauge("llm_cache.entries", 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "path": self.path,
+            "entries": n,
+            "hits": metrics.counter("llm_cache.hit"),
+            "misses": metrics.counter("llm_cache.miss"),
+        }
+
+
+_CACHE: dict = {"instance": None}
+_CACHE_LOCK = threading.Lock()
+
+
+def response_cache() -> Optional[SQLiteLRUCache]:
+    """설정이 켜져 있을 때만 공유 cache 인스턴스를 반환."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE["instance"] is None:
+            _CACHE["instance"] = SQLiteLRUCache(
+                settings.LLM_CACHE_PATH,
+                ttl_sec=settings.LLM_CACHE_TTL_SEC,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            )
+        return _CACHE["instance"]
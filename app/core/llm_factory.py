@@ -1,50 +1,143 @@
 from __future__ import annotations
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
 import requests
 from app.core import settings
+from app.core import metrics
+from app.core import http_pools
+from app.core.llm_cache import response_cache
+from app.core.embedding_cache import CachedEmbeddings, cache_store
+from app.core.embedding_executor import BatchedEmbeddings
 
-def _reachable(url: str, timeout: int = 3) -> bool:
+def _reachable(url: str, timeout: float = 3) -> bool:
     try:
         r = requests.get(url, timeout=timeout)
         return r.status_code < 500
     except Exception:
         return False
 
-def pick_provider() -> str:
-    p = (settings.LLM_PROVIDER or "auto").lower()
-    if p in ("ollama", "openai_compatible", "openai"):
-        return p
+def _probe(name: str, url: str) -> bool:
+    t0 = time.perf_counter()
+    ok = _reachable(url, timeout=settings.PROVIDER_PROBE_TIMEOUT_SEC)
+    metrics.observe(f"provider.probe_ms.{name}", (time.perf_counter() - t0) * 1000)
+    metrics.set_gauge(f"provider.up.{name}", 1 if ok else 0)
+    return ok
 
-    if settings.OLLAMA_BASE_URL and _reachable(settings.OLLAMA_BASE_URL.rstrip("/") + "/api/tags"):
+def _resolve_provider() -> str:
+    """auto 모드: 네트워크 probe로 사용 가능한 backend 선택(느림 → 캐시 뒤에서만 호출)."""
+    if settings.OLLAMA_BASE_URL and _probe("ollama", settings.OLLAMA_BASE_URL.rstrip("/") + "/api/tags"):
         return "ollama"
-    if settings.OPENAI_COMPAT_BASE_URL and _reachable(settings.OPENAI_COMPAT_BASE_URL.rstrip("/") + "/models"):
+    if settings.OPENAI_COMPAT_BASE_URL and _probe("openai_compatible", settings.OPENAI_COMPAT_BASE_URL.rstrip("/") + "/models"):
         return "openai_compatible"
     if settings.OPENAI_API_KEY:
         return "openai"
     return "ollama"
 
-def build_chat_model(temperature: float = 0.2, streaming: bool = False):
-    provider = pick_provider()
+# --- provider cache (TTL) + background prober ---
+_PROVIDER_LOCK = threading.Lock()
+_REFRESH_LOCK = threading.Lock()
+_PROVIDER: dict = {"name": None, "resolved_at": 0.0}
+_PROBER: dict = {"thread": None, "stop": None}
+
+def refresh_provider() -> str:
+    """probe를 다시 실행해 캐시를 갱신하고, backend가 바뀌면 switch metric을 올린다."""
+    name = _resolve_provider()
+    with _PROVIDER_LOCK:
+        prev = _PROVIDER["name"]
+        _PROVIDER.update(name=name, resolved_at=time.time())
+    if prev is not None and prev != name:
+        metrics.inc("provider.switches")
+        metrics.inc(f"provider.switches.{prev}->{name}")
+    return name
+
+def _cached_provider() -> str | None:
+    name = _PROVIDER["name"]
+    if name is not None and time.time() - _PROVIDER["resolved_at"] < settings.PROVIDER_CACHE_TTL_SEC:
+        return name
+    return None
+
+def pick_provider() -> str:
+    p = (settings.LLM_PROVIDER or "auto").lower()
+    if p in ("ollama", "openai_compatible", "openai"):
+        return p
+
+    name = _cached_provider()
+    if name is not None:
+        metrics.inc("provider.cache_hit")
+        return name
+    metrics.inc("provider.cache_miss")
+    with _REFRESH_LOCK:
+        # 동시에 만료를 본 요청들은 한 번의 probe 결과를 공유
+        return _cached_provider() or refresh_provider()
 
-    if provider == "ollama":
-        from langchain_community.chat_models import ChatOllama
-        return ChatOllama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL,
-            temperature=temperature,
-            timeout=settings.OLLAMA_TIMEOUT_SEC,
-            streaming=streaming,
-        )
-
-    if provider == "openai_compatible":
-        from langchain_openai import ChatOpenAI
-        return ChatOpenAI(
-            api_key=settings.OPENAI_COMPAT_API_KEY,
-            base_url=settings.OPENAI_COMPAT_BASE_URL,
-            model=settings.OPENAI_COMPAT_MODEL,
-            temperature=temperature,
-            streaming=streaming,
-        )
+def _prober_loop(stop: threading.Event) -> None:
+    while not stop.wait(settings.PROVIDER_PROBE_INTERVAL_SEC):
+        try:
+            refresh_provider()
+        except Exception:
+            metrics.inc("provider.probe_errors")
 
+def start_provider_prober() -> bool:
+    """auto 모드일 때만 백그라운드 probe thread 기동(중복 기동 안 함)."""
+    if (settings.LLM_PROVIDER or "auto").lower() != "auto":
+        return False
+    if _PROBER["thread"] is not None and _PROBER["thread"].is_alive():
+        return True
+    refresh_provider()
+    stop = threading.Event()
+    t = threading.Thread(target=_prober_loop, args=(stop,), name="provider-prober", daemon=True)
+    _PROBER.update(thread=t, stop=stop)
+    t.start()
+    return True
+
+def stop_provider_prober() -> None:
+    if _PROBER["stop"] is not None:
+        _PROBER["stop"].set()
+    _PROBER.update(thread=None, stop=None)
+
+def provider_status() -> dict:
+    return {
+        "configured": settings.LLM_PROVIDER,
+        "current": _PROVIDER["name"],
+        "resolved_at": _PROVIDER["resolved_at"] or None,
+        "ttl_sec": settings.PROVIDER_CACHE_TTL_SEC,
+        "prober_running": _PROBER["thread"] is not None and _PROBER["thread"].is_alive(),
+    }
+
+def chat_model_name(provider: str | None = None) -> str:
+    """현재 provider가 쓰는 chat 모델 이름(모델별 context 예산 조회용)."""
+    return _CHAT_MODEL_NAMES.get(provider or pick_provider(), _CHAT_MODEL_NAMES["ollama"])() or ""
+
+# --- model builders (provider -> constructor) ---
+
+def _ollama_chat(temperature: float, streaming: bool, cache=None):
+    from langchain_community.chat_models import ChatOllama
+    http_pools.install_ollama_pool()
+    return ChatOllama(
+        base_url=settings.OLLAMA_BASE_URL,
+        model=settings.OLLAMA_MODEL,
+        temperature=temperature,
+        timeout=settings.OLLAMA_TIMEOUT_SEC,
+        streaming=streaming,
+        cache=cache,
+    )
+
+def _openai_compatible_chat(temperature: float, streaming: bool, cache=None):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        api_key=settings.OPENAI_COMPAT_API_KEY,
+        base_url=settings.OPENAI_COMPAT_BASE_URL,
+        model=settings.OPENAI_COMPAT_MODEL,
+        temperature=temperature,
+        streaming=streaming,
+        cache=cache,
+        http_client=http_pools.http_client("openai_compatible"),
+        http_async_client=http_pools.http_async_client("openai_compatible"),
+    )
+
+def _openai_chat(temperature: float, streaming: bool, cache=None):
     from langchain_openai import ChatOpenAI
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is empty but provider=openai")
@@ -53,27 +146,141 @@ def build_chat_model(temperature: float = 0.2, streaming: bool = False):
         model=settings.OPENAI_MODEL,
         temperature=temperature,
         streaming=streaming,
+        cache=cache,
+        http_client=http_pools.http_client("openai"),
+        http_async_client=http_pools.http_async_client("openai"),
     )
 
-def build_embeddings():
-    provider = pick_provider()
+def _ollama_embeddings(model: str | None = None):
+    from langchain_community.embeddings import OllamaEmbeddings
+    http_pools.install_ollama_pool()
+    return OllamaEmbeddings(base_url=settings.OLLAMA_BASE_URL, model=model or settings.OLLAMA_EMBED_MODEL)
 
-    if provider == "ollama":
-        from langchain_community.embeddings import OllamaEmbeddings
-        return OllamaEmbeddings(base_url=settings.OLLAMA_BASE_URL, model=settings.OLLAMA_EMBED_MODEL)
-
-    if provider == "openai_compatible":
-        from langchain_openai import OpenAIEmbeddings
-        return OpenAIEmbeddings(
-            api_key=settings.OPENAI_COMPAT_API_KEY,
-            base_url=settings.OPENAI_COMPAT_BASE_URL,
-            model="text-embedding-3-small",
-        )
+def _openai_compatible_embeddings(model: str | None = None):
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(
+        api_key=settings.OPENAI_COMPAT_API_KEY,
+        base_url=settings.OPENAI_COMPAT_BASE_URL,
+        model=model or "text-embedding-3-small",
+        http_client=http_pools.http_client("openai_compatible"),
+        http_async_client=http_pools.http_async_client("openai_compatible"),
+    )
 
+def _openai_embeddings(model: str | None = None):
     from langchain_openai import OpenAIEmbeddings
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is empty but embeddings need OpenAI")
-    return OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY, model="text-embedding-3-small")
+    return OpenAIEmbeddings(
+        api_key=settings.OPENAI_API_KEY,
+        model=model or "text-embedding-3-small",
+        http_client=http_pools.http_client("openai"),
+        http_async_client=http_pools.http_async_client("openai"),
+    )
+
+_CHAT_BUILDERS = {
+    "ollama": _ollama_chat,
+    "openai_compatible": _openai_compatible_chat,
+    "openai": _openai_chat,
+}
+
+_EMBEDDING_BUILDERS = {
+    "ollama": _ollama_embeddings,
+    "openai_compatible": _openai_compatible_embeddings,
+    "openai": _openai_embeddings,
+}
+
+_CHAT_MODEL_NAMES = {
+    "ollama": lambda: settings.OLLAMA_MODEL,
+    "openai_compatible": lambda: settings.OPENAI_COMPAT_MODEL,
+    "openai": lambda: settings.OPENAI_MODEL,
+}
+
+# --- shared model registry: (provider, model, temperature, streaming) -> instance ---
+_MODELS_LOCK = threading.Lock()
+_MODELS: dict = {}
+
+def build_chat_model(temperature: float = 0.2, streaming: bool = False):
+    """공유 chat model 반환. 같은 키는 같은 인스턴스(및 provider connection pool)를 재사용.
+
+    LangChain chat model은 invoke 간 상태가 없어 thread 간 공유해도 안전합니다.
+    """
+    provider = pick_provider()
+    key = (provider, _CHAT_MODEL_NAMES[provider](), float(temperature), bool(streaming))
+    llm = _MODELS.get(key)
+    if llm is not None:
+        return llm
+    with _MODELS_LOCK:
+        llm = _MODELS.get(key)
+        if llm is None:
+            # 응답 캐시는 결정론적 호출(temperature=0, non-streaming)에만 연결
+            cache = response_cache() if (float(temperature) == 0 and not streaming) else None
+            llm = _MODELS[key] = _CHAT_BUILDERS[provider](temperature, streaming, cache=cache)
+            metrics.inc("llm.models_built")
+            metrics.set_gauge("llm.models_pooled", len(_MODELS))
+        return llm
+
+def reset_model_registry() -> None:
+    with _MODELS_LOCK:
+        _MODELS.clear()
+    http_pools.close_all()
+
+_EMBEDDING_MODEL_NAMES = {
+    "ollama": lambda: settings.OLLAMA_EMBED_MODEL,
+    "openai_compatible": lambda: "text-embedding-3-small",
+    "openai": lambda: "text-embedding-3-small",
+}
+
+def embedding_model_name(provider: str | None = None) -> str:
+    """현재 설정의 임베딩 모델 이름(컬렉션 버전에 기록)."""
+    return _EMBEDDING_MODEL_NAMES[provider or pick_provider()]()
+
+def build_embeddings(model: str | None = None):
+    """`model`을 주면 설정 대신 그 임베딩 모델(컬렉션 버전이 기록한 모델로 검색할 때)."""
+    provider = pick_provider()
+    model = model or _EMBEDDING_MODEL_NAMES[provider]()
+    emb = _EMBEDDING_BUILDERS[provider](model)
+    if settings.EMBED_EXECUTOR_ENABLED:
+        # cache miss만 executor로 → batch/병렬/재시도 (cache 아래에 둬야 hit은 backend 한도를 쓰지 않음)
+        emb = BatchedEmbeddings(emb, provider)
+    store = cache_store()
+    if store is None:
+        return emb
+    # 같은 텍스트는 컬렉션/스토어가 달라도 한 번만 임베딩 (model 이름별 캐시)
+    return CachedEmbeddings(emb, f"{provider}/{model}", store)
 
 def provider_name() -> str:
     return pick_provider()
+
+# --- async concurrency limit per backend (thread 수가 아니라 semaphore로 제한) ---
+_SLOTS: dict = {}
+_INFLIGHT: dict = {}
+
+def _max_concurrency(provider: str) -> int:
+    return {
+        "ollama": settings.LLM_MAX_CONCURRENCY_OLLAMA,
+        "openai_compatible": settings.LLM_MAX_CONCURRENCY_OPENAI_COMPAT,
+        "openai": settings.LLM_MAX_CONCURRENCY_OPENAI,
+    }.get(provider, 8)
+
+def _semaphore(provider: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    cur = _SLOTS.get(provider)
+    if cur is None or cur[0] is not loop:
+        cur = _SLOTS[provider] = (loop, asyncio.Semaphore(_max_concurrency(provider)))
+    return cur[1]
+
+@asynccontextmanager
+async def llm_slot(provider: str | None = None):
+    """LLM 호출 구간을 backend별 동시 실행 한도 안에서 수행."""
+    provider = provider or pick_provider()
+    sem = _semaphore(provider)
+    t0 = time.perf_counter()
+    async with sem:
+        metrics.observe(f"llm.slot_wait_ms.{provider}", (time.perf_counter() - t0) * 1000)
+        _INFLIGHT[provider] = _INFLIGHT.get(provider, 0) + 1
+        metrics.set_gauge(f"llm.inflight.{provider}", _INFLIGHT[provider])
+        try:
+            yield
+        finally:
+            _INFLIGHT[provider] -= 1
+            metrics.set_gauge(f"llm.inflight.{provider}", _INFLIGHT[provider])
@@ -0,0 +1,110 @@
+"""Markdown loader — `unstructured` 없이 파일당 1회 줄 단위 pass로 heading 구간별 Document 생성.
+
+- 반환 형식은 기존 `UnstructuredMarkdownLoader`와 같은 `List[Document]`(metadata `source` 포함)
+  - 다만 파일 1개 = Document 1개가 아니라 heading 구간마다 1개 → 분할된 chunk가 구간 metadata를 물려받음
+- metadata
+  - `heading_path`: `"h1 > h2 > h3"` 형태의 heading 계층(첫 heading 이전 서문은 `""`)
+  - `heading_level`: 구간 heading 수준(1~6, 서문 0)
+  - `start_index` / `end_index`: 파일 텍스트 기준 문자 offset → `text[start:end] == page_content`
+- ATX(`# 제목`)와 setext(`제목` + `===`/`---`) heading 인식, fenced code block(```, ~~~) 안의 `#`은 무시
+- 본문 없이 heading만 있는 구간은 다음 구간 앞에 붙임(예: `# 문서 제목` 바로 아래 `## 절`)
+"""
+from __future__ import annotations
+import re
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+_ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT_RE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LIST_OR_RULE_RE = re.compile(r"^ {0,3}(?:[-*+]\s|\d+[.)]\s|[-*_](?:\s*[-*_]){2,}\s*$|>)")
+
+
+def _headings(text: str) -> List[Tuple[int, int, int, str]]:
+    """[(구간 시작 offset, heading 끝 offset, level, title)] — heading 줄의 위치."""
+    out: List[Tuple[int, int, int, str]] = []
+    fence: Optional[str] = None
+    prev: Optional[Tuple[int, str]] = None        # 직전 문단 줄(setext 후보): (offset, line)
+    pos = 0
+    for line in text.splitlines(keepends=True):
+        start, pos = pos, pos + len(line)
+        body = line.rstrip("\r\n")
+        m = _FENCE_RE.match(body)
+        if fence is not None:
+            if m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence):
+                fence = None
+            continue
+        if m:
+            fence, prev = m.group(1), None
+            continue
+        m = _ATX_RE.match(body)
+        if m:
+            out.append((start, pos, len(m.group(1)), (m.group(2) or "").strip()))
+            prev = None
+            continue
+        m = _SETEXT_RE.match(body)
+        if m and prev is not None:
+            out.append((prev[0], pos, 1 if m.group(1)[0] == "=" else 2, prev[1].strip()))
+            prev = None
+            continue
+        if not body.strip() or _LIST_OR_RULE_RE.match(body):
+            prev = None
+        elif prev is None:
+            prev = (start, body)
+        else:
+            prev = None        # 여러 줄 문단 뒤의 `---`는 수평선으로 처리(setext는 한 줄 제목만 지원)
+    return out
+
+
+def split_markdown(text: str, source: str) -> List[Document]:
+    docs: List[Document] = []
+    stack: List[Tuple[int, str]] = []
+    pending: Optional[int] = None              # 본문 없는 heading 구간의 시작 offset
+    bounds = _headings(text)
+    marks = [(0, 0, 0, None)] + bounds + [(len(text), len(text), 0, None)]
+    for (start, head_end, level, title), nxt in zip(marks, marks[1:]):
+        if title is not None:
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, title))
+        end = nxt[0]
+        if end <= start:
+            continue
+        if not text[head_end:end].strip():      # heading만 있고 본문 없음 → 다음 구간에 합침
+            if title is not None and pending is None:
+                pending = start
+            continue
+        begin = pending if pending is not None else start
+        pending = None
+        docs.append(Document(
+            page_content=text[begin:end],
+            metadata={
+                "source": source,
+                "heading_path": " > ".join(t for _, t in stack) if title is not None else "",
+                "heading_level": level,
+                "start_index": begin,
+                "end_index": end,
+            },
+        ))
+    if pending is not None:                     # 파일 끝의 heading뿐인 구간
+        docs.append(Document(
+            page_content=text[pending:],
+            metadata={"source": source, "heading_path": " > ".join(t for _, t in stack),
+                      "heading_level": stack[-1][0] if stack else 0, "start_index": pending, "end_index": len(text)},
+        ))
+    return docs
+
+
+class MarkdownLoader(BaseLoader):
+    """`UnstructuredMarkdownLoader` 대체(같은 `load()` / `lazy_load()` 인터페이스)."""
+
+    def __init__(self, file_path: str, encoding: str = "utf-8"):
+        self.file_path = file_path
+        self.encoding = encoding
+
+    def lazy_load(self) -> Iterator[Document]:
+        with open(self.file_path, "r", encoding=self.encoding, errors="replace", newline="") as f:
+            text = f.read()
+        yield from split_markdown(text, self.file_path)
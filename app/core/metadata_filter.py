@@ -0,0 +1,40 @@
+"""Chroma `where` 문법 평가기 (로컬 index 공용: lexical / numpy / faiss backend).
+
+- 필드 동등 `{"type": "policy"}`, 비교 `{"year": {"$gte": 2025}}`, `$in`/`$nin`/`$ne`
+- 논리 결합 `{"$and": [...]}`, `{"$or": [...]}`
+"""
+from __future__ import annotations
+from typing import Optional
+
+_OPS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def match_where(meta: dict, where: Optional[dict]) -> bool:
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(match_where(meta, w) for w in cond):
+                return False
+        elif key == "$or":
+            if not any(match_where(meta, w) for w in cond):
+                return False
+        elif isinstance(cond, dict):
+            val = meta.get(key)
+            try:
+                if not all(_OPS[op](val, arg) for op, arg in cond.items()):
+                    return False
+            except TypeError:
+                return False
+        elif meta.get(key) != cond:
+            return False
+    return True
@@ -0,0 +1,263 @@
+"""Bitmap metadata index — Chroma `where` 필터를 후보 slot 집합으로 미리 계산.
+
+- 필드 값마다 slot 집합을 보관(`METADATA_INDEX_FIELDS`, 기본 type/year/org/source)
+  - 압축: roaring bitmap처럼 container를 고름 → 희소하면 정렬된 int32 배열, 조밀하면 `np.packbits` 비트맵
+- `$eq` / `$ne` / `$in` / `$nin` / 수치 범위(`$gt`, `$gte`, `$lt`, `$lte`; 예: year) / `$and` / `$or`
+  → 집합 교집합/합집합으로 평가, 결과 후보 slot만 벡터 점수 계산
+  → 질의 비용이 코퍼스 크기가 아니라 매칭된 문서 수에 비례
+- 인덱싱하지 않은 필드 조건은 `residual`로 돌려줌 → 호출 측이 후보에 대해서만 `match_where`로 확인
+- 의미는 `metadata_filter.match_where`와 동일(필드가 없으면 `$ne`/`$nin`에는 포함, 범위는 수치 값만)
+"""
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_DENSE_FACTOR = 32   # int32 배열(4B/slot)이 비트맵(n/8 B)보다 커지는 지점: count > n / 32
+_RANGE_OPS = ("$gt", "$gte", "$lt", "$lte")
+
+
+def _nbytes(n: int) -> int:
+    return (n + 7) >> 3
+
+
+class SlotSet:
+    """slot 번호 집합. `ids`(정렬된 int32) 또는 `bits`(packbits, big-endian bit order) 중 하나."""
+
+    __slots__ = ("ids", "bits")
+
+    def __init__(self, ids: Optional[np.ndarray] = None, bits: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.bits = bits
+
+    @classmethod
+    def from_sorted(cls, ids: np.ndarray, universe: int) -> "SlotSet":
+        ids = np.asarray(ids, dtype=np.int32)
+        if universe and ids.size * _DENSE_FACTOR > universe:
+            mask = np.zeros(universe, dtype=bool)
+            mask[ids] = True
+            return cls(bits=np.packbits(mask))
+        return cls(ids=ids)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "SlotSet":
+        return cls(bits=np.packbits(mask))
+
+    @classmethod
+    def union(cls, sets: Sequence["SlotSet"], universe: int) -> "SlotSet":
+        if not sets:
+            return cls(ids=np.zeros(0, dtype=np.int32))
+        sparse = [s.ids for s in sets if s.ids is not None]
+        dense = [s.bits for s in sets if s.bits is not None]
+        total = sum(a.size for a in sparse)
+        if not dense and total * _DENSE_FACTOR <= max(universe, 1):
+            return cls(ids=np.unique(np.concatenate(sparse)) if len(sparse) > 1 else sparse[0])
+        bits = np.zeros(max([_nbytes(universe)] + [b.size for b in dense]), dtype=np.uint8)
+        for b in dense:
+            bits[: b.size] |= b
+        if sparse:
+            mask = np.unpackbits(bits).astype(bool)
+            mask[np.concatenate(sparse)] = True
+            bits = np.packbits(mask)
+        return cls(bits=bits)
+
+    def __len__(self) -> int:
+        return int(self.ids.size) if self.ids is not None else int(np.count_nonzero(np.unpackbits(self.bits)))
+
+    def to_ids(self) -> np.ndarray:
+        if self.ids is not None:
+            return self.ids.astype(np.int64)
+        return np.flatnonzero(np.unpackbits(self.bits))
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        if self.ids is not None:
+            return np.isin(ids, self.ids, assume_unique=True)
+        byte = ids >> 3
+        ok = byte < self.bits.size
+        out = np.zeros(ids.size, dtype=bool)
+        out[ok] = (self.bits[byte[ok]] >> (7 - (ids[ok] & 7))) & 1 == 1
+        return out
+
+    @staticmethod
+    def _pair(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = max(a.size, b.size)
+        if a.size < n:
+            a = np.concatenate([a, np.zeros(n - a.size, dtype=np.uint8)])
+        if b.size < n:
+            b = np.concatenate([b, np.zeros(n - b.size, dtype=np.uint8)])
+        return a, b
+
+    def __and__(self, other: "SlotSet") -> "SlotSet":
+        if self.ids is not None and other.ids is not None:
+            return SlotSet(ids=np.intersect1d(self.ids, other.ids, assume_unique=True))
+        if self.ids is not None:
+            return SlotSet(ids=self.ids[other.contains(self.ids)])
+        if other.ids is not None:
+            return SlotSet(ids=other.ids[self.contains(other.ids)])
+        n = min(self.bits.size, other.bits.size)
+        return SlotSet(bits=self.bits[:n] & other.bits[:n])
+
+    def __sub__(self, other: "SlotSet") -> "SlotSet":
+        if self.ids is not None:
+            return SlotSet(ids=self.ids[~other.contains(self.ids)])
+        if other.ids is not None:
+            mask = np.unpackbits(self.bits).astype(bool)
+            mask[other.ids[other.ids < mask.size]] = False
+            return SlotSet(bits=np.packbits(mask))
+        a, b = self._pair(self.bits, other.bits)
+        return SlotSet(bits=(a & ~b)[: self.bits.size])
+
+
+class MetadataIndex:
+    """필드 → 값 → slot 집합. 변경은 Python set에 반영하고, 질의 시 바뀐 값만 배열/비트맵으로 고정."""
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(f for f in fields if f)
+        self._postings: Dict[str, Dict[Any, set]] = {f: {} for f in self.fields}
+        self._frozen: Dict[Tuple[str, Any], SlotSet] = {}
+        self._numeric: Dict[str, List[Any]] = {}
+        self._unindexable: set = set()
+
+    def add(self, slot: int, meta: dict) -> None:
+        for f in self.fields:
+            v = meta.get(f)
+            if v is None:
+                continue
+            try:
+                bucket = self._postings[f].get(v)
+            except TypeError:   # list 등 hash 불가 값 → 이 필드는 scan으로 평가
+                self._unindexable.add(f)
+                continue
+            if bucket is None:
+                bucket = self._postings[f][v] = set()
+                self._numeric.pop(f, None)
+            bucket.add(slot)
+            self._frozen.pop((f, v), None)
+
+    def remove(self, slot: int, meta: dict) -> None:
+        for f in self.fields:
+            v = meta.get(f)
+            if v is None:
+                continue
+            try:
+                bucket = self._postings[f].get(v)
+            except TypeError:
+                continue
+            if bucket is None:
+                continue
+            bucket.discard(slot)
+            self._frozen.pop((f, v), None)
+            if not bucket:
+                del self._postings[f][v]
+                self._numeric.pop(f, None)
+
+    def clear(self) -> None:
+        self._postings = {f: {} for f in self.fields}
+        self._frozen.clear()
+        self._numeric.clear()
+        self._unindexable.clear()
+
+    # -- query -------------------------------------------------------------
+
+    def _value(self, field: str, value: Any, universe: int) -> SlotSet:
+        key = (field, value)
+        got = self._frozen.get(key)
+        if got is None:
+            bucket = self._postings[field].get(value) or ()
+            got = self._frozen[key] = SlotSet.from_sorted(np.fromiter(sorted(bucket), dtype=np.int32, count=len(bucket)), universe)
+        return got
+
+    def _numeric_keys(self, field: str) -> List[Any]:
+        keys = self._numeric.get(field)
+        if keys is None:
+            keys = self._numeric[field] = sorted(
+                k for k in self._postings[field] if isinstance(k, (int, float)) and not isinstance(k, bool)
+            )
+        return keys
+
+    def _range(self, field: str, ops: Dict[str, Any], universe: int) -> Optional[SlotSet]:
+        keys = self._numeric_keys(field)
+        lo, hi = 0, len(keys)
+        for op, arg in ops.items():
+            if not isinstance(arg, (int, float)) or isinstance(arg, bool):
+                return None
+            if op == "$gt":
+                lo = max(lo, bisect_right(keys, arg))
+            elif op == "$gte":
+                lo = max(lo, bisect_left(keys, arg))
+            elif op == "$lt":
+                hi = min(hi, bisect_left(keys, arg))
+            else:
+                hi = min(hi, bisect_right(keys, arg))
+        return SlotSet.union([self._value(field, k, universe) for k in keys[lo:hi]], universe)
+
+    def _field(self, field: str, cond: Any, universe: int, live: Callable[[], SlotSet]) -> Optional[SlotSet]:
+        if field not in self._postings or field in self._unindexable:
+            return None
+        try:
+            if not isinstance(cond, dict):
+                return self._value(field, cond, universe)
+            acc: Optional[SlotSet] = None
+            ranges = {op: arg for op, arg in cond.items() if op in _RANGE_OPS}
+            parts: List[SlotSet] = []
+            if ranges:
+                r = self._range(field, ranges, universe)
+                if r is None:
+                    return None
+                parts.append(r)
+            for op, arg in cond.items():
+                if op == "$eq":
+                    parts.append(self._value(field, arg, universe))
+                elif op == "$ne":
+                    parts.append(live() - self._value(field, arg, universe))
+                elif op == "$in":
+                    parts.append(SlotSet.union([self._value(field, v, universe) for v in arg], universe))
+                elif op == "$nin":
+                    parts.append(live() - SlotSet.union([self._value(field, v, universe) for v in arg], universe))
+                elif op not in _RANGE_OPS:
+                    return None
+            for p in parts:
+                acc = p if acc is None else acc & p
+            return acc
+        except TypeError:
+            return None
+
+    def _clauses(self, where: dict) -> List[dict]:
+        out: List[dict] = []
+        for key, cond in where.items():
+            if key == "$and":
+                for w in cond:
+                    out.extend(self._clauses(w))
+            else:
+                out.append({key: cond})
+        return out
+
+    def _clause(self, clause: dict, universe: int, live: Callable[[], SlotSet]) -> Optional[SlotSet]:
+        (key, cond), = clause.items()
+        if key == "$or":
+            parts = []
+            for w in cond:
+                s, rest = self.plan(w, universe, live)
+                if s is None or rest is not None:
+                    return None
+                parts.append(s)
+            return SlotSet.union(parts, universe)
+        return self._field(key, cond, universe, live)
+
+    def plan(self, where: dict, universe: int, live: Callable[[], SlotSet]) -> Tuple[Optional[SlotSet], Optional[dict]]:
+        """where → (인덱스로 계산한 후보 집합 또는 None, 후보에 추가로 적용할 조건 또는 None).
+
+        `universe`는 전체 slot 수, `live()`는 삭제되지 않은 slot 집합(`$ne`/`$nin`에서만 호출).
+        """
+        acc: Optional[SlotSet] = None
+        residual: List[dict] = []
+        for clause in self._clauses(where):
+            s = self._clause(clause, universe, live)
+            if s is None:
+                residual.append(clause)
+            else:
+                acc = s if acc is None else acc & s
+        if not residual:
+            return acc, None
+        return acc, residual[0] if len(residual) == 1 else {"$and": residual}
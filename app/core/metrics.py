@@ -0,0 +1,63 @@
+"""In-process metrics (counter / gauge / timing) — `GET /metrics`로 노출.
+
+운영에서는 Prometheus 등으로 내보내면 되지만, 학습용으로 dict snapshot만 제공합니다.
+"""
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+_LOCK = threading.Lock()
+_COUNTERS: Dict[str, float] = {}
+_GAUGES: Dict[str, float] = {}
+_TIMINGS: Dict[str, dict] = {}
+
+
+def inc(name: str, n: float = 1) -> None:
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _LOCK:
+        _GAUGES[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """timing/size 관측값 누적(count/sum/last/max)."""
+    with _LOCK:
+        t = _TIMINGS.setdefault(name, {"count": 0, "sum": 0.0, "last": 0.0, "max": 0.0})
+        t["count"] += 1
+        t["sum"] += value
+        t["last"] = value
+        t["max"] = max(t["max"], value)
+
+
+@contextmanager
+def timer(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - t0) * 1000)
+
+
+def counter(name: str) -> float:
+    return _COUNTERS.get(name, 0)
+
+
+def snapshot() -> dict:
+    with _LOCK:
+        timings = {
+            k: {**v, "avg": round(v["sum"] / v["count"], 3) if v["count"] else 0.0}
+            for k, v in _TIMINGS.items()
+        }
+        return {"counters": dict(_COUNTERS), "gauges": dict(_GAUGES), "timings_ms": timings}
+
+
+def reset() -> None:
+    with _LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _TIMINGS.clear()
@@ -0,0 +1,127 @@
+"""Parse cache — 파일 내용 hash 기준으로 추출한 페이지 텍스트를 SQLite에 저장(파일 버전당 파싱 1회).
+
+- key = 파일 content sha1 + parser 버전(예: `pypdf-6.1.0`) → 같은 내용이면 이름/경로가 달라도 재사용,
+  파일이 바뀌거나 parser를 올리면 새 key (native markdown/TXT는 읽기가 더 싸므로 캐시하지 않음)
+- 저장(`PARSE_CACHE_PATH`, WAL이라 loader worker 프로세스들이 함께 사용):
+  - `docs`  : key → 페이지 수, 원문 bytes, 압축 bytes, last_used
+  - `pages` : (key, page) → zlib 압축 텍스트 + 페이지 메타데이터(JSON, `source` 제외 — 조회 시 현재 경로로 채움)
+- 사용처: `doc_loader.load_file`(ingest의 로딩/분할/BM25, `load_documents`), `metadata_extractor._read_text_head`
+  → 업로드 시 메타데이터 추출에서 파싱한 결과를 ingest가 그대로 사용
+- `PARSE_CACHE_MAX_DOCS` 초과 시 last_used 오래된 문서부터 삭제
+- metrics: `parse_cache.{hit,miss,put}` (pool worker에서 일어난 hit은 `loader.parse_cache_hit`로 집계)
+"""
+from __future__ import annotations
+import json, os, sqlite3, threading, time, zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from app.core import metrics, settings
+from app.core.ingest_manifest import file_sha1
+
+_PRUNE_EVERY = 50
+
+
+class ParseCache:
+    def __init__(self, path: str, max_docs: int = 20000):
+        self.max_docs = max_docs
+        self._lock = threading.Lock()
+        self._puts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+        CREATE TABLE IF NOT EXISTS docs(key TEXT PRIMARY KEY, pages INTEGER, raw_bytes INTEGER, stored_bytes INTEGER,
+                                        created REAL, last_used REAL);
+        CREATE INDEX IF NOT EXISTS docs_lru ON docs(last_used);
+        CREATE TABLE IF NOT EXISTS pages(key TEXT, page INTEGER, meta TEXT, body BLOB, PRIMARY KEY(key, page));
+        """)
+        self._db.commit()
+
+    def get(self, key: str, max_pages: Optional[int] = None) -> Optional[List[Tuple[str, dict]]]:
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM docs WHERE key=?", (key,)).fetchone() is None:
+                return None
+            rows = self._db.execute(
+                "SELECT meta, body FROM pages WHERE key=? ORDER BY page LIMIT ?", (key, -1 if max_pages is None else max_pages)
+            ).fetchall()
+            self._db.execute("UPDATE docs SET last_used=? WHERE key=?", (time.time(), key))
+            self._db.commit()
+        return [(zlib.decompress(body).decode("utf-8"), json.loads(meta)) for meta, body in rows]
+
+    def put(self, key: str, pages: Sequence[Tuple[str, dict]]) -> None:
+        rows, raw, stored = [], 0, 0
+        for i, (text, meta) in enumerate(pages):
+            data = (text or "").encode("utf-8")
+            body = zlib.compress(data, 6)
+            raw, stored = raw + len(data), stored + len(body)
+            rows.append((key, i, json.dumps(meta, ensure_ascii=False, default=str), body))
+        now = time.time()
+        with self._lock:
+            cur = self._db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("DELETE FROM pages WHERE key=?", (key,))
+            cur.executemany("INSERT INTO pages(key, page, meta, body) VALUES (?,?,?,?)", rows)
+            cur.execute(
+                "INSERT OR REPLACE INTO docs(key, pages, raw_bytes, stored_bytes, created, last_used) VALUES (?,?,?,?,?,?)",
+                (key, len(rows), raw, stored, now, now),
+            )
+            self._puts += 1
+            if self._puts % _PRUNE_EVERY == 0:
+                self._prune(cur)
+            cur.execute("COMMIT")
+        metrics.inc("parse_cache.put")
+
+    def _prune(self, cur: sqlite3.Cursor) -> None:
+        overflow = cur.execute("SELECT COUNT(*) FROM docs").fetchone()[0] - self.max_docs
+        if overflow <= 0:
+            return
+        victims = [r[0] for r in cur.execute("SELECT key FROM docs ORDER BY last_used ASC LIMIT ?", (overflow,))]
+        cur.executemany("DELETE FROM pages WHERE key=?", [(k,) for k in victims])
+        cur.executemany("DELETE FROM docs WHERE key=?", [(k,) for k in victims])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM docs")
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, pages, raw, stored = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(pages),0), COALESCE(SUM(raw_bytes),0), COALESCE(SUM(stored_bytes),0) FROM docs"
+            ).fetchone()
+        return {"docs": n, "pages": pages, "raw_bytes": raw, "stored_bytes": stored, "max_docs": self.max_docs}
+
+
+_CACHE: Dict[str, object] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def parse_cache() -> Optional[ParseCache]:
+    if not settings.PARSE_CACHE_ENABLED:
+        return None
+    with _CACHE_LOCK:
+        # pid 확인: fork된 worker가 부모의 SQLite 연결을 물려받아 쓰지 않도록
+        if _CACHE.get("pid") != os.getpid():
+            _CACHE.update(pid=os.getpid(), instance=ParseCache(settings.PARSE_CACHE_PATH, settings.PARSE_CACHE_MAX_DOCS))
+        return _CACHE["instance"]
+
+
+def cached_parse(
+    path: str, parser: str, parse: Callable[[str], List[Document]], max_pages: Optional[int] = None
+) -> Tuple[List[Document], bool]:
+    """(docs, cache hit 여부). miss면 전체를 파싱해 저장(`max_pages`는 반환 개수만 제한)."""
+    cache = parse_cache()
+    if cache is None:
+        docs = parse(path)
+        return (docs if max_pages is None else docs[:max_pages]), False
+    key = f"{file_sha1(path)}:{parser}"
+    pages = cache.get(key, max_pages)
+    if pages is not None:
+        metrics.inc("parse_cache.hit")
+        return [Document(page_content=text, metadata={**meta, "source": path}) for text, meta in pages], True
+    metrics.inc("parse_cache.miss")
+    docs = parse(path)
+    cache.put(key, [(d.page_content, {k: v for k, v in (d.metadata or {}).items() if k != "source"}) for d in docs])
+    return (docs if max_pages is None else docs[:max_pages]), False
@@ -1,41 +1,364 @@
 from __future__ import annotations
 import os
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
-from app.core.llm_factory import build_embeddings
-from app.core import settings
-
-def load_documents(docs_dir: str):
-    docs = []
-    for root, _, files in os.walk(docs_dir):
+import threading
+import time
+from contextlib import contextmanager
+from app.core.retrieval import get_context, store_key
+from app.core import collection_versions, vector_backends
+from app.core.doc_loader import SUPPORTED_EXTS, iter_load, load_file  # noqa: F401 (load_file: 하위 호환 export)
+from app.core.retrieval_cache import bump_generation
+from app.core.lexical_index import LEXICAL_DIRNAME
+from app.core.llm_factory import embedding_model_name
+from app.core.chunker import build_splitter
+from app.core.ingest_manifest import IngestManifest, FileEntry, file_sha1, json_sha1, chunk_id, anchor_chunk_id
+from app.core import metrics, settings
+from app.server import index_queue
+
+try:
+    import fcntl
+except ImportError:   # Windows 로컬 실행: 프로세스 간 lock 없이 동작
+    fcntl = None
+
+LOCK_DIRNAME = "locks"
+
+def iter_documents(docs_dir: str, report: list | None = None):
+    """docs_dir의 문서를 process pool에서 병렬 파싱해 Document를 순서대로 yield.
+
+    `report`(list)를 주면 파일별 파싱 시간/오류 기록을 채움(실패 파일은 건너뛰되 기록은 남김).
+    """
+    for res in iter_load(_scan_sources(docs_dir).values() if os.path.isdir(docs_dir) else []):
+        if report is not None:
+            report.append(res.record(os.path.relpath(res.path, docs_dir)))
+        yield from res.docs
+
+def load_documents(docs_dir: str, report: list | None = None):
+    return list(iter_documents(docs_dir, report))
+
+def _pipeline_signature() -> str:
+    # 청킹 설정(또는 chunk 메타데이터 스키마)이 바뀌면 기존 chunk id가 무의미해지므로 전체 재인덱싱
+    return json_sha1({"splitter": settings.SPLITTER, "chunk_size": settings.CHUNK_SIZE, "chunk_overlap": settings.CHUNK_OVERLAP,
+                      "chunk_tokens": settings.CHUNK_TOKENS, "chunk_overlap_tokens": settings.CHUNK_OVERLAP_TOKENS, "schema": 4})
+
+_POSITION_KEYS = ("start_index", "end_index")
+
+def _chunk_ids(rel: str, sha: str, chunks: list) -> list[str]:
+    """anchor가 있으면 위치 기반 id(편집 안 된 구간은 유지), 없으면(recursive splitter) 파일 hash + 순번."""
+    ids, seen = [], set()
+    for i, c in enumerate(chunks):
+        anchor = c.metadata.get("anchor")
+        cid = anchor_chunk_id(rel, anchor) if anchor else chunk_id(rel, sha, i)
+        if cid in seen:   # 같은 anchor가 두 번 나오는 경우(방어) → 순번으로 구분
+            cid = chunk_id(rel, sha, i)
+        seen.add(cid)
+        ids.append(cid)
+    return ids
+
+def _chunk_hash(c) -> str:
+    """`내용+메타데이터 hash:위치 hash` — 앞부분만 같으면 재임베딩 없이 metadata만 갱신."""
+    meta = {k: v for k, v in c.metadata.items() if k not in _POSITION_KEYS}
+    return f"{json_sha1([c.page_content, meta])}:{json_sha1([c.metadata.get(k) for k in _POSITION_KEYS])}"
+
+def _scan_sources(docs_dir: str) -> dict[str, str]:
+    """rel_path -> abs path (지원 확장자만, .meta 등 숨김 폴더 제외)."""
+    out = {}
+    for root, dirs, files in os.walk(docs_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
         for fn in files:
-            path = os.path.join(root, fn)
-            lower = fn.lower()
-            try:
-                if lower.endswith(".pdf"):
-                    docs.extend(PyPDFLoader(path).load())
-                elif lower.endswith(".md"):
-                    docs.extend(UnstructuredMarkdownLoader(path).load())
-                elif lower.endswith(".txt"):
-                    docs.extend(TextLoader(path, encoding="utf-8").load())
-            except Exception:
+            if fn.lower().endswith(SUPPORTED_EXTS):
+                path = os.path.join(root, fn)
+                out[os.path.relpath(path, docs_dir)] = path
+    return out
+
+_INGEST_LOCKS: dict[tuple[str, str, str], threading.Lock] = {}
+_INGEST_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def _ingest_lock(persist_dir: str, collection: str, kind: str = "store"):
+    """kind: store(실제 컬렉션 쓰기) | active(논리 컬렉션의 active 버전 쓰기 ↔ pointer 교체) | rebuild(버전 build 1개씩).
+
+    프로세스 안은 threading.Lock, 프로세스 간(API ↔ index worker)은 `{persist_dir}/locks/*.lock` flock.
+    잡는 순서는 항상 rebuild → active → store.
+    """
+    with _INGEST_LOCKS_GUARD:
+        lock = _INGEST_LOCKS.setdefault((persist_dir, collection, kind), threading.Lock())
+    path = os.path.join(persist_dir, LOCK_DIRNAME, f"{store_key(collection)}.{kind}.lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with lock, open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def _select_sources(docs_dir: str, paths: list[str], manifest: IngestManifest) -> tuple[dict[str, str], list[str]]:
+    """지정 파일만 대상으로: (존재하는 소스, manifest에서 지워야 할 rel_path)."""
+    sources, removed = {}, []
+    for p in paths:
+        path = p if os.path.isabs(p) else os.path.join(docs_dir, p)
+        rel = os.path.relpath(path, docs_dir)
+        if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTS):
+            sources[rel] = path
+        elif rel in manifest.files:
+            removed.append(rel)
+    return sources, removed
+
+def ingest_incremental(docs_dir: str, persist_dir: str, collection: str, paths: list[str] | None = None) -> dict:
+    """Manifest 기반 증분 인덱싱(논리 컬렉션의 현재 active 버전에 반영).
+
+    - 청킹 설정이 바뀌어 전체 재인덱싱이 필요하면 index queue에 `rebuild` job만 적재하고(요청 경로에서 재구축 안 함)
+      active 버전은 건드리지 않음 → 교체 전까지 기존 버전으로 서빙, 그 사이 변경분은 rebuild의 따라잡기 단계에서 반영
+      (report `rebuild_job`, `skipped`)
+    - 세부 동작은 `_ingest_into` 참고
+    """
+    if settings.COLLECTION_REBUILD_ON_CHANGE and _needs_rebuild(persist_dir, collection):
+        report = _new_report()
+        report.update(skipped="pipeline signature changed", rebuild_job=_enqueue_rebuild(persist_dir, collection)["id"])
+        return report
+    with _ingest_lock(persist_dir, collection, "active"):
+        name, _ = collection_versions.resolve(persist_dir, collection)
+        return _ingest_into(docs_dir, persist_dir, name, paths)
+
+def _enqueue_rebuild(persist_dir: str, collection: str) -> dict:
+    """이미 대기/실행 중인 rebuild가 있으면 그 job(반복 ingest가 rebuild를 중복 적재하지 않게)."""
+    job = index_queue.pending_job("rebuild", collection)
+    if job is None:
+        # 청킹만 바뀐 재구축 → 현재 버전의 임베딩 모델 유지
+        job = index_queue.enqueue_job("rebuild", payload={
+            "collection": collection, "reason": "pipeline signature changed",
+            "embed_model": collection_versions.resolve(persist_dir, collection)[1]})
+        metrics.inc("collections.rebuild_enqueued")
+    return job
+
+def _needs_rebuild(persist_dir: str, collection: str) -> bool:
+    """active 버전에 데이터가 있는데 pipeline signature가 다름 → 제자리 재인덱싱하면 읽기가 빈/부분 결과를 봄."""
+    name, _ = collection_versions.resolve(persist_dir, collection)
+    manifest = IngestManifest.for_collection(persist_dir, store_key(name))
+    return bool(manifest.files) and manifest.signature != _pipeline_signature()
+
+def _new_report() -> dict:
+    return {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0, "failed": 0, "chunks": 0,
+            "chunks_reused": 0, "chunks_moved": 0, "files": []}
+
+def _ingest_into(docs_dir: str, persist_dir: str, collection: str, paths: list[str] | None = None) -> dict:
+    """실제 컬렉션(`collection` = 버전 이름)에 manifest 기반 증분 인덱싱.
+
+    - 새 파일/변경 파일만 로드·분할·임베딩하고 결정론적 chunk id로 upsert
+      - structured splitter의 chunk id는 위치(anchor) 기반 → 변경 파일 안에서도 내용이 바뀐 chunk만 재임베딩
+        (`chunks`: 임베딩한 수, `chunks_reused`: 그대로 둔 수, `chunks_moved`: offset만 갱신한 수)
+    - 임베딩은 `EMBED_INGEST_FLUSH_CHUNKS`개씩 여러 파일분을 모아 호출(`embed_ms`, `embed_chunks_per_sec`)
+    - 변경/삭제된 파일의 기존 chunk는 컬렉션에서 제거
+    - sidecar 메타데이터(.meta/index.json)가 바뀐 파일도 변경으로 취급
+    - `paths`를 주면 해당 파일만 확인(파일 단위 job), 없으면 docs_dir 전체 스캔
+    """
+    t0 = time.perf_counter()
+    report = _new_report()
+
+    with _ingest_lock(persist_dir, collection):
+        # manifest는 backend별로 분리(backend를 바꾸면 새 store에 전체 인덱싱)
+        manifest = IngestManifest.for_collection(persist_dir, store_key(collection))
+        signature = _pipeline_signature()
+        stale_ids: list[str] = []
+        if manifest.signature != signature:
+            stale_ids.extend(manifest.all_chunk_ids())
+            manifest.files = {}
+            manifest.signature = signature
+            paths = None  # 청킹 설정 변경 → 전체 재인덱싱
+
+        if paths is None:
+            sources = _scan_sources(docs_dir) if os.path.isdir(docs_dir) else {}
+            removed = [rel for rel in manifest.files if rel not in sources]
+        else:
+            sources, removed = _select_sources(docs_dir, paths, manifest)
+        meta_idx = load_meta_index(docs_dir)
+
+        todo: list[tuple[str, str, str, str]] = []  # (rel, path, sha1, meta_sha1)
+        dirty = bool(removed)
+        for rel, path in sources.items():
+            st = os.stat(path)
+            meta = meta_idx.get(os.path.basename(path)) or {}
+            meta_sha = json_sha1(meta) if meta else ""
+            entry = manifest.files.get(rel)
+            if entry and entry.error:
+                # 실패 기록이 있는 파일은 (의존성 설치 등으로 복구될 수 있으므로) 매번 재시도
+                entry = None
+            if entry and entry.same_stat(st) and entry.meta_sha1 == meta_sha:
+                report["unchanged"] += 1
                 continue
-    return docs
+            sha = file_sha1(path)
+            if entry and entry.sha1 == sha and entry.meta_sha1 == meta_sha:
+                # touch만 된 경우: stat만 갱신
+                entry.mtime_ns, entry.size = st.st_mtime_ns, st.st_size
+                dirty = True
+                report["unchanged"] += 1
+                continue
+            todo.append((rel, path, sha, meta_sha))
+
+        for rel in removed:
+            stale_ids.extend(manifest.files.pop(rel).chunk_ids)
+            report["deleted"] += 1
+
+        if not todo and not stale_ids:
+            if dirty:
+                manifest.save()
+            report["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            return report
+
+        vs = vectorstore(persist_dir, collection)
+        lex = lexical_index(persist_dir, collection)
+        splitter = build_splitter()
+        # 임베딩할 chunk는 여러 파일분을 모아 한 번에(executor가 batch 병렬화), manifest 기록은 저장된 뒤에
+        pending: list[tuple[str, object]] = []
+        pending_files: list[tuple[str, FileEntry, bool]] = []
+        embed_sec = 0.0
+
+        def flush() -> None:
+            nonlocal embed_sec
+            if pending:
+                t = time.perf_counter()
+                vs.add_documents([c for _, c in pending], ids=[cid for cid, _ in pending])
+                embed_sec += time.perf_counter() - t
+                lex.upsert([cid for cid, _ in pending], [c for _, c in pending])
+                report["chunks"] += len(pending)
+            for rel_, entry_, updated in pending_files:
+                manifest.files[rel_] = entry_
+                report["updated" if updated else "added"] += 1
+            pending.clear()
+            pending_files.clear()
+
+        try:
+            if stale_ids:
+                vs.delete(ids=stale_ids)
+                lex.delete(stale_ids)
+            # 파싱은 process pool에서 미리 진행, 결과는 todo 순서대로 받아 분할/임베딩
+            loaded = iter_load([path for _, path, _, _ in todo])
+            for (rel, path, sha, meta_sha), res in zip(todo, loaded):
+                report["files"].append(res.record(rel))
+                old = manifest.files.get(rel)   # 교체 entry는 flush()가 chunk 저장 후 기록 → 그 전에 실패하면 기존 entry 유지
+                st = os.stat(path)
+                entry = FileEntry(sha1=sha, mtime_ns=st.st_mtime_ns, size=st.st_size, meta_sha1=meta_sha)
+                old_ids = old.chunk_ids if old else []
+                if res.error:
+                    if old_ids:
+                        vs.delete(ids=old_ids)
+                        lex.delete(old_ids)
+                    entry.error = res.error
+                    manifest.files[rel] = entry
+                    report["failed"] += 1
+                    continue
+                docs = res.docs
+                meta = meta_idx.get(os.path.basename(path)) or {}
+                for d in docs:
+                    d.metadata = {**(d.metadata or {}), **meta}
+                chunks = splitter.split_documents(docs)
+                ids = _chunk_ids(rel, sha, chunks)
+                for cid, c in zip(ids, chunks):
+                    c.metadata["chunk_id"] = cid
+                hashes = [_chunk_hash(c) for c in chunks]
+
+                # 기존 chunk와 비교: 같은 id + 같은 hash → 그대로, 위치만 다름 → metadata만, 나머지 → 재임베딩
+                prev = dict(zip(old_ids, old.chunk_hashes)) if old and len(old.chunk_hashes) == len(old_ids) else {}
+                keep = set(ids)
+                gone = [cid for cid in old_ids if cid not in keep]
+                if gone:
+                    vs.delete(ids=gone)
+                    lex.delete(gone)
+                embed, moved = [], []
+                for cid, h, c in zip(ids, hashes, chunks):
+                    before = prev.get(cid)
+                    if before == h:
+                        report["chunks_reused"] += 1
+                    elif before and before.split(":")[0] == h.split(":")[0]:
+                        moved.append((cid, c))
+                    else:
+                        embed.append((cid, c))
+                if moved:
+                    vector_backends.update_metadata(vs, [cid for cid, _ in moved], [c.metadata for _, c in moved])
+                    lex.upsert([cid for cid, _ in moved], [c for _, c in moved])
+                    report["chunks_moved"] += len(moved)
+                entry.chunk_ids = ids
+                entry.chunk_hashes = hashes
+                pending.extend(embed)
+                pending_files.append((rel, entry, old is not None))
+                if len(pending) >= settings.EMBED_INGEST_FLUSH_CHUNKS:
+                    flush()
+            flush()
+        finally:
+            vector_backends.persist(vs)   # 로컬 backend: 벡터/인덱스 저장 후 manifest 기록
+            manifest.save()
+            bump_generation(persist_dir, store_key(collection))   # 변경이 보인 뒤에 올려야 캐시가 stale 결과를 담지 않음
+
+    report["embed_ms"] = round(embed_sec * 1000, 2)
+    report["embed_chunks_per_sec"] = round(report["chunks"] / embed_sec, 1) if embed_sec > 0 else 0.0
+    report["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return report
 
 def ingest_dir(docs_dir: str, persist_dir: str, collection: str) -> int:
-    docs = load_documents(docs_dir)
-    if not docs:
-        return 0
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
-    chunks = splitter.split_documents(docs)
-    vs = Chroma(persist_directory=persist_dir, embedding_function=build_embeddings(), collection_name=collection)
-    vs.add_documents(chunks)
-    vs.persist()
-    return len(chunks)
+    """증분 인덱싱 후 이번 호출에서 (재)임베딩된 chunk 수를 반환."""
+    return ingest_incremental(docs_dir, persist_dir, collection)["chunks"]
+
+def rebuild_collection(docs_dir: str, persist_dir: str, collection: str, embed_model: str | None = None,
+                       reason: str = "manual") -> dict:
+    """Blue/green 전체 재인덱싱: 새 버전 컬렉션에 build → 따라잡기 → pointer 교체 → 오래된 버전 GC.
+
+    - build 중 읽기와 증분 ingest는 기존 active 버전으로 계속(검색 결과 캐시도 그대로 유효)
+    - build가 끝나면 active 쓰기 lock 안에서 그 사이 바뀐 파일만 새 버전에 반영하고 pointer 교체
+    - `embed_model`: 다른 임베딩 모델로 새 버전 생성(검색은 버전에 기록된 모델로 질의 임베딩)
+    - 실패하면 새 버전은 failed로 남고(다음 GC에서 삭제) active는 그대로
+    """
+    t0 = time.perf_counter()
+    embed_model = embed_model or embedding_model_name()
+    with _ingest_lock(persist_dir, collection, "rebuild"):
+        version, name = collection_versions.allocate(persist_dir, collection, embed_model)
+        try:
+            report = _ingest_into(docs_dir, persist_dir, name)
+            with _ingest_lock(persist_dir, collection, "active"):
+                catch_up = _ingest_into(docs_dir, persist_dir, name)
+                summary = {k: report[k] + catch_up[k] for k in ("added", "failed", "chunks")}
+                collection_versions.activate(persist_dir, collection, version, reason=reason, report=summary)
+        except Exception as e:
+            collection_versions.update(persist_dir, collection, version, status="failed", error=f"{type(e).__name__}: {e}"[:500])
+            metrics.inc("collections.rebuild_failed")
+            raise
+        dropped = _gc_versions(persist_dir, collection)
+    metrics.inc("collections.swaps")
+    report.update(
+        version=version, collection=name, reason=reason, embed_model=embed_model,
+        catch_up={k: catch_up[k] for k in ("added", "updated", "deleted", "chunks")}, gc=dropped,
+        elapsed_ms=round((time.perf_counter() - t0) * 1000, 2),
+    )
+    return report
+
+def activate_collection_version(persist_dir: str, collection: str, version: int, reason: str = "manual") -> dict:
+    """보관 중인 버전으로 pointer 교체(롤백). 진행 중인 active 버전 쓰기가 끝난 뒤에 교체."""
+    with _ingest_lock(persist_dir, collection, "active"):
+        return collection_versions.activate(persist_dir, collection, version, reason=reason)
+
+def gc_collection_versions(persist_dir: str, collection: str) -> list[str]:
+    """active + 최근 retired(`COLLECTION_KEEP_VERSIONS`개까지)만 남기고 나머지 버전의 store/lexical/manifest 삭제."""
+    with _ingest_lock(persist_dir, collection, "rebuild"):
+        return _gc_versions(persist_dir, collection)
+
+def _gc_versions(persist_dir: str, collection: str) -> list[str]:
+    victims = collection_versions.gc_candidates(persist_dir, collection)
+    for _, name in victims:
+        get_context().forget(name, persist_dir=persist_dir)
+        vector_backends.drop_collection(settings.VECTOR_BACKEND, persist_dir, name)
+        key = store_key(name)
+        for path in (os.path.join(persist_dir, LEXICAL_DIRNAME, f"{key}.sqlite"),
+                     IngestManifest.for_collection(persist_dir, key).path):
+            for p in (path, path + "-wal", path + "-shm"):
+                if os.path.exists(p):
+                    os.remove(p)
+    if victims:
+        collection_versions.forget(persist_dir, collection, [n for n, _ in victims])
+        metrics.inc("collections.gc", len(victims))
+    return [name for _, name in victims]
+
+def lexical_index(persist_dir: str, collection: str):
+    """컬렉션과 같은 chunk id로 동기화되는 BM25(FTS5) index (process-wide 공유)."""
+    return get_context().lexical(collection, persist_dir=persist_dir)
 
 def vectorstore(persist_dir: str, collection: str):
-    return Chroma(persist_directory=persist_dir, embedding_function=build_embeddings(), collection_name=collection)
+    """프로세스 공유 vector store (RetrievalContext가 컬렉션별로 1회 생성)."""
+    return get_context().vectorstore(collection, persist_dir=persist_dir)
 
 
 # --- v8: metadata sidecar support for Self-Query Retriever ---
@@ -111,12 +434,5 @@ def load_documents_meta(docs_dir: str):
     return docs
 
 def ingest_dir_meta(docs_dir: str, persist_dir: str, collection: str) -> int:
-    docs = load_documents_meta(docs_dir)
-    if not docs:
-        return 0
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
-    chunks = splitter.split_documents(docs)
-    vs = Chroma(persist_directory=persist_dir, embedding_function=build_embeddings(), collection_name=collection)
-    vs.add_documents(chunks)
-    vs.persist()
-    return len(chunks)
+    # ingest_dir이 sidecar 메타데이터를 함께 반영하므로 동일 동작(하위 호환용 이름)
+    return ingest_dir(docs_dir, persist_dir, collection)
@@ -0,0 +1,309 @@
+"""Process-wide retrieval context (embeddings + vector store 싱글톤).
+
+- FastAPI startup에서 한 번 생성(warm) → 요청은 similarity search 비용만 부담
+- uvicorn worker thread에서 동시 사용: 생성 구간만 lock, 검색은 공유 인스턴스 사용
+- `health()`로 상태 노출 (`GET /health`)
+- `search()` / `asearch()`: search_type = vector | lexical | hybrid (BM25 + vector, `fusion.py`로 결합)
+- vector store 구현은 `VECTOR_BACKEND`(chroma | numpy | faiss_*)로 선택 (`vector_backends.py`)
+- 검색 결과는 store generation을 key에 넣어 캐시(`retrieval_cache.py`) → ingest 후에는 자동으로 새 key
+- 컬렉션 이름은 논리 이름 → `collection_versions.resolve()`로 현재 active 버전(blue/green)과 그 임베딩 모델을 찾아 사용
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.core import settings
+from app.core import metrics
+from app.core import collection_versions
+from app.core.llm_factory import build_embeddings, embedding_model_name
+from app.core.lexical_index import LexicalIndex
+from app.core.fusion import fuse_documents
+from app.core.vector_backends import open_vectorstore, vector_count
+from app.core.retrieval_cache import QueryEmbeddingCache, bump_generation, current_generation, make_key, result_cache
+
+DEFAULT_COLLECTION = "catalog_docs"
+SEARCH_TYPES = ("vector", "lexical", "hybrid")
+
+
+def store_key(collection: str, backend: Optional[str] = None) -> str:
+    """backend별로 분리되는 파생 데이터(lexical index, ingest manifest)의 이름. chroma는 기존 이름 유지."""
+    backend = backend or settings.VECTOR_BACKEND
+    return collection if backend == "chroma" else f"{collection}.{backend}"
+
+
+class RetrievalContext:
+    def __init__(self, persist_dir: Optional[str] = None):
+        self.persist_dir = persist_dir or settings.CHROMA_PERSIST_DIR
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._model_embeddings: Dict[str, Any] = {}   # 설정과 다른 모델로 만든 컬렉션 버전용
+        self._stores: Dict[tuple[str, str], Any] = {}
+        self._lexical: Dict[tuple[str, str], LexicalIndex] = {}
+        self.started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def embeddings(self, model: Optional[str] = None):
+        if model and model != embedding_model_name():
+            with self._lock:
+                emb = self._model_embeddings.get(model)
+                if emb is None:
+                    emb = build_embeddings(model)
+                    if settings.RETRIEVAL_CACHE_ENABLED:
+                        emb = QueryEmbeddingCache(emb, settings.QUERY_EMBED_CACHE_ENTRIES)
+                    self._model_embeddings[model] = emb
+                return emb
+        emb = self._embeddings
+        if emb is not None:
+            return emb
+        with self._lock:
+            if self._embeddings is None:
+                emb = build_embeddings()
+                if settings.RETRIEVAL_CACHE_ENABLED:
+                    emb = QueryEmbeddingCache(emb, settings.QUERY_EMBED_CACHE_ENTRIES)
+                self._embeddings = emb
+            return self._embeddings
+
+    def vectorstore(self, collection: str = DEFAULT_COLLECTION, persist_dir: Optional[str] = None):
+        pdir = persist_dir or self.persist_dir
+        name, model = collection_versions.resolve(pdir, collection)
+        key = (pdir, name)
+        vs = self._stores.get(key)
+        if vs is not None:
+            return vs
+        with self._lock:
+            vs = self._stores.get(key)
+            if vs is None:
+                vs = open_vectorstore(settings.VECTOR_BACKEND, pdir, name, self.embeddings(model))
+                self._stores[key] = vs
+            return vs
+
+    def lexical(self, collection: str = DEFAULT_COLLECTION, persist_dir: Optional[str] = None) -> LexicalIndex:
+        pdir = persist_dir or self.persist_dir
+        name, _ = collection_versions.resolve(pdir, collection)
+        key = (pdir, name)
+        lex = self._lexical.get(key)
+        if lex is not None:
+            return lex
+        with self._lock:
+            lex = self._lexical.get(key)
+            if lex is None:
+                lex = LexicalIndex.for_collection(pdir, store_key(name))
+                if self._backfill_lexical(lex, self.vectorstore(name, persist_dir=pdir)):
+                    bump_generation(pdir, store_key(name))
+                self._lexical[key] = lex
+            return lex
+
+    def forget(self, collection: str, persist_dir: Optional[str] = None) -> None:
+        """GC된 컬렉션 버전의 store/lexical 인스턴스를 내려놓음(`collection`은 실제 버전 이름)."""
+        key = (persist_dir or self.persist_dir, collection)
+        with self._lock:
+            self._stores.pop(key, None)
+            lex = self._lexical.pop(key, None)
+        if lex is not None:
+            lex.close()
+
+    @staticmethod
+    def _backfill_lexical(lex: LexicalIndex, vs) -> bool:
+        """lexical index가 컬렉션과 어긋나면(신규 생성/이전 버전 데이터) vector store 내용으로 재구축."""
+        try:
+            if lex.count() == vector_count(vs):
+                return False
+            got = vs.get(include=["documents", "metadatas"])
+        except Exception:
+            return False
+        items = [
+            (cid, Document(page_content=text or "", metadata={**(meta or {}), "chunk_id": cid}))
+            for cid, text, meta in zip(got["ids"], got["documents"], got["metadatas"])
+        ]
+        lex.rebuild(items)
+        metrics.inc("lexical.backfills")
+        return True
+
+    # -- lifecycle -----------------------------------------------------
+
+    def startup(self, collections: tuple[str, ...] = (DEFAULT_COLLECTION,)) -> None:
+        """embeddings/컬렉션을 미리 생성. 백엔드 장애 시에도 서버 기동은 계속(요청 시 재시도)."""
+        try:
+            for c in collections:
+                self.vectorstore(c)
+                self.lexical(c)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {str(e)[:180]}"
+        self.started_at = time.time()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stores.clear()
+            self._lexical.clear()
+            self._embeddings = None
+            self._model_embeddings.clear()
+            self.started_at = None
+
+    def health(self) -> dict:
+        stores = {}
+        for (pdir, coll), vs in list(self._stores.items()):
+            try:
+                stores[coll] = {"persist_dir": pdir, "backend": settings.VECTOR_BACKEND, "count": vector_count(vs)}
+            except Exception as e:
+                stores[coll] = {"persist_dir": pdir, "error": f"{type(e).__name__}: {str(e)[:120]}"}
+        for (pdir, coll), lex in list(self._lexical.items()):
+            stores.setdefault(coll, {})["lexical_count"] = lex.count()
+        return {
+            "started": self.started_at is not None,
+            "started_at": self.started_at,
+            "embeddings": type(getattr(self._embeddings, "base", self._embeddings)).__name__ if self._embeddings is not None else None,
+            "stores": stores,
+            "cache": result_cache().stats() if result_cache() else None,
+            "last_error": self.last_error,
+        }
+
+
+_CONTEXT: Optional[RetrievalContext] = None
+_CONTEXT_LOCK = threading.Lock()
+
+
+def get_context() -> RetrievalContext:
+    global _CONTEXT
+    if _CONTEXT is None:
+        with _CONTEXT_LOCK:
+            if _CONTEXT is None:
+                _CONTEXT = RetrievalContext()
+    return _CONTEXT
+
+
+def startup() -> RetrievalContext:
+    ctx = get_context()
+    ctx.startup()
+    return ctx
+
+
+def shutdown() -> None:
+    if _CONTEXT is not None:
+        _CONTEXT.shutdown()
+
+
+# --- search (vector | lexical | hybrid) ---------------------------------
+
+def doc_key(d: Document) -> str:
+    """fusion용 chunk 식별자: ingest가 기록한 chunk_id, 없으면 source+본문 해시."""
+    cid = (d.metadata or {}).get("chunk_id")
+    if cid:
+        return cid
+    raw = f"{(d.metadata or {}).get('source', '')}\x00{d.page_content}"
+    return hashlib.sha1(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _resolve_search_type(search_type: Optional[str]) -> str:
+    st = (search_type or settings.RAG_SEARCH_TYPE or "vector").lower()
+    if st not in SEARCH_TYPES:
+        raise ValueError(f"search_type must be one of {SEARCH_TYPES}: {st}")
+    return st
+
+
+def _hybrid_weights() -> List[float]:
+    return [float(x) for x in settings.RAG_HYBRID_WEIGHTS.split(",")][:2]
+
+
+def _fuse(vec: List[tuple], lex: List[tuple], k: int) -> List[Document]:
+    """(Document, score) 목록들을 fusion 엔진으로 결합. vector score는 거리 → 부호 반전."""
+    results = [
+        [(doc_key(d), d, -float(dist)) for d, dist in vec],
+        [(doc_key(d), d, float(score)) for d, score in lex],
+    ]
+    fused = fuse_documents(
+        results,
+        method=settings.RAG_FUSION_METHOD,
+        weights=_hybrid_weights(),
+        rrf_k=settings.RAG_HYBRID_RRF_K,
+        top_k=k,
+    )
+    return [d for d, _ in fused]
+
+
+def _cache_key(query: str, k: int, st: str, where: Optional[dict], collection: str, persist_dir: Optional[str]) -> str:
+    pdir = persist_dir or get_context().persist_dir
+    # 실제 버전 이름으로 key → pointer가 교체되면 이전 버전 결과는 자연히 miss
+    store = store_key(collection_versions.resolve(pdir, collection)[0])
+    extra = (settings.RAG_FUSION_METHOD, settings.RAG_HYBRID_WEIGHTS, settings.RAG_HYBRID_FETCH_K, settings.RAG_HYBRID_RRF_K) if st == "hybrid" else ()
+    return make_key(f"{pdir}|{store}", current_generation(pdir, store), query, where, k, st, extra)
+
+
+def search(
+    query: str,
+    k: Optional[int] = None,
+    search_type: Optional[str] = None,
+    where: Optional[dict] = None,
+    collection: str = DEFAULT_COLLECTION,
+    persist_dir: Optional[str] = None,
+) -> List[Document]:
+    k = int(k or settings.TOP_K)
+    st = _resolve_search_type(search_type)
+    cache = result_cache()
+    key = _cache_key(query, k, st, where, collection, persist_dir) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    docs = _search(query, k, st, where, collection, persist_dir)
+    if cache:
+        cache.put(key, docs)
+    return docs
+
+
+async def asearch(
+    query: str,
+    k: Optional[int] = None,
+    search_type: Optional[str] = None,
+    where: Optional[dict] = None,
+    collection: str = DEFAULT_COLLECTION,
+    persist_dir: Optional[str] = None,
+) -> List[Document]:
+    k = int(k or settings.TOP_K)
+    st = _resolve_search_type(search_type)
+    cache = result_cache()
+    key = _cache_key(query, k, st, where, collection, persist_dir) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    docs = await _asearch(query, k, st, where, collection, persist_dir)
+    if cache:
+        cache.put(key, docs)
+    return docs
+
+
+def _search(query: str, k: int, st: str, where: Optional[dict], collection: str, persist_dir: Optional[str]) -> List[Document]:
+    ctx = get_context()
+    metrics.inc(f"search.{st}")
+    with metrics.timer(f"search_ms.{st}"):
+        if st == "vector":
+            return ctx.vectorstore(collection, persist_dir).similarity_search(query, k=k, filter=where)
+        if st == "lexical":
+            return ctx.lexical(collection, persist_dir).search(query, k=k, where=where)
+        fetch_k = max(k, settings.RAG_HYBRID_FETCH_K)
+        vec = ctx.vectorstore(collection, persist_dir).similarity_search_with_score(query, k=fetch_k, filter=where)
+        lex = ctx.lexical(collection, persist_dir).search_with_scores(query, k=fetch_k, where=where)
+        return _fuse(vec, lex, k)
+
+
+async def _asearch(query: str, k: int, st: str, where: Optional[dict], collection: str, persist_dir: Optional[str]) -> List[Document]:
+    ctx = get_context()
+    metrics.inc(f"search.{st}")
+    with metrics.timer(f"search_ms.{st}"):
+        if st == "vector":
+            return await ctx.vectorstore(collection, persist_dir).asimilarity_search(query, k=k, filter=where)
+        lex_index = await asyncio.to_thread(ctx.lexical, collection, persist_dir)
+        if st == "lexical":
+            return await asyncio.to_thread(lex_index.search, query, k, where)
+        fetch_k = max(k, settings.RAG_HYBRID_FETCH_K)
+        vec, lex = await asyncio.gather(
+            ctx.vectorstore(collection, persist_dir).asimilarity_search_with_score(query, k=fetch_k, filter=where),
+            asyncio.to_thread(lex_index.search_with_scores, query, fetch_k, where),
+        )
+        return _fuse(vec, lex, k)
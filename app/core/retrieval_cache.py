@@ -0,0 +1,208 @@
+"""Retrieval result cache (index generation 기반 무효화) + 질의 임베딩 캐시.
+
+- key = (store, generation, 정규화 질의, where, k, search_type, fusion 설정) → 검색된 chunk 목록
+  - generation: store별 카운터 파일 `{persist_dir}/generations/{store}.gen`
+    ingest가 upsert/delete를 반영한 **뒤** `bump_generation()` → 이후 조회는 새 key라 이전 결과가 절대 재사용되지 않음
+    (다른 프로세스의 index worker가 올려도 조회마다 파일을 읽으므로 즉시 반영)
+- 메모리 LRU(`RETRIEVAL_CACHE_MAX_ENTRIES`), `RETRIEVAL_CACHE_PATH`를 주면 SQLite에도 저장(재시작 후 재사용)
+- `QueryEmbeddingCache`: embed_query 결과 LRU(`QUERY_EMBED_CACHE_ENTRIES`) — 결과 cache miss여도 같은 질의는 재임베딩 없음
+- metrics: `retrieval_cache.{hit,disk_hit,miss}`, `query_embed_cache.{hit,miss}`
+"""
+from __future__ import annotations
+import hashlib, json, os, sqlite3, tempfile, threading, time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core import settings
+from app.core import metrics
+from app.core.ko_tokenizer import normalize
+
+try:
+    import fcntl
+except ImportError:   # Windows 로컬 실행: 프로세스 간 lock 없이 동작
+    fcntl = None
+
+GEN_DIRNAME = "generations"
+
+
+# --- index generation ---------------------------------------------------
+
+def _gen_path(persist_dir: str, store: str) -> str:
+    return os.path.join(persist_dir, GEN_DIRNAME, f"{store}.gen")
+
+
+def current_generation(persist_dir: str, store: str) -> int:
+    try:
+        with open(_gen_path(persist_dir, store), "r", encoding="ascii") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(persist_dir: str, store: str) -> int:
+    """store 내용이 바뀐 뒤 호출. 프로세스 간 flock으로 증가가 유실되지 않게 함."""
+    path = _gen_path(persist_dir, store)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        gen = current_generation(persist_dir, store) + 1
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".gen-")
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(str(gen))
+        os.replace(tmp, path)
+    metrics.inc("retrieval_cache.generation_bumps")
+    return gen
+
+
+# --- result cache -------------------------------------------------------
+
+def normalize_query(q: str) -> str:
+    return " ".join(normalize(q).split())
+
+
+def make_key(scope: str, generation: int, query: str, where: Optional[dict], k: int, search_type: str, extra: Sequence = ()) -> str:
+    raw = json.dumps(
+        [scope, generation, normalize_query(query), where or None, k, search_type, list(extra)],
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+_Entry = Tuple[Tuple[str, dict], ...]
+
+
+class RetrievalCache:
+    """key → ((page_content, metadata), ...). 조회 시 Document를 새로 만들어 반환(호출 측 변경이 캐시에 새지 않음)."""
+
+    def __init__(self, max_entries: int = 2048, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._puts = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries(key TEXT PRIMARY KEY, body TEXT, created REAL)")
+            self._db.commit()
+
+    @staticmethod
+    def _docs(entry: _Entry) -> List[Document]:
+        return [Document(page_content=text, metadata=dict(meta)) for text, meta in entry]
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[Document]]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+                metrics.inc("retrieval_cache.hit")
+                return self._docs(entry)
+            if self._db is not None:
+                row = self._db.execute("SELECT body FROM entries WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    entry = tuple((text, meta) for text, meta in json.loads(row[0]))
+                    self._remember(key, entry)
+                    metrics.inc("retrieval_cache.disk_hit")
+                    return self._docs(entry)
+        metrics.inc("retrieval_cache.miss")
+        return None
+
+    def put(self, key: str, docs: Sequence[Document]) -> None:
+        entry: _Entry = tuple((d.page_content, dict(d.metadata or {})) for d in docs)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is None:
+                return
+            body = json.dumps([[t, m] for t, m in entry], ensure_ascii=False, default=str)
+            self._db.execute("INSERT OR REPLACE INTO entries(key, body, created) VALUES (?,?,?)", (key, body, time.time()))
+            self._puts += 1
+            if self._puts % 100 == 0:
+                # 이전 generation key는 다시 조회되지 않으므로 오래된 것부터 정리
+                self._db.execute(
+                    "DELETE FROM entries WHERE key NOT IN (SELECT key FROM entries ORDER BY created DESC LIMIT ?)",
+                    (self.max_entries * 4,),
+                )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] if self._db is not None else None
+            return {"entries": len(self._mem), "max_entries": self.max_entries, "disk_entries": disk}
+
+
+_CACHE: Dict[str, Optional[RetrievalCache]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def result_cache() -> Optional[RetrievalCache]:
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return None
+    with _CACHE_LOCK:
+        if "instance" not in _CACHE:
+            _CACHE["instance"] = RetrievalCache(settings.RETRIEVAL_CACHE_MAX_ENTRIES, settings.RETRIEVAL_CACHE_PATH or None)
+        return _CACHE["instance"]
+
+
+# --- query embedding cache ----------------------------------------------
+
+class QueryEmbeddingCache(Embeddings):
+    """embed_query만 메모리 LRU (문서 임베딩은 `CachedEmbeddings`가 담당, 그대로 전달)."""
+
+    def __init__(self, base: Embeddings, max_entries: int = 4096):
+        self.base = base
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def _lookup(self, text: str) -> Optional[List[float]]:
+        with self._lock:
+            vec = self._mem.get(text)
+            if vec is not None:
+                self._mem.move_to_end(text)
+        metrics.inc("query_embed_cache.hit" if vec is not None else "query_embed_cache.miss")
+        return vec
+
+    def _store(self, text: str, vec: List[float]) -> None:
+        with self._lock:
+            self._mem[text] = vec
+            self._mem.move_to_end(text)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.base.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vec = self._lookup(text)
+        if vec is None:
+            vec = self.base.embed_query(text)
+            self._store(text, vec)
+        return list(vec)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vec = self._lookup(text)
+        if vec is None:
+            vec = await self.base.aembed_query(text)
+            self._store(text, vec)
+        return list(vec)
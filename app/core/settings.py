@@ -26,8 +26,116 @@ CHROMA_PERSIST_DIR = env("CHROMA_PERSIST_DIR", "/app/storage/chroma")
 DOCS_DIR = env("DOCS_DIR", "/app/data/docs")
 CHUNK_SIZE = int(env("CHUNK_SIZE", "900") or "900")
 CHUNK_OVERLAP = int(env("CHUNK_OVERLAP", "150") or "150")
+# 구조/토큰 기반 splitter(기본): chunk 크기와 겹침을 tiktoken token 수로 지정, SPLITTER=recursive면 위 문자 수 설정 사용
+SPLITTER = (env("SPLITTER", "structured") or "structured").lower()
+CHUNK_TOKENS = int(env("CHUNK_TOKENS", "400") or "400")
+CHUNK_OVERLAP_TOKENS = int(env("CHUNK_OVERLAP_TOKENS", "60") or "60")
 TOP_K = int(env("TOP_K", "5") or "5")
+# Blue/green 컬렉션 버전: 재구축은 새 버전에 build 후 pointer 교체, active 포함 최근 N개만 보관
+COLLECTION_KEEP_VERSIONS = int(env("COLLECTION_KEEP_VERSIONS", "2") or "2")
+COLLECTION_REBUILD_ON_CHANGE = (env("COLLECTION_REBUILD_ON_CHANGE", "true") or "true").lower() == "true"
 
 LANGCHAIN_TRACING_V2 = (env("LANGCHAIN_TRACING_V2", "false") or "false").lower() == "true"
 LANGCHAIN_API_KEY = env("LANGCHAIN_API_KEY", "")
 LANGCHAIN_PROJECT = env("LANGCHAIN_PROJECT", "langchain-catalog-lab")
+
+# Provider resolution (auto 모드 probe 캐시)
+PROVIDER_CACHE_TTL_SEC = float(env("PROVIDER_CACHE_TTL_SEC", "60") or "60")
+PROVIDER_PROBE_INTERVAL_SEC = float(env("PROVIDER_PROBE_INTERVAL_SEC", "15") or "15")
+PROVIDER_PROBE_TIMEOUT_SEC = float(env("PROVIDER_PROBE_TIMEOUT_SEC", "3") or "3")
+
+# HTTP keep-alive connection pool (provider별 최대 연결 수)
+OLLAMA_POOL_SIZE = int(env("OLLAMA_POOL_SIZE", "10") or "10")
+OPENAI_COMPAT_POOL_SIZE = int(env("OPENAI_COMPAT_POOL_SIZE", "20") or "20")
+OPENAI_POOL_SIZE = int(env("OPENAI_POOL_SIZE", "20") or "20")
+HTTP_KEEPALIVE_EXPIRY_SEC = float(env("HTTP_KEEPALIVE_EXPIRY_SEC", "30") or "30")
+
+# LLM response cache (opt-in, temperature=0 호출만)
+LLM_CACHE_ENABLED = (env("LLM_CACHE_ENABLED", "false") or "false").lower() == "true"
+LLM_CACHE_PATH = env("LLM_CACHE_PATH", "/app/storage/llm_response_cache.sqlite")
+LLM_CACHE_TTL_SEC = float(env("LLM_CACHE_TTL_SEC", "86400") or "86400")
+LLM_CACHE_MAX_ENTRIES = int(env("LLM_CACHE_MAX_ENTRIES", "5000") or "5000")
+
+# Embedding cache (model + text hash → memmap float32)
+EMBED_CACHE_ENABLED = (env("EMBED_CACHE_ENABLED", "true") or "true").lower() == "true"
+EMBED_CACHE_DIR = env("EMBED_CACHE_DIR", "/app/storage/embed_cache")
+EMBED_CACHE_MAX_ENTRIES = int(env("EMBED_CACHE_MAX_ENTRIES", "200000") or "200000")
+
+# Embedding executor (token 예산 batch + backend별 병렬 요청 + 재시도, batch 크기는 지연 시간으로 자동 조정)
+EMBED_EXECUTOR_ENABLED = (env("EMBED_EXECUTOR_ENABLED", "true") or "true").lower() == "true"
+EMBED_MAX_CONCURRENCY = int(env("EMBED_MAX_CONCURRENCY", "4") or "4")
+EMBED_BATCH_TOKENS = int(env("EMBED_BATCH_TOKENS", "8000") or "8000")
+EMBED_BATCH_SIZE = int(env("EMBED_BATCH_SIZE", "16") or "16")
+EMBED_BATCH_MIN = int(env("EMBED_BATCH_MIN", "1") or "1")
+EMBED_BATCH_MAX = int(env("EMBED_BATCH_MAX", "256") or "256")
+EMBED_TARGET_BATCH_MS = float(env("EMBED_TARGET_BATCH_MS", "2000") or "2000")
+EMBED_MAX_RETRIES = int(env("EMBED_MAX_RETRIES", "3") or "3")
+EMBED_RETRY_BASE_SEC = float(env("EMBED_RETRY_BASE_SEC", "0.5") or "0.5")
+# ingest: 여러 파일의 chunk를 모아 한 번에 임베딩(batch 병렬화가 효과를 내도록)
+EMBED_INGEST_FLUSH_CHUNKS = int(env("EMBED_INGEST_FLUSH_CHUNKS", "512") or "512")
+
+# Async LLM 동시 실행 한도 (backend별 semaphore)
+LLM_MAX_CONCURRENCY_OLLAMA = int(env("LLM_MAX_CONCURRENCY_OLLAMA", "4") or "4")
+LLM_MAX_CONCURRENCY_OPENAI_COMPAT = int(env("LLM_MAX_CONCURRENCY_OPENAI_COMPAT", "16") or "16")
+LLM_MAX_CONCURRENCY_OPENAI = int(env("LLM_MAX_CONCURRENCY_OPENAI", "32") or "32")
+
+# Indexing worker (SQLite job queue)
+INDEX_WORKER_IN_PROCESS = (env("INDEX_WORKER_IN_PROCESS", "true") or "true").lower() == "true"
+INDEX_WORKER_POLL_SEC = float(env("INDEX_WORKER_POLL_SEC", "1.0") or "1.0")
+INDEX_QUEUE_DB = env("INDEX_QUEUE_DB", "/app/storage/index_queue.sqlite")
+INDEX_JOB_MAX_ATTEMPTS = int(env("INDEX_JOB_MAX_ATTEMPTS", "3") or "3")
+INDEX_JOB_LEASE_SEC = float(env("INDEX_JOB_LEASE_SEC", "600") or "600")
+INDEX_JOB_RETRY_BASE_SEC = float(env("INDEX_JOB_RETRY_BASE_SEC", "2") or "2")
+DOCS_UPLOAD_WAIT_TIMEOUT_SEC = float(env("DOCS_UPLOAD_WAIT_TIMEOUT_SEC", "60") or "60")
+
+# Retrieval mode: vector | lexical(BM25/FTS5) | hybrid(rank fusion)
+RAG_SEARCH_TYPE = (env("RAG_SEARCH_TYPE", "hybrid") or "hybrid").lower()
+RAG_HYBRID_FETCH_K = int(env("RAG_HYBRID_FETCH_K", "20") or "20")
+RAG_HYBRID_RRF_K = int(env("RAG_HYBRID_RRF_K", "60") or "60")
+# hybrid fusion: rrf | weighted | zscore, 가중치는 "vector,lexical"
+RAG_FUSION_METHOD = (env("RAG_FUSION_METHOD", "rrf") or "rrf").lower()
+RAG_HYBRID_WEIGHTS = env("RAG_HYBRID_WEIGHTS", "1.0,1.0") or "1.0,1.0"
+
+# Vector backend: chroma | numpy | faiss_flat | faiss_ivf | faiss_hnsw
+VECTOR_BACKEND = (env("VECTOR_BACKEND", "chroma") or "chroma").lower()
+FAISS_IVF_NLIST = int(env("FAISS_IVF_NLIST", "256") or "256")
+FAISS_IVF_NPROBE = int(env("FAISS_IVF_NPROBE", "16") or "16")
+FAISS_HNSW_M = int(env("FAISS_HNSW_M", "32") or "32")
+FAISS_HNSW_EF_SEARCH = int(env("FAISS_HNSW_EF_SEARCH", "64") or "64")
+# 필터 후보가 이 수 이하이면 index 대신 후보 행만 exact search
+FAISS_FILTER_EXACT_MAX = int(env("FAISS_FILTER_EXACT_MAX", "2048") or "2048")
+FAISS_MMAP = (env("FAISS_MMAP", "true") or "true").lower() == "true"
+# 로컬 backend(numpy/faiss)의 bitmap metadata index 대상 필드
+METADATA_INDEX_FIELDS = tuple(f.strip() for f in (env("METADATA_INDEX_FIELDS", "type,year,org,source") or "").split(",") if f.strip())
+
+# Self-query 파서: 규칙 파서 confidence가 이 값 미만일 때만 LLM 호출
+SELF_QUERY_RULE_MIN_CONFIDENCE = float(env("SELF_QUERY_RULE_MIN_CONFIDENCE", "0.7") or "0.7")
+SELF_QUERY_CACHE_SIZE = int(env("SELF_QUERY_CACHE_SIZE", "1024") or "1024")
+
+# Retrieval result cache (store generation으로 무효화) + 질의 임베딩 LRU
+RETRIEVAL_CACHE_ENABLED = (env("RETRIEVAL_CACHE_ENABLED", "true") or "true").lower() == "true"
+RETRIEVAL_CACHE_MAX_ENTRIES = int(env("RETRIEVAL_CACHE_MAX_ENTRIES", "2048") or "2048")
+RETRIEVAL_CACHE_PATH = env("RETRIEVAL_CACHE_PATH", "") or ""   # 비우면 메모리만
+QUERY_EMBED_CACHE_ENTRIES = int(env("QUERY_EMBED_CACHE_ENTRIES", "4096") or "4096")
+
+# RAG context packer: 모델별 prompt CONTEXT token 예산 (tiktoken 기준)
+RAG_CONTEXT_MAX_TOKENS = int(env("RAG_CONTEXT_MAX_TOKENS", "1500") or "1500")
+# "model=tokens,..." 예: "llama3.1:8b=1500,gpt-4o-mini=4000" (없는 모델은 RAG_CONTEXT_MAX_TOKENS)
+RAG_CONTEXT_MODEL_BUDGETS = {
+    m.strip(): int(v) for m, _, v in (p.partition("=") for p in (env("RAG_CONTEXT_MODEL_BUDGETS", "") or "").split(","))
+    if m.strip() and v.strip().isdigit()
+}
+RAG_CONTEXT_ENCODING = env("RAG_CONTEXT_ENCODING", "cl100k_base")   # 모델명으로 encoding을 못 찾을 때 사용
+
+# 문서 로더: 파싱 process pool (0 = 사용 가능한 CPU 수), 파일이 적으면 현재 프로세스에서 순차 처리
+LOADER_WORKERS = int(env("LOADER_WORKERS", "0") or "0")
+LOADER_PARALLEL_MIN_FILES = int(env("LOADER_PARALLEL_MIN_FILES", "4") or "4")
+LOADER_MP_START = env("LOADER_MP_START", "spawn")   # spawn | forkserver | fork
+
+# Parse cache: 파일 content hash → 페이지별 추출 텍스트(zlib) SQLite, 같은 파일 버전은 1회만 파싱
+PARSE_CACHE_ENABLED = (env("PARSE_CACHE_ENABLED", "true") or "true").lower() == "true"
+PARSE_CACHE_PATH = env("PARSE_CACHE_PATH", "/app/storage/parse_cache.sqlite")
+PARSE_CACHE_MAX_DOCS = int(env("PARSE_CACHE_MAX_DOCS", "20000") or "20000")
+
+# Markdown loader: native(heading 구간별 Document, unstructured 불필요) | unstructured(기존 UnstructuredMarkdownLoader)
+MARKDOWN_LOADER = (env("MARKDOWN_LOADER", "native") or "native").lower()
@@ -0,0 +1,602 @@
+"""Pluggable vector backends (`VECTOR_BACKEND`).
+
+- `chroma`      : 기존 Chroma 컬렉션(기본값)
+- `numpy`       : in-process exact search (연속 float32 행렬 matmul + argpartition, batch 질의)
+- `faiss_flat` / `faiss_ivf` / `faiss_hnsw` : FAISS index (inner product = cosine)
+
+공통 인터페이스는 LangChain `VectorStore` (add/upsert/delete/filtered search) + `persist()`.
+로컬 backend 저장 구조 (`{persist_dir}/{backend}/{collection}/`):
+- `vectors.npy` : 정규화된 float32 행렬(slot 단위, 삭제된 slot은 persist 시 compaction)
+- `docs.json`   : slot → id / 본문 / 메타데이터 sidecar (마지막에 원자적으로 교체 → 변경 감지 기준)
+- `index.faiss` : FAISS index (label = slot). `IO_FLAG_MMAP_IFC | IO_FLAG_READ_ONLY`로 열어 파일을 그대로 매핑
+                  → 여러 uvicorn worker가 page cache를 공유(지원하지 않는 faiss/index는 `IO_FLAG_MMAP`, 이 경우 프로세스별 복사)
+- 메타데이터 필터는 `MetadataIndex`(값별 bitmap)로 후보 slot을 먼저 구한 뒤 그 행만 점수 계산
+"""
+from __future__ import annotations
+import json, os, shutil, tempfile, threading, uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.core import settings
+from app.core import metrics
+from app.core.metadata_filter import match_where
+from app.core.metadata_index import MetadataIndex, SlotSet
+
+BACKENDS = ("chroma", "numpy", "faiss_flat", "faiss_ivf", "faiss_hnsw")
+_COMPACT_RATIO = 0.2
+_GATHER_RATIO = 3   # 후보가 전체의 1/3을 넘으면 gather 대신 mask
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _atomic_write(path: str, write: Callable[[str], None]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class LocalVectorStore(VectorStore):
+    """디스크 sidecar + float32 행렬 기반 in-process store 공통부. 거리 = 1 - cosine."""
+
+    backend = "local"
+
+    def __init__(self, path: str, embedding: Embeddings):
+        self.path = path
+        self._embedding = embedding
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # -- persistence -----------------------------------------------------
+
+    @property
+    def _docs_path(self) -> str:
+        return os.path.join(self.path, "docs.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.npy")
+
+    def _load(self) -> None:
+        with self._lock:
+            self._ids: List[Optional[str]] = []
+            self._texts: List[str] = []
+            self._metas: List[dict] = []
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._buf: Optional[np.ndarray] = None   # 여유 capacity를 둔 쓰기용 버퍼(_vectors는 그 앞부분 view)
+            self._stamp: Optional[int] = None
+            if os.path.exists(self._docs_path):
+                with open(self._docs_path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                self._ids, self._texts, self._metas = raw["ids"], raw["texts"], raw["metadatas"]
+                if os.path.exists(self._vectors_path):
+                    self._vectors = np.load(self._vectors_path, mmap_mode="r")
+                self._stamp = os.stat(self._docs_path).st_mtime_ns
+            self._slot: Dict[str, int] = {cid: i for i, cid in enumerate(self._ids) if cid is not None}
+            self._alive: Optional[np.ndarray] = None
+            self._build_meta_index()
+            self._dirty = False
+            self._load_index()
+
+    def _build_meta_index(self) -> None:
+        self._meta_index = MetadataIndex(settings.METADATA_INDEX_FIELDS)
+        for slot in self._slot.values():
+            self._meta_index.add(slot, self._metas[slot])
+
+    def _maybe_reload(self) -> None:
+        """다른 프로세스(ingest worker)가 persist 했으면 다시 연다."""
+        if self._dirty:
+            return
+        try:
+            stamp = os.stat(self._docs_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if stamp != self._stamp:
+            self._load()
+            metrics.inc(f"vector_backend.reload.{self.backend}")
+
+    def persist(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            if self._ids and self._ids.count(None) > _COMPACT_RATIO * len(self._ids):
+                self._compact()
+            vectors = np.ascontiguousarray(self._vectors, dtype=np.float32)
+
+            def _write_vectors(tmp: str) -> None:
+                with open(tmp, "wb") as f:   # 경로로 넘기면 np.save가 .npy를 덧붙임
+                    np.save(f, vectors)
+
+            _atomic_write(self._vectors_path, _write_vectors)
+            self._save_index()
+            payload = {"backend": self.backend, "ids": self._ids, "texts": self._texts, "metadatas": self._metas}
+
+            def _write_docs(tmp: str) -> None:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, ensure_ascii=False, default=str)
+
+            _atomic_write(self._docs_path, _write_docs)
+            self._stamp = os.stat(self._docs_path).st_mtime_ns
+            self._dirty = False
+
+    def _compact(self) -> None:
+        live = [i for i, cid in enumerate(self._ids) if cid is not None]
+        self._vectors = self._buf = np.ascontiguousarray(np.asarray(self._vectors)[live])
+        self._alive = None
+        self._ids = [self._ids[i] for i in live]
+        self._texts = [self._texts[i] for i in live]
+        self._metas = [self._metas[i] for i in live]
+        self._slot = {cid: i for i, cid in enumerate(self._ids)}
+        self._build_meta_index()   # slot 번호가 바뀌므로 재구축
+        self._on_compact()
+
+    # -- backend hooks -----------------------------------------------------
+
+    def _load_index(self) -> None:
+        pass
+
+    def _save_index(self) -> None:
+        pass
+
+    def _on_add(self, slots: np.ndarray, vectors: np.ndarray) -> None:
+        pass
+
+    def _on_delete(self, slots: List[int]) -> None:
+        pass
+
+    def _on_compact(self) -> None:
+        pass
+
+    def _search_many(self, Q: np.ndarray, k: int, cand: Optional[np.ndarray]) -> List[List[Tuple[int, float]]]:
+        return self._exact_search_many(Q, k, cand)
+
+    # -- mutation ----------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas=metadatas, ids=ids)
+
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[dict]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """이미 계산된 임베딩으로 upsert (같은 id가 있으면 교체)."""
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        x = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1))
+        with self._lock:
+            self._maybe_reload()
+            self.delete([cid for cid in ids if cid in self._slot])
+            start = len(self._ids)
+            self._append_rows(x)
+            for i, (cid, text, meta) in enumerate(zip(ids, texts, metadatas)):
+                self._ids.append(cid)
+                self._texts.append(text)
+                self._metas.append(dict(meta or {}))
+                self._slot[cid] = start + i
+                self._meta_index.add(start + i, self._metas[-1])
+            self._alive = None
+            self._on_add(np.arange(start, start + len(ids), dtype=np.int64), x)
+            self._dirty = True
+        return ids
+
+    def _append_rows(self, x: np.ndarray) -> None:
+        """capacity 2배 증가 버퍼에 행 추가 → add마다 전체 행렬을 다시 복사하지 않음."""
+        n = len(self._ids)
+        if n and self._vectors.shape[1] != x.shape[1]:
+            raise ValueError(f"embedding dim mismatch: {x.shape[1]} != {self._vectors.shape[1]}")
+        need = n + x.shape[0]
+        if self._buf is None or need > self._buf.shape[0] or self._buf.shape[1] != x.shape[1]:
+            cap = max(need, 2 * (self._buf.shape[0] if self._buf is not None else n), 64)
+            buf = np.empty((cap, x.shape[1]), dtype=np.float32)
+            if n:
+                buf[:n] = self._vectors[:n]   # mmap으로 읽은 행렬도 여기서 메모리로 복사
+            self._buf = buf
+        self._buf[n:need] = x
+        self._vectors = self._buf[:need]
+
+    def update_metadatas(self, ids: Sequence[str], metadatas: Sequence[dict]) -> int:
+        """벡터는 그대로 두고 metadata만 교체(없는 id는 무시)."""
+        n = 0
+        with self._lock:
+            self._maybe_reload()
+            for cid, meta in zip(ids, metadatas):
+                slot = self._slot.get(cid)
+                if slot is None:
+                    continue
+                self._meta_index.remove(slot, self._metas[slot])
+                self._metas[slot] = dict(meta or {})
+                self._meta_index.add(slot, self._metas[slot])
+                n += 1
+            if n:
+                self._dirty = True
+        return n
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return True
+        with self._lock:
+            slots = []
+            for cid in ids:
+                slot = self._slot.pop(cid, None)
+                if slot is None:
+                    continue
+                self._meta_index.remove(slot, self._metas[slot])
+                self._ids[slot] = None
+                self._texts[slot] = ""
+                self._metas[slot] = {}
+                slots.append(slot)
+            if slots:
+                self._alive = None
+                self._on_delete(slots)
+                self._dirty = True
+        return True
+
+    # -- read --------------------------------------------------------------
+
+    def count(self) -> int:
+        self._maybe_reload()
+        return len(self._slot)
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Chroma `get()`과 같은 형태(ids / documents / metadatas)."""
+        self._maybe_reload()
+        with self._lock:
+            if ids:
+                slots = [s for s in (self._slot.get(c) for c in ids) if s is not None and match_where(self._metas[s], where)]
+            elif where:
+                slots = self._candidates(where).tolist()
+            else:
+                slots = sorted(self._slot.values())
+            return {
+                "ids": [self._ids[s] for s in slots],
+                "documents": [self._texts[s] for s in slots],
+                "metadatas": [dict(self._metas[s]) for s in slots],
+            }
+
+    def _live_mask(self) -> np.ndarray:
+        if self._alive is None:
+            self._alive = np.fromiter((cid is not None for cid in self._ids), dtype=bool, count=len(self._ids))
+        return self._alive
+
+    def _candidates(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """where 조건을 만족하는 live slot(정렬된 int64, 조건 없으면 None).
+
+        bitmap index로 계산 가능한 조건은 집합 연산, 나머지(residual)는 그 후보에 대해서만 `match_where`.
+        """
+        if not where:
+            return None
+        acc, residual = self._meta_index.plan(where, len(self._ids), lambda: SlotSet.from_mask(self._live_mask()))
+        slots = np.flatnonzero(self._live_mask()) if acc is None else acc.to_ids()
+        if residual is not None:
+            metas = self._metas
+            slots = np.fromiter((s for s in slots.tolist() if match_where(metas[s], residual)), dtype=np.int64)
+        metrics.inc("metadata_index.full" if residual is None else ("metadata_index.partial" if acc is not None else "metadata_index.scan"))
+        return slots
+
+    def _exact_search_many(self, Q: np.ndarray, k: int, cand: Optional[np.ndarray]) -> List[List[Tuple[int, float]]]:
+        """(m, dim) 질의 행렬 → 질의별 [(slot, cosine)]. matmul 1회 + 행별 argpartition top-k.
+
+        `cand`(후보 slot)가 있으면 그 행만 gather해서 계산 → 필터 질의 비용은 후보 수에 비례.
+        """
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(len(Q))]
+        if cand is None and len(self._slot) == n:
+            rows = None   # 삭제된 slot 없음 → 전체 행렬 그대로
+        else:
+            rows = np.flatnonzero(self._live_mask()) if cand is None else cand
+            if rows.size == 0:
+                return [[] for _ in range(len(Q))]
+        if rows is not None and rows.size * _GATHER_RATIO > n:
+            # 후보가 많으면 행 gather(복사)보다 전체 matmul 후 비후보를 -inf로 가리는 쪽이 빠름
+            sims = Q @ self._vectors.T
+            keep = np.zeros(n, dtype=bool)
+            keep[rows] = True
+            sims[:, ~keep] = -np.inf
+            rows = None
+        else:
+            sims = Q @ (self._vectors if rows is None else self._vectors[rows]).T
+        kk = min(k, sims.shape[1])
+        if kk < sims.shape[1]:
+            top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        else:
+            top = np.broadcast_to(np.arange(kk), (len(Q), kk))
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        top, top_sims = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+        slots = top if rows is None else rows[top]
+        return [
+            [(slot, sim) for slot, sim in zip(r_slots.tolist(), r_sims.tolist()) if sim != -np.inf]
+            for r_slots, r_sims in zip(slots, top_sims)
+        ]
+
+    def _exact_search(self, q: np.ndarray, k: int, cand: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        return self._exact_search_many(q.reshape(1, -1), k, cand)[0]
+
+    def _hits_to_docs(self, hits: List[Tuple[int, float]]) -> List[Tuple[Document, float]]:
+        return [(Document(page_content=self._texts[s], metadata=dict(self._metas[s])), 1.0 - sim) for s, sim in hits]
+
+    def similarity_search_by_vectors_with_score(
+        self, embeddings: Sequence[Sequence[float]], k: int = 4, filter: Optional[dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """여러 질의 벡터를 한 번에 검색(질의 행렬 x 문서 행렬). filter는 모든 질의에 공통."""
+        self._maybe_reload()
+        Q = _normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        with self._lock:
+            return [self._hits_to_docs(h) for h in self._search_many(Q, k, self._candidates(filter))]
+
+    def batch_similarity_search_with_score(
+        self, queries: Sequence[str], k: int = 4, filter: Optional[dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        vectors = [self._embedding.embed_query(q) for q in queries]
+        return self.similarity_search_by_vectors_with_score(vectors, k=k, filter=filter)
+
+    def batch_similarity_search(self, queries: Sequence[str], k: int = 4, filter: Optional[dict] = None) -> List[List[Document]]:
+        return [[d for d, _ in res] for res in self.batch_similarity_search_with_score(queries, k=k, filter=filter)]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors_with_score([embedding], k=k, filter=filter)[0]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [d for d, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [d for d, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(path or tempfile.mkdtemp(prefix="vs-"), embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.persist()
+        return store
+
+
+class NumpyVectorStore(LocalVectorStore):
+    """정확한(brute force) cosine top-k. 수만 chunk 규모에서 client/직렬화 비용 없음.
+
+    - 행은 저장 시 L2 정규화 → 질의는 내적 한 번(`Q @ V.T`), top-k는 `argpartition` 후 k개만 정렬
+    - `batch_similarity_search()` / `similarity_search_by_vectors_with_score()`: 질의 여러 개를 matmul 1회로
+    - 저장: `vectors.npy`(읽기는 mmap) + `docs.json`
+    """
+
+    backend = "numpy"
+
+
+class FaissVectorStore(LocalVectorStore):
+    """FAISS index (flat / ivf / hnsw). label = slot, 저장 후 읽기 쪽은 mmap."""
+
+    KINDS = ("flat", "ivf", "hnsw")
+
+    def __init__(self, path: str, embedding: Embeddings, kind: str = "flat"):
+        if kind not in self.KINDS:
+            raise ValueError(f"faiss kind must be one of {self.KINDS}: {kind}")
+        self.kind = kind
+        self.backend = f"faiss_{kind}"
+        super().__init__(path, embedding)
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.path, "index.faiss")
+
+    def _load_index(self) -> None:
+        import faiss
+        self._index = None
+        self._index_mmap = False
+        self._stale = len(self._slot) > 0   # index가 없거나 행렬과 맞지 않으면 persist 때 재구축
+        self._tombstones = 0
+        if os.path.exists(self._index_path) and self._stamp is not None:
+            self._index, self._index_mmap = self._read_index_shared() if settings.FAISS_MMAP else (faiss.read_index(self._index_path), False)
+            self._stale = self._index.ntotal != len(self._ids)
+
+    def _read_index_shared(self):
+        """zero-copy 매핑(`IO_FLAG_MMAP_IFC`) 우선. `IO_FLAG_MMAP`은 flat/HNSW를 결국 heap으로 복사하므로 fallback으로만."""
+        import faiss
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+        if ifc is not None:
+            try:
+                index = faiss.read_index(self._index_path, ifc | faiss.IO_FLAG_READ_ONLY)
+                metrics.inc("vector_backend.faiss_mmap_ifc")
+                return index, True
+            except RuntimeError:
+                pass
+        metrics.inc("vector_backend.faiss_mmap_fallback")
+        return faiss.read_index(self._index_path, faiss.IO_FLAG_MMAP), True
+
+    def _writable_index(self):
+        """mmap으로 연 index는 읽기 전용 취급 → 수정 전에 메모리로 다시 읽음."""
+        import faiss
+        if self._index is not None and self._index_mmap:
+            self._index = faiss.read_index(self._index_path)
+            self._index_mmap = False
+        return self._index
+
+    def _new_index(self, dim: int, n: int):
+        import faiss
+        if self.kind == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, settings.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efConstruction = max(40, 2 * settings.FAISS_HNSW_M)
+            return faiss.IndexIDMap2(base)
+        if self.kind == "ivf":
+            nlist = max(1, min(settings.FAISS_IVF_NLIST, n // 39))
+            return faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    def _rebuild(self) -> None:
+        live = np.asarray(sorted(self._slot.values()), dtype=np.int64)
+        if live.size == 0:
+            self._index = None
+        else:
+            x = np.ascontiguousarray(np.asarray(self._vectors)[live], dtype=np.float32)
+            index = self._new_index(x.shape[1], x.shape[0])
+            if not index.is_trained:
+                index.train(x)
+            index.add_with_ids(x, live)
+            self._index = index
+        self._index_mmap = False
+        self._stale = False
+        self._tombstones = 0
+        metrics.inc(f"vector_backend.rebuild.{self.backend}")
+
+    def _on_add(self, slots: np.ndarray, vectors: np.ndarray) -> None:
+        # IVF는 학습된 centroid가 필요 → 첫 구축은 persist 때(그 전까지는 exact search)
+        if self._stale or self._index is None:
+            self._stale = True
+            return
+        self._writable_index().add_with_ids(np.ascontiguousarray(vectors), slots)
+
+    def _on_delete(self, slots: List[int]) -> None:
+        if self._stale or self._index is None:
+            return
+        if self.kind == "hnsw":
+            # HNSW는 remove_ids 미지원 → tombstone(검색 결과에서 제외), compaction 때 재구축
+            self._tombstones += len(slots)
+            return
+        import faiss
+        self._writable_index().remove_ids(faiss.IDSelectorBatch(np.asarray(slots, dtype=np.int64)))
+
+    def _on_compact(self) -> None:
+        self._stale = True
+
+    def _save_index(self) -> None:
+        import faiss
+        if self._stale or self._tombstones:
+            self._rebuild()
+        if self._index is None:
+            if os.path.exists(self._index_path):
+                os.remove(self._index_path)
+            return
+        index = self._index
+        _atomic_write(self._index_path, lambda tmp: faiss.write_index(index, tmp))
+
+    def _search_params(self, sel):
+        import faiss
+        if self.kind == "ivf":
+            return faiss.SearchParametersIVF(sel=sel, nprobe=settings.FAISS_IVF_NPROBE)
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=settings.FAISS_HNSW_EF_SEARCH)
+        return faiss.SearchParameters(sel=sel)
+
+    def _search_many(self, Q: np.ndarray, k: int, cand: Optional[np.ndarray]) -> List[List[Tuple[int, float]]]:
+        import faiss
+        if self._index is None or self._stale or self._index.ntotal == 0:
+            return self._exact_search_many(Q, k, cand)
+        params = None
+        if cand is not None:
+            # 후보가 적으면 그 행만 정확히 계산(HNSW selector는 작은 후보 집합에서 recall이 떨어짐)
+            if cand.size <= max(settings.FAISS_FILTER_EXACT_MAX, k):
+                return self._exact_search_many(Q, k, cand)
+            params = self._search_params(faiss.IDSelectorBatch(cand.astype(np.int64)))
+        fetch = k + self._tombstones
+        Q = np.ascontiguousarray(Q, dtype=np.float32)
+        D, I = self._index.search(Q, fetch, params=params) if params else self._index.search(Q, fetch)
+        out = []
+        for d_row, i_row in zip(D.tolist(), I.tolist()):
+            hits = []
+            for slot, sim in zip(i_row, d_row):
+                if slot < 0 or slot >= len(self._ids) or self._ids[slot] is None:
+                    continue
+                hits.append((slot, float(sim)))
+                if len(hits) >= k:
+                    break
+            out.append(hits)
+        return out
+
+
+def open_vectorstore(backend: str, persist_dir: str, collection: str, embedding: Embeddings):
+    """backend 이름으로 store 생성. Chroma 외 backend는 `{persist_dir}/{backend}/{collection}/`에 저장."""
+    if backend not in BACKENDS:
+        raise ValueError(f"VECTOR_BACKEND must be one of {BACKENDS}: {backend}")
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory=persist_dir, embedding_function=embedding, collection_name=collection)
+    path = os.path.join(persist_dir, backend, collection)
+    if backend == "numpy":
+        return NumpyVectorStore(path, embedding)
+    return FaissVectorStore(path, embedding, kind=backend.split("_", 1)[1])
+
+
+def drop_collection(backend: str, persist_dir: str, collection: str) -> None:
+    """컬렉션 저장소 삭제(GC된 blue/green 버전). 없으면 무시."""
+    if backend == "chroma":
+        import chromadb
+        try:
+            chromadb.PersistentClient(path=persist_dir).delete_collection(collection)
+        except Exception:   # 이미 없음(chromadb 버전별로 ValueError / NotFoundError)
+            pass
+        return
+    shutil.rmtree(os.path.join(persist_dir, backend, collection), ignore_errors=True)
+
+
+def vector_count(vs) -> int:
+    if isinstance(vs, LocalVectorStore):
+        return vs.count()
+    return vs._collection.count()
+
+
+def persist(vs) -> None:
+    """로컬 backend는 명시적으로 저장(Chroma는 쓰기 즉시 영속)."""
+    if isinstance(vs, LocalVectorStore):
+        vs.persist()
+
+
+def update_metadata(vs, ids: Sequence[str], metadatas: Sequence[dict]) -> None:
+    """재임베딩 없이 chunk metadata만 갱신(위치만 바뀐 chunk 등)."""
+    if not ids:
+        return
+    if isinstance(vs, LocalVectorStore):
+        vs.update_metadatas(ids, metadatas)
+    else:
+        vs._collection.update(ids=list(ids), metadatas=[dict(m) for m in metadatas])
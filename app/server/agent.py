@@ -1,17 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from dataclasses import dataclass
-from typing import Any, Literal, Optional, Tuple, List, Dict
+from typing import Any, AsyncIterator, Literal, Optional, Tuple, List, Dict
 
 from pydantic import BaseModel, Field
 
 from langchain_core.prompts import ChatPromptTemplate
 
-from app.core import settings
-from app.core.llm_factory import build_chat_model
-from app.core.rag_utils import ingest_dir, vectorstore
+from app.core.context_packer import pack_context
+from app.core.llm_factory import build_chat_model, chat_model_name, llm_slot
+from app.core import retrieval
 from app.server.store import create_action
 
 from app.tools.schemas import (
@@ -27,6 +28,7 @@ from app.tools.impl import budget_split, timeline, sponsorship_package
 # ---------------------------------------------------------------------
 
 Mode = Literal["chat", "rag", "plan"]
+SearchType = Literal["vector", "lexical", "hybrid"]
 
 
 class Route(BaseModel):
@@ -105,14 +107,16 @@ def route(q: str) -> Route:
 # Chat
 # ---------------------------------------------------------------------
 
+def _chat_messages(q: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": "너는 예술경영전문가 조력자다. 과장하지 말고, 실행 가능한 조언을 준다."},
+        {"role": "user", "content": q},
+    ]
+
+
 def answer_chat(q: str) -> Tuple[str, List[Dict[str, Any]]]:
     llm = build_chat_model(temperature=0.2)
-    resp = llm.invoke(
-        [
-            {"role": "system", "content": "너는 예술경영전문가 조력자다. 과장하지 말고, 실행 가능한 조언을 준다."},
-            {"role": "user", "content": q},
-        ]
-    )
+    resp = llm.invoke(_chat_messages(q))
     return getattr(resp, "content", str(resp)), []
 
 
@@ -123,45 +127,50 @@ def answer_chat(q: str) -> Tuple[str, List[Dict[str, Any]]]:
 _RAG_SYSTEM = (
     "너는 CONTEXT 기반으로만 답한다.\n"
     "- CONTEXT에 근거가 없으면 '근거 부족'이라고 답한다.\n"
-    "- 마지막에 '근거' 섹션을 만들고 SOURCE 1~2를 짧게 인용/요약한다.\n"
+    "- 마지막에 '근거' 섹션을 만들고 사용한 SOURCE 번호를 짧게 인용/요약한다.\n"
     "- 숫자/사실은 CONTEXT에서만 가져온다."
 )
 
 
-def _build_rag_context(docs: list[Any], max_sources: int = 2) -> str:
-    """Make a compact context with SOURCE markers."""
-    picked = docs[:max_sources]
-    parts = []
-    for i, d in enumerate(picked, start=1):
-        parts.append(f"SOURCE {i}:\n{d.page_content}")
-    return "\n\n".join(parts)
+_RAG_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", _RAG_SYSTEM),
+        ("human", "CONTEXT:\n{context}\n\nQ:\n{q}"),
+    ]
+)
+
+
+def _rag_messages(q: str, docs: list[Any]) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    # 모델별 token 예산까지 순위 순으로 채움(overlap 제거/문장 경계 trim), used는 SOURCE 번호 순서
+    packed = pack_context(docs, model=chat_model_name())
+    messages = _RAG_PROMPT.format_messages(context=packed.text, q=q)
+    return messages, packed.used_docs()
 
 
-def answer_rag(q: str, top_k: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
-    # 1) Ensure docs are ingested
-    ingest_dir(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
+def _rag_prepare(
+    q: str, top_k: Optional[int] = None, search_type: Optional[SearchType] = None
+) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """검색 + 프롬프트 메시지 구성. LLM 호출 전 단계만 수행(인덱스 동기화는 index worker 담당)."""
+    # 1) Search (vector | lexical | hybrid)
+    docs = retrieval.search(q, k=top_k, search_type=search_type, collection="catalog_docs")
 
-    # 2) Search
-    vs = vectorstore(settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
-    k = int(top_k or settings.TOP_K)
-    docs = vs.similarity_search(q, k=k)
+    # 2) Prompt
+    return _rag_messages(q, docs)
 
-    # 3) Prompt
-    llm = build_chat_model(temperature=0)
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", _RAG_SYSTEM),
-            ("human", "CONTEXT:\n{context}\n\nQ:\n{q}"),
-        ]
-    )
 
-    context = _build_rag_context(docs, max_sources=2)
-    resp = (prompt | llm).invoke({"context": context, "q": q})
+async def _arag_prepare(
+    q: str, top_k: Optional[int] = None, search_type: Optional[SearchType] = None
+) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    docs = await retrieval.asearch(q, k=top_k, search_type=search_type, collection="catalog_docs")
+    return _rag_messages(q, docs)
 
-    used = [
-        {"meta": getattr(d, "metadata", {}), "preview": (d.page_content or "")[:200]}
-        for d in docs[:3]
-    ]
+
+def answer_rag(
+    q: str, top_k: Optional[int] = None, search_type: Optional[SearchType] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    messages, used = _rag_prepare(q, top_k=top_k, search_type=search_type)
+    llm = build_chat_model(temperature=0)
+    resp = llm.invoke(messages)
     return getattr(resp, "content", str(resp)), used
 
 
@@ -221,7 +230,7 @@ def _collect_tool_data(q: str) -> PlanToolData:
     return PlanToolData(data=data, notes=notes)
 
 
-def answer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
+def _plan_prepare(q: str) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
     tool = _collect_tool_data(q)
 
     tool_payload = {
@@ -230,8 +239,6 @@ def answer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
     }
     tool_json = json.dumps(tool_payload, ensure_ascii=False, indent=2)
 
-    llm = build_chat_model(temperature=0.2)
-
     user_content = (
         f"Q: {q}\n\n"
         "요구사항:\n"
@@ -243,15 +250,20 @@ def answer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
         f"{tool_json}\n"
     )
 
-    resp = llm.invoke(
-        [
-            {"role": "system", "content": _PLAN_SYSTEM},
-            {"role": "user", "content": user_content},
-        ]
-    )
+    messages = [
+        {"role": "system", "content": _PLAN_SYSTEM},
+        {"role": "user", "content": user_content},
+    ]
 
     # plan 모드는 tool metadata를 used_docs에 남겨서 UI에서 확인 가능하게
     used = [{"meta": {"source": "tools"}, "preview": tool_json[:400]}]
+    return messages, used
+
+
+def answer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
+    messages, used = _plan_prepare(q)
+    llm = build_chat_model(temperature=0.2)
+    resp = llm.invoke(messages)
     return getattr(resp, "content", str(resp)), used
 
 
@@ -259,11 +271,40 @@ def answer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
 # Public entry
 # ---------------------------------------------------------------------
 
+def _pending_response(q: str, r: Route, chosen: Mode, auto_approve: Optional[bool]) -> Optional[Dict[str, Any]]:
+    """승인이 필요하면 pending action을 만들고 응답 dict를 반환(아니면 None)."""
+    # approval policy (env default)
+    if auto_approve is None:
+        auto_approve = (os.getenv("AUTO_APPROVE", "true").lower() == "true")
+
+    if not (r.need_approval and not auto_approve):
+        return None
+
+    action = create_action(
+        {
+            "q": q,
+            "suggested_mode": chosen,
+            "action_type": r.action_type,
+            "reason": r.reason,
+        }
+    )
+    return {
+        "answer": (
+            f"승인이 필요한 작업으로 분류되었습니다(action_type={r.action_type}). "
+            "(/approve로 승인 후 진행)"
+        ),
+        "mode": chosen,
+        "used_docs": [],
+        "pending_action": action,
+    }
+
+
 def run(
     q: str,
     mode: Optional[Mode] = None,
     top_k: Optional[int] = None,
     auto_approve: Optional[bool] = None,
+    search_type: Optional[SearchType] = None,
 ) -> Dict[str, Any]:
     """
     Entry point used by API.
@@ -272,35 +313,16 @@ def run(
     r = route(q)
     chosen: Mode = mode or r.mode
 
-    # approval policy (env default)
-    if auto_approve is None:
-        auto_approve = (os.getenv("AUTO_APPROVE", "true").lower() == "true")
-
-    if r.need_approval and not auto_approve:
-        action = create_action(
-            {
-                "q": q,
-                "suggested_mode": chosen,
-                "action_type": r.action_type,
-                "reason": r.reason,
-            }
-        )
-        return {
-            "answer": (
-                f"승인이 필요한 작업으로 분류되었습니다(action_type={r.action_type}). "
-                "(/approve로 승인 후 진행)"
-            ),
-            "mode": chosen,
-            "used_docs": [],
-            "pending_action": action,
-        }
+    pending = _pending_response(q, r, chosen, auto_approve)
+    if pending is not None:
+        return pending
 
     if chosen == "chat":
         ans, used = answer_chat(q)
     elif chosen == "plan":
         ans, used = answer_plan(q)
     else:
-        ans, used = answer_rag(q, top_k=top_k)
+        ans, used = answer_rag(q, top_k=top_k, search_type=search_type)
 
     return {
         "answer": ans,
@@ -308,3 +330,114 @@ def run(
         "used_docs": used,
         "pending_action": None,
     }
+
+
+# ---------------------------------------------------------------------
+# Async entry (ainvoke end to end)
+# ---------------------------------------------------------------------
+
+_MODE_TEMPERATURE = {"chat": 0.2, "rag": 0.0, "plan": 0.2}
+
+
+async def _aprepare(
+    chosen: Mode, q: str, top_k: Optional[int], search_type: Optional[SearchType] = None
+) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    if chosen == "chat":
+        return _chat_messages(q), []
+    if chosen == "plan":
+        # tool 호출은 결정론적 로컬 계산(빠름)
+        return _plan_prepare(q)
+    return await _arag_prepare(q, top_k=top_k, search_type=search_type)
+
+
+async def _ainvoke(chosen: Mode, messages: List[Any]) -> str:
+    llm = build_chat_model(temperature=_MODE_TEMPERATURE[chosen])
+    async with llm_slot():
+        resp = await llm.ainvoke(messages)
+    return getattr(resp, "content", str(resp))
+
+
+async def aanswer_chat(q: str) -> Tuple[str, List[Dict[str, Any]]]:
+    return await _ainvoke("chat", _chat_messages(q)), []
+
+
+async def aanswer_rag(
+    q: str, top_k: Optional[int] = None, search_type: Optional[SearchType] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    messages, used = await _arag_prepare(q, top_k=top_k, search_type=search_type)
+    return await _ainvoke("rag", messages), used
+
+
+async def aanswer_plan(q: str) -> Tuple[str, List[Dict[str, Any]]]:
+    messages, used = _plan_prepare(q)
+    return await _ainvoke("plan", messages), used
+
+
+async def arun(
+    q: str,
+    mode: Optional[Mode] = None,
+    top_k: Optional[int] = None,
+    auto_approve: Optional[bool] = None,
+    search_type: Optional[SearchType] = None,
+) -> Dict[str, Any]:
+    """`run()`의 async 버전. LLM 동시 호출은 backend별 semaphore(`llm_slot`)로 제한."""
+    r = route(q)
+    chosen: Mode = mode or r.mode
+
+    pending = await asyncio.to_thread(_pending_response, q, r, chosen, auto_approve)
+    if pending is not None:
+        return pending
+
+    if chosen == "chat":
+        ans, used = await aanswer_chat(q)
+    elif chosen == "plan":
+        ans, used = await aanswer_plan(q)
+    else:
+        ans, used = await aanswer_rag(q, top_k=top_k, search_type=search_type)
+
+    return {
+        "answer": ans,
+        "mode": chosen,
+        "used_docs": used,
+        "pending_action": None,
+    }
+
+
+# ---------------------------------------------------------------------
+# Streaming entry (SSE)
+# ---------------------------------------------------------------------
+
+
+async def astream_events(
+    q: str,
+    mode: Optional[Mode] = None,
+    top_k: Optional[int] = None,
+    auto_approve: Optional[bool] = None,
+    search_type: Optional[SearchType] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """(event, data) 순서: route → used_docs → token* → done.
+
+    소비자가 generator를 닫으면(클라이언트 연결 종료) `astream`도 닫혀 LLM 생성이 취소됩니다.
+    """
+    r = route(q)
+    chosen: Mode = mode or r.mode
+    yield "route", {"mode": chosen, "reason": r.reason, "need_approval": r.need_approval, "action_type": r.action_type}
+
+    pending = await asyncio.to_thread(_pending_response, q, r, chosen, auto_approve)
+    if pending is not None:
+        yield "done", pending
+        return
+
+    messages, used = await _aprepare(chosen, q, top_k, search_type)
+    yield "used_docs", {"used_docs": used}
+
+    llm = build_chat_model(temperature=_MODE_TEMPERATURE[chosen], streaming=True)
+    parts: List[str] = []
+    async with llm_slot():
+        async for chunk in llm.astream(messages):
+            delta = getattr(chunk, "content", "") or ""
+            if delta:
+                parts.append(delta)
+                yield "token", {"delta": delta}
+
+    yield "done", {"answer": "".join(parts), "mode": chosen, "used_docs": used, "pending_action": None}
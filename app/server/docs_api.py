@@ -1,17 +1,32 @@
 from __future__ import annotations
-import os, uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import os, uuid, asyncio, time
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 from app.core import settings
-from app.core.rag_utils import save_meta_index, load_meta_index, infer_metadata_from_filename, ingest_dir_meta
+from app.core.rag_utils import save_meta_index, load_meta_index, infer_metadata_from_filename
+from app.server import index_queue
 
 router = APIRouter(prefix="/docs", tags=["docs"])
 
 class UploadResult(BaseModel):
     saved: list[dict]
-    indexed_chunks: int
+    indexed_chunks: int = 0          # wait=true 로 완료까지 기다린 경우에만 채워짐
+    job_ids: list[str] = []
+    jobs: list[dict] = []            # job별 status (wait=true 면 최종 상태)
+
+async def _wait_jobs(job_ids: list[str], timeout_sec: float) -> list[dict]:
+    """job이 모두 done/failed가 되거나 timeout까지 polling."""
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        jobs = [index_queue.get_job(j) or {"id": j, "status": "missing"} for j in job_ids]
+        if all(j["status"] in ("done", "failed", "missing") for j in jobs) or time.monotonic() >= deadline:
+            return jobs
+        await asyncio.sleep(0.2)
+
+def _job_view(job: dict) -> dict:
+    return {k: job.get(k) for k in ("id", "kind", "path", "status", "attempts", "error", "result")}
 
 @router.get("")
 def list_docs():
@@ -23,7 +38,11 @@ def list_docs():
     return {"docs": files, "meta_index": load_meta_index(settings.DOCS_DIR)}
 
 @router.post("/upload", response_model=UploadResult)
-async def upload(files: List[UploadFile] = File(...)):
+async def upload(
+    files: List[UploadFile] = File(...),
+    wait: bool = Query(False, description="인덱싱 완료(또는 timeout)까지 기다린 뒤 응답"),
+    timeout_sec: Optional[float] = Query(None, ge=0, description="wait=true 일 때 최대 대기 시간(초)"),
+):
     os.makedirs(settings.DOCS_DIR, exist_ok=True)
     meta_idx = load_meta_index(settings.DOCS_DIR)
 
@@ -46,6 +65,24 @@ async def upload(files: List[UploadFile] = File(...)):
 
     save_meta_index(settings.DOCS_DIR, meta_idx)
 
-    # re-index with metadata (small datasets ok)
-    chunks = ingest_dir_meta(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
-    return UploadResult(saved=saved, indexed_chunks=chunks)
+    # 업로드한 파일만 파일 단위 job으로 적재 → background worker가 증분 인덱싱
+    job_ids: list[str] = []
+    for item in saved:
+        job = index_queue.enqueue_job("file", path=item["filename"], payload={"collection": "catalog_docs", "source": "upload"})
+        if job["id"] not in job_ids:
+            job_ids.append(job["id"])
+
+    if not wait:
+        jobs = [index_queue.get_job(j) for j in job_ids]
+        return UploadResult(saved=saved, job_ids=job_ids, jobs=[_job_view(j) for j in jobs if j])
+
+    jobs = await _wait_jobs(job_ids, timeout_sec if timeout_sec is not None else settings.DOCS_UPLOAD_WAIT_TIMEOUT_SEC)
+    chunks = sum(int((j.get("result") or {}).get("chunks", 0)) for j in jobs if j["status"] == "done")
+    return UploadResult(saved=saved, indexed_chunks=chunks, job_ids=job_ids, jobs=[_job_view(j) for j in jobs])
+
+@router.get("/jobs/{job_id}")
+def upload_job_status(job_id: str):
+    job = index_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "job not found")
+    return _job_view(job)
@@ -1,31 +1,268 @@
+"""Durable indexing job queue (SQLite).
+
+- claim / ack / retry(backoff) 의미론, lease 만료된 running job은 재할당
+- 파일 단위 job(`kind=file`) + 전체 스캔 job(`kind=full`)
+- 같은 대상의 queued job은 하나로 합침(coalescing), full이 대기 중이면 file job도 full에 합침
+- 실행 중 job은 worker가 `heartbeat`로 lease 연장, `ack`/`fail`은 현재 owner(worker)만 가능
+- lease 만료 재할당도 `max_attempts`까지만(worker를 죽이는 job이 무한 재시도되지 않게)
+"""
 from __future__ import annotations
-import os, json, time
-from typing import Any, Dict, List
+import os, json, sqlite3, time, uuid
+from typing import List
 
-QUEUE_PATH = os.getenv("INDEX_QUEUE", "/app/storage/index_queue.jsonl")
+from app.core import settings
 
-def enqueue(job: dict) -> dict:
-    os.makedirs(os.path.dirname(QUEUE_PATH), exist_ok=True)
-    job = {**job, "ts": time.time()}
-    with open(QUEUE_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(job, ensure_ascii=False) + "\n")
+_COLUMNS = "id, kind, path, status, attempts, max_attempts, payload, created_at, available_at, claimed_at, finished_at, worker, error, result"
+
+def _conn():
+    os.makedirs(os.path.dirname(settings.INDEX_QUEUE_DB), exist_ok=True)
+    c = sqlite3.connect(settings.INDEX_QUEUE_DB, timeout=30, isolation_level=None)
+    try:
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute("""CREATE TABLE IF NOT EXISTS jobs(
+            id TEXT PRIMARY KEY,
+            kind TEXT,
+            path TEXT,
+            dedupe_key TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            max_attempts INTEGER,
+            payload TEXT,
+            created_at REAL,
+            available_at REAL,
+            claimed_at REAL,
+            finished_at REAL,
+            worker TEXT,
+            error TEXT,
+            result TEXT
+        )""")
+        c.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(status, available_at)")
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_coalesce ON jobs(dedupe_key) WHERE status='queued'")
+    except Exception:
+        c.close()
+        raise
+    return c
+
+def _row(r) -> dict:
+    keys = [k.strip() for k in _COLUMNS.split(",")]
+    d = dict(zip(keys, r))
+    d["payload"] = json.loads(d["payload"] or "{}")
+    d["result"] = json.loads(d["result"]) if d["result"] else None
+    return d
+
+def _dedupe_key(kind: str, path: str | None, payload: dict | None) -> str:
+    return f"{kind}:{(payload or {}).get('collection') or ''}:{path or ''}"
+
+def enqueue_job(kind: str, path: str | None = None, payload: dict | None = None, max_attempts: int | None = None) -> dict:
+    """job 적재. 같은 대상의 queued job이 있으면 새로 만들지 않고 그 job을 반환(coalesced=True)."""
+    now = time.time()
+    coll = (payload or {}).get("collection") or ""
+    dedupe_key = _dedupe_key(kind, path, payload)
+    c = _conn()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        if kind == "file":
+            full = c.execute(f"SELECT {_COLUMNS} FROM jobs WHERE dedupe_key=? AND status='queued'", (f"full:{coll}:",)).fetchone()
+            if full:
+                c.execute("COMMIT")
+                return {**_row(full), "coalesced": True}
+        cur = c.execute(f"SELECT {_COLUMNS} FROM jobs WHERE dedupe_key=? AND status='queued'", (dedupe_key,)).fetchone()
+        if cur:
+            c.execute("COMMIT")
+            return {**_row(cur), "coalesced": True}
+        jid = uuid.uuid4().hex
+        c.execute(
+            "INSERT INTO jobs(id, kind, path, dedupe_key, status, attempts, max_attempts, payload, created_at, available_at) "
+            "VALUES (?,?,?,?, 'queued', 0, ?,?,?,?)",
+            (jid, kind, path, dedupe_key, max_attempts or settings.INDEX_JOB_MAX_ATTEMPTS, json.dumps(payload or {}, ensure_ascii=False), now, now),
+        )
+        c.execute("COMMIT")
+    finally:
+        c.close()
+    return {**get_job(jid), "coalesced": False}
+
+def pending_job(kind: str, collection: str) -> dict | None:
+    """같은 컬렉션의 queued/running `kind` job(가장 오래된 것). 없으면 None."""
+    c = _conn()
+    try:
+        rows = c.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE kind=? AND status IN ('queued','running') ORDER BY created_at", (kind,)
+        ).fetchall()
+    finally:
+        c.close()
+    for r in rows:
+        job = _row(r)
+        if (job["payload"] or {}).get("collection") == collection:
+            return job
+    return None
+
+def claim(worker: str) -> dict | None:
+    """가장 오래된 실행 가능 job 1개를 running으로 가져옴(lease 만료 job 포함)."""
+    now = time.time()
+    c = _conn()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        # lease가 만료됐는데 시도 횟수를 다 쓴 job(예: worker를 죽이는 job) → 재할당하지 않고 failed
+        c.execute(
+            "UPDATE jobs SET status='failed', finished_at=?, error=COALESCE(error, 'lease expired after max attempts') "
+            "WHERE status='running' AND claimed_at<? AND attempts>=max_attempts",
+            (now, now - settings.INDEX_JOB_LEASE_SEC),
+        )
+        r = c.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE (status='queued' AND available_at<=?) "
+            "OR (status='running' AND claimed_at<? AND attempts<max_attempts) ORDER BY created_at LIMIT 1",
+            (now, now - settings.INDEX_JOB_LEASE_SEC),
+        ).fetchone()
+        if not r:
+            c.execute("COMMIT")
+            return None
+        job = _row(r)
+        c.execute(
+            "UPDATE jobs SET status='running', attempts=attempts+1, claimed_at=?, worker=?, dedupe_key=NULL WHERE id=?",
+            (now, worker, job["id"]),
+        )
+        c.execute("COMMIT")
+    finally:
+        c.close()
+    job.update(status="running", attempts=job["attempts"] + 1, claimed_at=now, worker=worker)
     return job
 
+def heartbeat(job_id: str, worker: str) -> bool:
+    """실행 중 lease 연장. False면 lease를 잃음(다른 worker가 가져감)."""
+    c = _conn()
+    try:
+        cur = c.execute(
+            "UPDATE jobs SET claimed_at=? WHERE id=? AND worker=? AND status='running'", (time.time(), job_id, worker)
+        )
+        return cur.rowcount == 1
+    finally:
+        c.close()
+
+def ack(job_id: str, result: dict | None = None, worker: str | None = None) -> bool:
+    """완료 기록. `worker`를 주면 현재 owner일 때만(lease를 넘겨받은 worker의 결과를 덮어쓰지 않음)."""
+    c = _conn()
+    try:
+        cur = c.execute(
+            "UPDATE jobs SET status='done', finished_at=?, error=NULL, result=? WHERE id=? AND status='running'"
+            + (" AND worker=?" if worker else ""),
+            (time.time(), json.dumps(result or {}, ensure_ascii=False), job_id, *([worker] if worker else [])),
+        )
+        return cur.rowcount == 1
+    finally:
+        c.close()
+
+def fail(job_id: str, error: str, worker: str | None = None) -> str:
+    """재시도 가능하면 backoff 후 다시 queued(coalescing key 복원), 아니면 failed. 바뀐 status를 반환.
+
+    - 같은 대상의 queued job이 이미 있으면 그 job에 합치고 이 job은 failed("coalesced")
+    - `worker`를 주면 현재 owner일 때만(아니면 "lost")
+    """
+    now = time.time()
+    c = _conn()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        r = c.execute(
+            "SELECT attempts, max_attempts, kind, path, payload FROM jobs WHERE id=? AND status='running'"
+            + (" AND worker=?" if worker else ""),
+            (job_id, *([worker] if worker else [])),
+        ).fetchone()
+        if not r:
+            c.execute("COMMIT")
+            return "lost" if worker and get_job(job_id) else "missing"
+        attempts, max_attempts, kind, path, payload = r
+        if attempts < max_attempts:
+            payload = json.loads(payload or "{}")
+            key = _dedupe_key(kind, path, payload)
+            keys = [key] + ([_dedupe_key("full", None, payload)] if kind == "file" else [])
+            other = None
+            for k in keys:
+                other = c.execute("SELECT id FROM jobs WHERE dedupe_key=? AND status='queued'", (k,)).fetchone()
+                if other:
+                    break
+            if other:
+                c.execute(
+                    "UPDATE jobs SET status='failed', finished_at=?, error=? WHERE id=?",
+                    (now, f"{error[:400]} (retry coalesced into {other[0]})", job_id),
+                )
+                c.execute("COMMIT")
+                return "coalesced"
+            delay = settings.INDEX_JOB_RETRY_BASE_SEC * (2 ** (attempts - 1))
+            c.execute(
+                "UPDATE jobs SET status='queued', available_at=?, error=?, dedupe_key=? WHERE id=?",
+                (now + delay, error[:500], key, job_id),
+            )
+            c.execute("COMMIT")
+            return "queued"
+        c.execute("UPDATE jobs SET status='failed', finished_at=?, error=? WHERE id=?", (now, error[:500], job_id))
+        c.execute("COMMIT")
+        return "failed"
+    finally:
+        c.close()
+
+def get_job(job_id: str) -> dict | None:
+    c = _conn()
+    try:
+        r = c.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id=?", (job_id,)).fetchone()
+    finally:
+        c.close()
+    return _row(r) if r else None
+
+def list_jobs(status: str | None = None, limit: int = 50) -> list[dict]:
+    c = _conn()
+    try:
+        if status:
+            rows = c.execute(f"SELECT {_COLUMNS} FROM jobs WHERE status=? ORDER BY created_at DESC LIMIT ?", (status, limit)).fetchall()
+        else:
+            rows = c.execute(f"SELECT {_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        c.close()
+    return [_row(r) for r in rows]
+
+def stats(window: int = 200) -> dict:
+    """큐 깊이(status별) + 최근 완료 job의 대기/실행/총 지연(초)."""
+    now = time.time()
+    c = _conn()
+    try:
+        depth = dict(c.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = c.execute("SELECT MIN(created_at) FROM jobs WHERE status='queued'").fetchone()[0]
+        rows = c.execute(
+            "SELECT created_at, claimed_at, finished_at FROM jobs WHERE status='done' ORDER BY finished_at DESC LIMIT ?",
+            (window,),
+        ).fetchall()
+    finally:
+        c.close()
+
+    def _agg(vals: List[float]) -> dict:
+        if not vals:
+            return {"count": 0, "avg": None, "max": None}
+        return {"count": len(vals), "avg": round(sum(vals) / len(vals), 3), "max": round(max(vals), 3)}
+
+    return {
+        "depth": {s: depth.get(s, 0) for s in ("queued", "running", "done", "failed")},
+        "oldest_queued_age_sec": round(now - oldest, 3) if oldest else None,
+        "latency_sec": {
+            "wait": _agg([cl - cr for cr, cl, _ in rows if cl]),
+            "run": _agg([f - cl for _, cl, f in rows if cl and f]),
+            "total": _agg([f - cr for cr, _, f in rows if f]),
+        },
+    }
+
+# --- legacy helpers (v10 API / catalog worker) ---
+
+def enqueue(job: dict) -> dict:
+    """v10 호환: {"mode": "full"} 또는 {"mode": "file", "path": ...}."""
+    mode = job.get("mode", "full")
+    if mode == "file" and job.get("path"):
+        return enqueue_job("file", path=job["path"], payload=job)
+    return enqueue_job("full", payload=job)
+
 def read_jobs(max_jobs: int = 50) -> list[dict]:
-    if not os.path.exists(QUEUE_PATH):
-        return []
-    jobs = []
-    with open(QUEUE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                jobs.append(json.loads(line))
-            except Exception:
-                continue
-    return jobs[:max_jobs]
+    return list(reversed(list_jobs("queued", max_jobs)))
 
 def clear_queue():
-    if os.path.exists(QUEUE_PATH):
-        os.remove(QUEUE_PATH)
+    """완료/실패 job 기록 정리(대기 중인 job은 유지)."""
+    c = _conn()
+    try:
+        c.execute("DELETE FROM jobs WHERE status IN ('done','failed')")
+    finally:
+        c.close()
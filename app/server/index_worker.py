@@ -0,0 +1,128 @@
+"""Indexing worker: SQLite 큐(`index_queue`)의 job을 claim → 증분 인덱싱 → ack/fail.
+
+- API 프로세스 안에서 thread로 기동(`INDEX_WORKER_IN_PROCESS=true`) 또는 단독 실행:
+    python -m app.server.index_worker
+- file job: 해당 파일만 `ingest_incremental(paths=[...])`
+- full job: docs 디렉토리 전체 증분 스캔
+- rebuild job: 새 컬렉션 버전에 전체 재구축 후 pointer 교체(blue/green, `rebuild_collection`)
+"""
+from __future__ import annotations
+import os, socket, threading, time
+
+from app.core import settings
+from app.core import metrics
+from app.core.rag_utils import ingest_incremental, rebuild_collection
+from app.server import index_queue
+
+DEFAULT_COLLECTION = "catalog_docs"
+
+
+def process_job(job: dict) -> dict:
+    payload = job.get("payload") or {}
+    collection = payload.get("collection") or DEFAULT_COLLECTION
+    if job.get("kind") == "rebuild":
+        return rebuild_collection(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection,
+                                  embed_model=payload.get("embed_model"), reason=payload.get("reason") or "ops")
+    paths = [job["path"]] if job.get("kind") == "file" and job.get("path") else None
+    return ingest_incremental(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection, paths=paths)
+
+
+class IndexWorker:
+    def __init__(self, worker_id: str | None = None, poll_sec: float | None = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_sec = poll_sec if poll_sec is not None else settings.INDEX_WORKER_POLL_SEC
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> dict | None:
+        """job 1개 처리. 큐가 비어 있으면 None."""
+        job = index_queue.claim(self.worker_id)
+        if job is None:
+            return None
+        t0 = time.perf_counter()
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job["id"], done), name="index-worker-heartbeat", daemon=True)
+        beat.start()
+        try:
+            report = process_job(job)
+        except Exception as e:
+            status = index_queue.fail(job["id"], f"{type(e).__name__}: {e}", worker=self.worker_id)
+            metrics.inc(f"index_worker.{'retried' if status == 'queued' else status if status in ('coalesced', 'lost') else 'failed'}")
+            return {**job, "status": status}
+        finally:
+            done.set()
+            beat.join()
+        if not index_queue.ack(job["id"], report, worker=self.worker_id):
+            metrics.inc("index_worker.lost")    # lease를 다른 worker가 가져감 → 그쪽 결과를 덮어쓰지 않음
+            return {**job, "status": "lost", "result": report}
+        metrics.inc("index_worker.done")
+        metrics.observe("index_worker.job_ms", (time.perf_counter() - t0) * 1000)
+        return {**job, "status": "done", "result": report}
+
+    def _heartbeat(self, job_id: str, done: threading.Event) -> None:
+        """긴 job(full/rebuild) 실행 중 lease의 1/3마다 claimed_at 연장."""
+        while not done.wait(max(settings.INDEX_JOB_LEASE_SEC / 3, 1.0)):
+            if not index_queue.heartbeat(job_id, self.worker_id):
+                metrics.inc("index_worker.lease_lost")
+                return
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once() is not None:
+                    continue
+            except Exception:
+                metrics.inc("index_worker.loop_errors")
+            self._stop.wait(self.poll_sec)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="index-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+_WORKER: dict = {"instance": None}
+
+
+def start_worker() -> IndexWorker:
+    w = _WORKER["instance"]
+    if w is None:
+        w = _WORKER["instance"] = IndexWorker()
+    w.start()
+    return w
+
+
+def stop_worker() -> None:
+    w = _WORKER["instance"]
+    if w is not None:
+        w.stop()
+
+
+def worker_status() -> dict:
+    w = _WORKER["instance"]
+    return {
+        "in_process": settings.INDEX_WORKER_IN_PROCESS,
+        "running": bool(w and w.running),
+        "worker_id": w.worker_id if w else None,
+    }
+
+
+if __name__ == "__main__":
+    w = IndexWorker()
+    print(f"index worker {w.worker_id} polling {settings.INDEX_QUEUE_DB}")
+    try:
+        w.run_forever()
+    except KeyboardInterrupt:
+        pass
@@ -2,6 +2,7 @@ from __future__ import annotations
 import os
 import json
 import datetime
+from contextlib import asynccontextmanager
 from fastapi import Request
 from starlette.responses import RedirectResponse
 from fastapi import FastAPI, HTTPException
@@ -10,14 +11,14 @@ from fastapi.staticfiles import StaticFiles
 from app.server.docs_api import router as docs_router
 from app.server.self_query_api import router as rag_router
 from app.server.proposal_api import router as artbiz_router
+from app.server.ops_api import router as ops_router
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.server.models import ChatRequest, ChatResponse, ApproveRequest, ApproveResponse
 from fastapi import UploadFile, File
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from app.server.metadata_extractor import build_sidecar_meta
-from app.server.self_query_parser import parse_self_query
-from app.server.index_queue import enqueue, read_jobs
+from app.server.self_query_parser import parse_self_query, aparse_self_query, parsed_where
 from app.server.proposal_store import save_markdown, list_versions, mark_approved
 from app.server.pdf_renderer import render_markdown_to_pdf
 from app.server.proposal_template import template_markdown_skeleton
@@ -32,8 +33,16 @@ from app.server.proposal_footnotes import apply_footnotes
 
 
 
-from app.server.agent import run, answer_rag, answer_chat, answer_plan
+from app.server.agent import run, answer_rag, answer_chat, answer_plan, astream_events
+from app.server.agent import arun, aanswer_rag, aanswer_chat, aanswer_plan
 from app.server.store import get_action, update_status
+from app.core import http_pools, retrieval, metrics, settings
+from app.core.llm_factory import start_provider_prober, stop_provider_prober, provider_status
+from app.server import index_queue
+from app.server.index_worker import DEFAULT_COLLECTION, start_worker, stop_worker
+from app.core.doc_loader import shutdown_pool as shutdown_loader_pool
+from app.core.embedding_executor import shutdown_pools as shutdown_embed_pools
+from app.core.parse_cache import parse_cache
 
 from app.tools.schemas import (
     BudgetSplitRequest, BudgetSplitResponse,
@@ -73,7 +82,25 @@ def _upsert_doc(meta: dict):
     return idx
 
 
-app = FastAPI(title="ArtBiz LangChain E2E", version="0.6.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # provider probe는 백그라운드에서만, embeddings/vector store는 기동 시 1회 생성해 요청 간 공유
+    start_provider_prober()
+    retrieval.startup()
+    # docs_dir에 직접 넣은 파일도 반영되도록 기동 시 full 스캔 job 1개(대기 중이면 합쳐짐)
+    index_queue.enqueue_job("full", payload={"collection": DEFAULT_COLLECTION, "source": "startup"})
+    if settings.INDEX_WORKER_IN_PROCESS:
+        start_worker()
+    yield
+    stop_worker()
+    await http_pools.aclose_ollama()
+    shutdown_loader_pool()
+    shutdown_embed_pools()
+    retrieval.shutdown()
+    stop_provider_prober()
+
+
+app = FastAPI(title="ArtBiz LangChain E2E", version="0.6.0", lifespan=lifespan)
 
 
 
@@ -89,6 +116,7 @@ app.add_middleware(
 app.include_router(docs_router)
 app.include_router(rag_router)
 app.include_router(artbiz_router)
+app.include_router(ops_router)
 
 
 @app.post("/tools/budget-split", response_model=BudgetSplitResponse)
@@ -157,37 +185,28 @@ def docs_list():
 
 
 @app.post("/rag/self-query")
-def rag_self_query(payload: dict):
-    # expected: { "q": "...", "top_k": 4 }
+async def rag_self_query(payload: dict):
+    # expected: { "q": "...", "top_k": 4, "search_type": "vector|lexical|hybrid" }
     q = payload.get("q","")
     if not q:
         raise HTTPException(400, "q is required")
     top_k = int(payload.get("top_k") or 4)
 
-    parsed = parse_self_query(q)
+    parsed = await aparse_self_query(q)
 
-    # use parsed filters
-    from app.core import settings
-    from app.core.rag_utils import ingest_dir, vectorstore
-    _ = ingest_dir(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
-    vs = vectorstore(settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
+    # use parsed filters (인덱스 동기화는 index worker 담당 → 요청 경로에서 ingest하지 않음)
+    # chroma where filter (조건이 2개 이상이면 $and)
+    where_filter = parsed_where(parsed)
 
-    # chroma where filter
-    where = {}
-    if parsed.doc_type:
-        where["type"] = parsed.doc_type
-    if parsed.year:
-        where["year"] = parsed.year
-    if parsed.org:
-        where["org"] = parsed.org
-
-    docs = vs.similarity_search(parsed.rewritten_query, k=top_k, filter=where or None)
+    docs = await retrieval.asearch(
+        parsed.rewritten_query, k=top_k, search_type=payload.get("search_type"), where=where_filter, collection="catalog_docs"
+    )
     used = [{"meta": d.metadata, "preview": d.page_content[:220]} for d in docs]
 
     return {
         "q": q,
         "parsed": parsed.model_dump(),
-        "where_filter": where,
+        "where_filter": where_filter,
         "docs": used,
     }
 
@@ -211,15 +230,48 @@ def artbiz_proposal_check(payload: dict):
 
 @app.get("/health")
 def health():
-    return {"ok": True}
+    cache = parse_cache()
+    return {
+        "ok": True, "provider": provider_status(), "retrieval": retrieval.get_context().health(),
+        "parse_cache": cache.stats() if cache is not None else None,
+    }
+
+@app.get("/metrics")
+def metrics_snapshot():
+    return {"provider": provider_status(), **metrics.snapshot()}
 
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    out = run(req.q, mode=req.mode, top_k=req.top_k, auto_approve=req.auto_approve)
+async def chat(req: ChatRequest):
+    out = await arun(req.q, mode=req.mode, top_k=req.top_k, auto_approve=req.auto_approve, search_type=req.search_type)
     return ChatResponse(**out)
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """SSE: route → used_docs → token(delta)* → done. 연결이 끊기면 생성 중단."""
+    async def gen():
+        events = astream_events(req.q, mode=req.mode, top_k=req.top_k, auto_approve=req.auto_approve, search_type=req.search_type)
+        try:
+            async for event, data in events:
+                if await request.is_disconnected():
+                    break
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": f"{type(e).__name__}: {str(e)[:180]}"})
+        finally:
+            # LLM astream까지 닫아 backend 생성 취소
+            await events.aclose()
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/approve", response_model=ApproveResponse)
-def approve(req: ApproveRequest):
+async def approve(req: ApproveRequest):
     action = get_action(req.action_id)
     if not action:
         raise HTTPException(404, "action not found")
@@ -235,11 +287,11 @@ def approve(req: ApproveRequest):
         mode = payload.get("suggested_mode","rag")
         q = payload.get("q","")
         if mode == "chat":
-            ans, used = answer_chat(q)
+            ans, used = await aanswer_chat(q)
         elif mode == "plan":
-            ans, used = answer_plan(q)
+            ans, used = await aanswer_plan(q)
         else:
-            ans, used = answer_rag(q)
+            ans, used = await aanswer_rag(q)
 
         update_status(req.action_id, "done")
         return ApproveResponse(ok=True, message="approved and executed", action={"id": req.action_id, "status":"done", "answer": ans, "used_docs": used})
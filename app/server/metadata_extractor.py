@@ -2,6 +2,15 @@ from __future__ import annotations
 import os, re, json
 from typing import Any, Dict, Tuple
 
+# 문서/질의 공용 사전 (self_query_parser의 규칙 파서도 사용) — 앞에 있는 유형이 우선
+DOC_TYPE_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("policy", ("규정", "policy", "개인정보", "privacy")),
+    ("pr", ("보도", "press", "pr", "media")),
+    ("proposal", ("후원", "sponsor", "제안서", "proposal")),
+)
+YEAR_RE = re.compile(r"(20\d{2})")
+ORG_SUFFIXES = ("재단", "극장", "미술관", "박물관", "문화재단", "페스티벌", "축제")
+
 def _read_text_head(path: str, max_chars: int = 4000) -> str:
     ext = os.path.splitext(path)[1].lower()
     try:
@@ -10,11 +19,9 @@ def _read_text_head(path: str, max_chars: int = 4000) -> str:
                 return f.read(max_chars)
         if ext == ".pdf":
             try:
-                from pypdf import PdfReader
-                r = PdfReader(path)
-                parts = []
-                for i, page in enumerate(r.pages[:2]):
-                    parts.append(page.extract_text() or "")
+                # parse cache 경유: 여기서 파싱한 결과(전체 페이지)를 이후 ingest 로딩이 그대로 재사용
+                from app.core.doc_loader import load_file
+                parts = [d.page_content or "" for d in load_file(path, max_pages=2)]
                 return "\n".join(parts)[:max_chars]
             except Exception:
                 return ""
@@ -27,18 +34,11 @@ def infer_metadata_from_text(filename: str, text: str) -> Dict[str, Any]:
     fn = filename.lower()
 
     # type inference
-    if any(k in lower for k in ["규정", "policy", "개인정보", "privacy"]):
-        doc_type = "policy"
-    elif any(k in lower for k in ["보도", "press", "pr", "media"]):
-        doc_type = "pr"
-    elif any(k in lower for k in ["후원", "sponsor", "제안서", "proposal"]):
-        doc_type = "proposal"
-    else:
-        doc_type = "general"
+    doc_type = next((t for t, kws in DOC_TYPE_KEYWORDS if any(k in lower for k in kws)), "general")
 
     # year inference
     year = None
-    m = re.search(r"(20\d{2})", text or "")
+    m = YEAR_RE.search(text or "")
     if m:
         try:
             y = int(m.group(1))
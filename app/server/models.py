@@ -7,6 +7,7 @@ class ChatRequest(BaseModel):
     mode: Literal["chat","rag","plan"] = "rag"
     top_k: int | None = None
     auto_approve: bool | None = None
+    search_type: Literal["vector","lexical","hybrid"] | None = None   # None → RAG_SEARCH_TYPE
 
 class ChatResponse(BaseModel):
     answer: str
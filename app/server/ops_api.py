@@ -0,0 +1,86 @@
+from __future__ import annotations
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.core import collection_versions, settings
+from app.core.rag_utils import activate_collection_version, gc_collection_versions, vectorstore
+from app.core.vector_backends import vector_count
+from app.server import index_queue
+from app.server.index_worker import DEFAULT_COLLECTION, worker_status
+
+router = APIRouter(prefix="/ops", tags=["ops"])
+
+class ReindexRequest(BaseModel):
+    mode: str = "full"          # full | incremental(=full, 항상 증분) | file
+    path: str | None = None     # mode=file 일 때 docs 기준 상대경로(또는 절대경로)
+    collection: str | None = None
+
+@router.post("/queue-reindex")
+def queue_reindex(req: ReindexRequest):
+    if req.mode not in ("full", "incremental", "file"):
+        raise HTTPException(400, "mode must be full|incremental|file")
+    if req.mode == "file" and not req.path:
+        raise HTTPException(400, "path is required for mode=file")
+    payload = {"collection": req.collection} if req.collection else {}
+    if req.mode == "file":
+        job = index_queue.enqueue_job("file", path=req.path, payload=payload)
+    else:
+        job = index_queue.enqueue_job("full", payload=payload)
+    return {"ok": True, "job_id": job["id"], "coalesced": job["coalesced"], "status": job["status"]}
+
+class RebuildRequest(BaseModel):
+    collection: str | None = None
+    embed_model: str | None = None   # 다른 임베딩 모델로 새 버전 생성
+    reason: str | None = None
+
+class ActivateRequest(BaseModel):
+    version: int
+
+@router.post("/rebuild")
+def queue_rebuild(req: RebuildRequest):
+    """새 컬렉션 버전에 전체 재구축 → 끝나면 pointer 교체(그동안 읽기는 기존 버전)."""
+    payload = {"collection": req.collection or DEFAULT_COLLECTION}
+    if req.embed_model:
+        payload["embed_model"] = req.embed_model
+    if req.reason:
+        payload["reason"] = req.reason
+    job = index_queue.enqueue_job("rebuild", payload=payload)
+    return {"ok": True, "job_id": job["id"], "coalesced": job["coalesced"], "status": job["status"]}
+
+@router.get("/collections/{collection}")
+def collection_status(collection: str):
+    data = collection_versions.status(settings.CHROMA_PERSIST_DIR, collection)
+    try:
+        data["active_count"] = vector_count(vectorstore(settings.CHROMA_PERSIST_DIR, collection))
+    except Exception as e:
+        data["active_count_error"] = f"{type(e).__name__}: {str(e)[:120]}"
+    return data
+
+@router.post("/collections/{collection}/activate")
+def activate_version(collection: str, req: ActivateRequest):
+    """보관 중인 버전으로 되돌리기(롤백) — pointer만 교체, 이후 변경분은 full job으로 따라잡기."""
+    v = collection_versions.status(settings.CHROMA_PERSIST_DIR, collection)["versions"].get(str(req.version))
+    if v is None or v["status"] not in ("retired", "active"):
+        raise HTTPException(409, f"version {req.version} is not available for activation")
+    data = activate_collection_version(settings.CHROMA_PERSIST_DIR, collection, req.version, reason="ops activate")
+    job = index_queue.enqueue_job("full", payload={"collection": collection})
+    return {"ok": True, "active": data["active"], "name": data["versions"][str(data["active"])]["name"], "job_id": job["id"]}
+
+@router.post("/collections/{collection}/gc")
+def gc_versions(collection: str):
+    return {"ok": True, "dropped": gc_collection_versions(settings.CHROMA_PERSIST_DIR, collection)}
+
+@router.get("/queue")
+def queue_status(limit: int = 20):
+    return {
+        "worker": worker_status(),
+        "stats": index_queue.stats(),
+        "recent": index_queue.list_jobs(limit=limit),
+    }
+
+@router.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = index_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "job not found")
+    return job
@@ -6,8 +6,9 @@ from typing import Literal
 from langchain_core.prompts import ChatPromptTemplate
 
 from app.core import settings
-from app.core.llm_factory import build_chat_model
-from app.core.rag_utils import ingest_dir_meta, vectorstore
+from app.core.context_packer import pack_context
+from app.core.llm_factory import build_chat_model, chat_model_name, llm_slot
+from app.core.rag_utils import vectorstore
 
 router = APIRouter(prefix="/artbiz", tags=["artbiz"])
 
@@ -34,15 +35,13 @@ class ProposalResponse(BaseModel):
     used_docs: list[dict]
 
 @router.post("/proposal", response_model=ProposalResponse)
-def proposal(req: ProposalRequest):
-    # ensure index
-    ingest_dir_meta(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
+async def proposal(req: ProposalRequest):
     vs = vectorstore(settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
 
     # retrieve supporting docs
     q = f"{req.org_type} 후원 패키지 혜택 KPI 개인정보 보도자료 유의사항"
     try:
-        docs = vs.similarity_search(q, k=4)
+        docs = await vs.asimilarity_search(q, k=4)
     except Exception as e:
         # Common: embedding model missing in Ollama (e.g., nomic-embed-text)
         # or vector DB not ready. We degrade gracefully and continue with empty context.
@@ -50,7 +49,8 @@ def proposal(req: ProposalRequest):
         # keep a short hint for the response
         _retrieval_error = str(e)
 
-    context = "\n\n".join([f"SOURCE {i+1}: {d.page_content}" for i, d in enumerate(docs[:2])])
+    packed = pack_context(docs, model=chat_model_name())
+    context = packed.text
 
     if not docs:
         context = context or ""
@@ -84,20 +84,21 @@ def proposal(req: ProposalRequest):
     ])
 
     try:
-      resp = (prompt | llm).invoke({
-        "sponsor": req.sponsor_name,
-        "campaign": req.campaign_title,
-        "org_type": req.org_type,
-        "budget": f"{req.budget_target_krw}",
-        "constraints": ", ".join(req.constraints) if req.constraints else "없음",
-        "context": context,
-        "risks": "\\n".join([f"- {r}" for r in risks]),
-        "weeks": str(req.weeks),
-      })
+      async with llm_slot():
+        resp = await (prompt | llm).ainvoke({
+          "sponsor": req.sponsor_name,
+          "campaign": req.campaign_title,
+          "org_type": req.org_type,
+          "budget": f"{req.budget_target_krw}",
+          "constraints": ", ".join(req.constraints) if req.constraints else "없음",
+          "context": context,
+          "risks": "\\n".join([f"- {r}" for r in risks]),
+          "weeks": str(req.weeks),
+        })
     except Exception as e:
         # Ollama can time out on long generations; surface a clear message to the client.
         from fastapi import HTTPException
         raise HTTPException(status_code=504, detail=f"LLM timeout/error: {type(e).__name__}: {str(e)[:180]}")
 
-    used = [{"meta": d.metadata, "preview": d.page_content[:200]} for d in docs[:3]]
+    used = packed.used_docs()
     return ProposalResponse(proposal_markdown=getattr(resp,"content",str(resp)), risks=risks, used_docs=used)
\ No newline at end of file
@@ -1,15 +1,13 @@
 from __future__ import annotations
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
-from typing import Any
-
-from langchain_classic.chains.query_constructor.schema import AttributeInfo
-from langchain_classic.retrievers.self_query.base import SelfQueryRetriever
-
+from typing import Any, Literal
 
 from app.core import settings
-from app.core.llm_factory import build_chat_model, build_embeddings
-from app.core.rag_utils import ingest_dir_meta, vectorstore
+from app.core.context_packer import pack_context
+from app.core.llm_factory import build_chat_model, chat_model_name, llm_slot
+from app.core import retrieval
+from app.server.self_query_parser import aparse_self_query, parsed_where
 from app.utils.console import header  # unused but kept for parity
 
 router = APIRouter(prefix="/rag", tags=["rag"])
@@ -17,6 +15,7 @@ router = APIRouter(prefix="/rag", tags=["rag"])
 class SelfQueryRequest(BaseModel):
     q: str = Field(min_length=1)
     k: int = 4
+    search_type: Literal["vector", "lexical", "hybrid"] | None = None   # None → RAG_SEARCH_TYPE
 
 class SelfQueryResponse(BaseModel):
     answer: str
@@ -24,35 +23,25 @@ class SelfQueryResponse(BaseModel):
     parsed_query: dict | None = None
 
 @router.post("/self-query", response_model=SelfQueryResponse)
-def self_query(req: SelfQueryRequest):
-    # ensure index has metadata
-    ingest_dir_meta(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
-    vs = vectorstore(settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
-
-    llm = build_chat_model(temperature=0)
-
-    metadata_field_info = [
-        AttributeInfo(name="type", description="문서 유형: policy|pr|proposal|general", type="string"),
-        AttributeInfo(name="year", description="문서 연도(예: 2026)", type="integer"),
-        AttributeInfo(name="org", description="기관 식별자", type="string"),
-    ]
-
-    retriever = SelfQueryRetriever.from_llm(
-        llm=llm,
-        vectorstore=vs,
-        document_contents="예술경영 관련 내부 문서/가이드/제안서",
-        metadata_field_info=metadata_field_info,
-        search_kwargs={"k": req.k},
-        verbose=True,
-    )
-
-    docs = retriever.get_relevant_documents(req.q)
-    context = "\n\n".join([f"SOURCE {i+1}: {d.page_content}" for i, d in enumerate(docs[:2])])
+async def self_query(req: SelfQueryRequest):
+    # query 구성: 규칙 파서(confidence 충분) 또는 LLM 파서 → (검색어, Chroma where) → vector/lexical/hybrid 검색
+    pq = await aparse_self_query(req.q)
+    new_query = pq.rewritten_query if (pq.rewritten_query or "").strip() else req.q
+    where = parsed_where(pq)
+    k = req.k
+    docs = await retrieval.asearch(new_query, k=k, search_type=req.search_type, where=where, collection="catalog_docs")
+    packed = pack_context(docs, model=chat_model_name())
 
     prompt = build_chat_model(temperature=0)  # reuse model
-    resp = prompt.invoke([
-        {"role":"system","content":"너는 CONTEXT 기반으로만 답한다. 마지막에 근거 섹션에 SOURCE 1~2를 인용하라."},
-        {"role":"user","content": f"CONTEXT:\n{context}\n\nQ:\n{req.q}"},
-    ])
-    used = [{"meta": d.metadata, "preview": d.page_content[:200]} for d in docs[:3]]
-    return SelfQueryResponse(answer=getattr(resp,"content",str(resp)), used_docs=used, parsed_query=None)
+    async with llm_slot():
+        resp = await prompt.ainvoke([
+            {"role":"system","content":"너는 CONTEXT 기반으로만 답한다. 마지막에 근거 섹션에 사용한 SOURCE 번호를 인용하라."},
+            {"role":"user","content": f"CONTEXT:\n{packed.text}\n\nQ:\n{req.q}"},
+        ])
+    used = packed.used_docs()
+    parsed = {
+        "query": new_query, "filter": where, "k": k, "search_type": req.search_type or settings.RAG_SEARCH_TYPE,
+        "parser": pq.source, "confidence": pq.confidence, "rationale": pq.rationale,
+        "context": packed.stats(),
+    }
+    return SelfQueryResponse(answer=getattr(resp,"content",str(resp)), used_docs=used, parsed_query=parsed)
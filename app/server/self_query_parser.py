@@ -1,27 +1,246 @@
+"""Self-query 파서: 질문 → (검색어, doc_type / year / org 필터).
+
+- 1차: 규칙 파서(`parse_rules`) — 연도 정규식/상대 연도, 문서 유형 사전(`metadata_extractor`와 공용),
+  기관명(코퍼스 sidecar 메타데이터의 org 값) → `confidence` 계산
+  - 접미사 정규식으로만 찾은(코퍼스에 없는) 기관명은 필터로 쓰지 않고 감점 → LLM fallback
+- 2차: confidence < `SELF_QUERY_RULE_MIN_CONFIDENCE`일 때만 structured-output LLM 호출
+- 결과는 정규화된 질의 기준 LRU 캐시(`SELF_QUERY_CACHE_SIZE`)
+- metrics: `self_query.parse.{total,cache_hit,rules,llm,llm_error}`, gauge `self_query.parse.llm_skip_ratio`
+"""
 from __future__ import annotations
-from typing import Literal, Optional
+import os, re, threading, unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
 from pydantic import BaseModel, Field
+from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
-from app.core.llm_factory import build_chat_model
+from app.core import metrics, settings
+from app.core.ko_tokenizer import normalize
+from app.core.llm_factory import build_chat_model, llm_slot
+from app.core.rag_utils import META_DIRNAME, META_INDEX, load_meta_index
+from app.server.metadata_extractor import DOC_TYPE_KEYWORDS, ORG_SUFFIXES
 
-class ParsedQuery(BaseModel):
+class QueryFilters(BaseModel):
     rewritten_query: str = Field(description="필터를 제거하고 검색에 적합하게 재작성된 질의")
     doc_type: Optional[Literal["policy","pr","proposal","general"]] = None
     year: Optional[int] = None
     org: Optional[str] = None
     rationale: str = ""
 
+class ParsedQuery(QueryFilters):
+    confidence: float = 1.0                      # 규칙 파서 신뢰도(0~1), LLM 결과는 1.0
+    source: Literal["rules", "llm"] = "llm"
+
+_PARSER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "너는 검색 질의 파서다. 사용자의 질문에서 메타데이터 필터를 추출한다.\n"
+     "- doc_type은 policy|pr|proposal|general 중 하나 또는 null\n"
+     "- year는 4자리 연도 또는 null\n"
+     "- org는 기관명 문자열 또는 null\n"
+     "- rewritten_query는 필터 조건을 제거하고 '내용 검색'에 적합하게 재작성\n"
+     "반드시 스키마로만 답하라."),
+    ("human","{q}")
+])
+
+def _parser_chain():
+    llm = build_chat_model(temperature=0)
+    try:
+        return _PARSER_PROMPT | llm.with_structured_output(QueryFilters)
+    except NotImplementedError:
+        # tool calling 미지원 모델(ChatOllama 등) → JSON 출력 + PydanticOutputParser
+        parser = PydanticOutputParser(pydantic_object=QueryFilters)
+        prompt = _PARSER_PROMPT + ChatPromptTemplate.from_messages([("system", "{format_instructions}")])
+        return prompt.partial(format_instructions=parser.get_format_instructions()) | llm | parser
+
+# --- rule-based parser ---
+
+_YEAR_RE = re.compile(r"(?<!\d)(20\d{2})(?!\d)\s*(?:년도|년)?(?:의|에|에서|에는)?")
+_REL_YEARS = (("재작년", -2), ("작년", -1), ("지난해", -1), ("전년", -1), ("올해", 0), ("금년", 0), ("내년", 1))
+_REL_YEAR_RE = re.compile("(" + "|".join(w for w, _ in _REL_YEARS) + r")(?:도)?(?:의|에|에서|에는)?")
+_RANGE_RE = re.compile(r"이후|이전|부터|까지|사이|최근|since|before|after|between")
+_NEGATION_RE = re.compile(r"제외|말고|빼고|아닌|except|without|\bnot\b")
+_ORG_CUE_RE = re.compile(r"기관|단체|협회|센터|회사|organization|\borg\b")
+_PARTICLE = r"(?:의|에서|에|이|가|은|는)?"
+_ORG_RE = re.compile(r"([가-힣A-Za-z0-9\-]{2,30}(?:" + "|".join(ORG_SUFFIXES) + r"))" + _PARTICLE)
+_SPACES_RE = re.compile(r"\s+")
+_EDGE_PUNCT_RE = re.compile(r"^[\s,.;:·\-]+|[\s,.;:·\-]+$")
+
+def _keyword_re(word: str) -> re.Pattern:
+    # 영문 키워드는 단어 경계("pr" ≠ "proposal"), 한글은 부분 일치(조사 허용)
+    return re.compile(rf"(?<![a-z]){re.escape(word)}(?![a-z])" if word.isascii() else re.escape(word))
+
+_TYPE_PATTERNS: Tuple[Tuple[str, Tuple[re.Pattern, ...]], ...] = tuple(
+    (t, tuple(_keyword_re(k) for k in kws)) for t, kws in DOC_TYPE_KEYWORDS
+)
+
+_known_orgs_lock = threading.Lock()
+_known_orgs: Tuple[Optional[int], List[str]] = (None, [])
+
+def _known_orgs_list() -> List[str]:
+    """코퍼스 sidecar 메타데이터의 org 값(긴 이름 우선). index.json이 바뀔 때만 다시 읽음."""
+    global _known_orgs
+    try:
+        stamp = os.stat(os.path.join(settings.DOCS_DIR, META_DIRNAME, META_INDEX)).st_mtime_ns
+    except OSError:
+        return []
+    with _known_orgs_lock:
+        if _known_orgs[0] != stamp:
+            orgs = {str(m.get("org")) for m in load_meta_index(settings.DOCS_DIR).values() if isinstance(m, dict) and m.get("org")}
+            _known_orgs = (stamp, sorted(orgs, key=len, reverse=True))
+        return _known_orgs[1]
+
+def parse_rules(q: str, now_year: Optional[int] = None) -> ParsedQuery:
+    """LLM 없이 필터 추출. 모호한 신호(여러 연도/유형, 기간·부정 표현, 인식 못한 기관 언급)마다 confidence 감점."""
+    now_year = now_year or datetime.now().year
+    text = normalize(q)
+    notes: List[str] = []
+    confidence = 1.0
+    rewritten = text
+
+    rel = dict(_REL_YEARS)
+    years = [int(m.group(1)) for m in _YEAR_RE.finditer(text)]
+    years += [now_year + rel[m.group(1)] for m in _REL_YEAR_RE.finditer(text)]
+    years = list(dict.fromkeys(years))
+    rewritten = _REL_YEAR_RE.sub(" ", _YEAR_RE.sub(" ", rewritten))
+    if len(years) > 1:
+        confidence -= 0.5
+        notes.append(f"여러 연도 {years}")
+    if years and _RANGE_RE.search(text):
+        confidence -= 0.4
+        notes.append("기간 표현(단일 year로 표현 불가)")
+
+    types = [t for t, pats in _TYPE_PATTERNS if any(p.search(text) for p in pats)]
+    if len(types) > 1:
+        confidence -= 0.4
+        notes.append(f"여러 유형 {types}")
+
+    org = next((o for o in _known_orgs_list() if normalize(o) in text), None)
+    if org:
+        rewritten = re.sub(re.escape(normalize(org)) + _PARTICLE, " ", rewritten)
+    elif (m := _ORG_RE.search(unicodedata.normalize("NFKC", q))):
+        # 코퍼스 org 목록에 없는 기관명 → exact-match 필터는 어떤 문서에도 안 맞으므로 걸지 않고
+        # 검색어에 남긴 채(원문 대소문자) LLM fallback으로
+        confidence -= 0.5
+        notes.append(f"알 수 없는 기관 '{m.group(1)}'(필터 미적용)")
+    elif _ORG_CUE_RE.search(text):
+        confidence -= 0.35
+        notes.append("기관 언급을 인식하지 못함")
+
+    if _NEGATION_RE.search(text):
+        confidence -= 0.5
+        notes.append("부정/제외 조건")
+
+    rewritten = _EDGE_PUNCT_RE.sub("", _SPACES_RE.sub(" ", rewritten)) or q.strip()
+    found = [f"year={years[0]}" if years else "", f"type={types[0]}" if types else "", f"org={org}" if org else ""]
+    rationale = "rules: " + (", ".join(x for x in found if x) or "필터 없음") + ("; " + "; ".join(notes) if notes else "")
+    return ParsedQuery(
+        rewritten_query=rewritten,
+        doc_type=types[0] if types else None,
+        year=years[0] if years else None,
+        org=org,
+        rationale=rationale,
+        confidence=round(max(confidence, 0.0), 2),
+        source="rules",
+    )
+
+# --- cache + LLM fallback ---
+
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[tuple, ParsedQuery]" = OrderedDict()
+
+def _cache_key(q: str) -> tuple:
+    # 상대 연도(올해/작년)가 있으므로 현재 연도를 key에 포함
+    return (_SPACES_RE.sub(" ", normalize(q)).strip(), datetime.now().year)
+
+def _cache_get(key: tuple) -> Optional[ParsedQuery]:
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+        return hit
+
+def _cache_put(key: tuple, parsed: ParsedQuery) -> None:
+    with _cache_lock:
+        _cache[key] = parsed
+        _cache.move_to_end(key)
+        while len(_cache) > settings.SELF_QUERY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+def _record(kind: str) -> None:
+    metrics.inc(f"self_query.parse.{kind}")
+    total = metrics.counter("self_query.parse.total")
+    if total:
+        metrics.set_gauge("self_query.parse.llm_skip_ratio", round(1 - metrics.counter("self_query.parse.llm") / total, 4))
+
+def _from_llm(out: QueryFilters) -> ParsedQuery:
+    return ParsedQuery(**out.model_dump(), confidence=1.0, source="llm")
+
+def _begin(q: str) -> Tuple[tuple, Optional[ParsedQuery], ParsedQuery]:
+    metrics.inc("self_query.parse.total")
+    key = _cache_key(q)
+    hit = _cache_get(key)
+    if hit is not None:
+        _record("cache_hit")
+        return key, hit.model_copy(), hit
+    return key, None, parse_rules(q)
+
+def _accept_rules(key: tuple, ruled: ParsedQuery) -> Optional[ParsedQuery]:
+    if ruled.confidence >= settings.SELF_QUERY_RULE_MIN_CONFIDENCE:
+        _record("rules")
+        _cache_put(key, ruled)
+        return ruled.model_copy()
+    return None
+
+def _llm_failed(ruled: ParsedQuery, e: Exception) -> ParsedQuery:
+    # LLM 장애 시 규칙 결과로 진행(캐시하지 않음 → 다음 요청에서 재시도)
+    metrics.inc("self_query.parse.llm_error")
+    ruled.rationale += f"; llm fallback 실패({type(e).__name__})"
+    return ruled
+
 def parse_self_query(q: str) -> ParsedQuery:
-    llm = build_chat_model(temperature=0).with_structured_output(ParsedQuery)
-    p = ChatPromptTemplate.from_messages([
-        ("system",
-         "너는 검색 질의 파서다. 사용자의 질문에서 메타데이터 필터를 추출한다.\n"
-         "- doc_type은 policy|pr|proposal|general 중 하나 또는 null\n"
-         "- year는 4자리 연도 또는 null\n"
-         "- org는 기관명 문자열 또는 null\n"
-         "- rewritten_query는 필터 조건을 제거하고 '내용 검색'에 적합하게 재작성\n"
-         "반드시 스키마로만 답하라."),
-        ("human","{q}")
-    ])
-    return (p | llm).invoke({"q": q})
+    key, hit, ruled = _begin(q)
+    if hit is not None:
+        return hit
+    fast = _accept_rules(key, ruled)
+    if fast is not None:
+        return fast
+    try:
+        parsed = _from_llm(_parser_chain().invoke({"q": q}))
+    except Exception as e:
+        return _llm_failed(ruled, e)
+    _record("llm")
+    _cache_put(key, parsed)
+    return parsed.model_copy()
+
+async def aparse_self_query(q: str) -> ParsedQuery:
+    key, hit, ruled = _begin(q)
+    if hit is not None:
+        return hit
+    fast = _accept_rules(key, ruled)
+    if fast is not None:
+        return fast
+    try:
+        async with llm_slot():
+            parsed = _from_llm(await _parser_chain().ainvoke({"q": q}))
+    except Exception as e:
+        return _llm_failed(ruled, e)
+    _record("llm")
+    _cache_put(key, parsed)
+    return parsed.model_copy()
+
+def parsed_where(parsed: ParsedQuery) -> Optional[dict]:
+    """ParsedQuery → Chroma where (조건 2개 이상이면 $and)."""
+    where = {}
+    if parsed.doc_type:
+        where["type"] = parsed.doc_type
+    if parsed.year:
+        where["year"] = parsed.year
+    if parsed.org:
+        where["org"] = parsed.org
+    return {"$and": [{k: v} for k, v in where.items()]} if len(where) > 1 else (where or None)
@@ -1,35 +1,34 @@
 """OPS 01 — Index worker (queue-driven)
 
 - /ops/queue-reindex 로 enqueue된 작업을 처리합니다.
-- 학습용: 단일 파일 큐(jsonl) 사용. 운영은 Redis/SQS 등으로 확장.
+- SQLite 큐(claim/ack/retry): 처리 중 새로 들어온 job도 유실되지 않음
+- file job은 해당 파일만 증분 인덱싱, 같은 대상의 대기 job은 하나로 합쳐짐
 
 실행:
   docker compose run --rm lab python catalog/ops/01_index_worker.py
+  (계속 polling: python -m app.server.index_worker)
 """
 from __future__ import annotations
-import os, json
 from rich import print
 from app.utils.console import header
-from app.server.index_queue import read_jobs, clear_queue
-from app.core import settings
-from app.core.rag_utils import ingest_dir
+from app.server import index_queue
+from app.server.index_worker import IndexWorker
 
 def main():
     header("OPS 01 — Index worker")
-    jobs = read_jobs(500)
-    if not jobs:
-        print("no jobs in queue")
-        return
+    print(index_queue.stats()["depth"])
 
-    print(f"jobs: {len(jobs)}")
-    for j in jobs:
-        mode = j.get("mode","full")
-        print({"mode": mode, "ts": j.get("ts")})
-        # 학습용: mode 상관없이 전체 재인덱싱(증분은 운영 확장 포인트)
-        ingest_dir(settings.DOCS_DIR, settings.CHROMA_PERSIST_DIR, collection="catalog_docs")
+    worker = IndexWorker(worker_id="catalog-ops-01")
+    n = 0
+    while True:
+        job = worker.run_once()
+        if job is None:
+            break
+        n += 1
+        print({"id": job["id"], "kind": job["kind"], "path": job.get("path"), "status": job["status"], "result": job.get("result")})
 
-    clear_queue()
-    print("done; queue cleared")
+    print(f"processed: {n}")
+    print(index_queue.stats())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+"""Perf 03 — Rank fusion: Python dict vs NumPy (`app/core/fusion.py`)
+
+- EnsembleRetriever 방식(문서마다 dict 조회/누적)과 벡터화된 fusion 엔진 비교
+- retriever 4개(vector, BM25, multi-query 변형 2개) x 후보 1,000개 = 4,000 후보
+- 앞 16자리가 같은 문자열 id가 합쳐지지 않는지 회귀 확인
+- RRF / weighted / z-score 모두 측정 (LLM/임베딩 호출 없음), 측정값은 5회 반복 중 최솟값(공유 호스트 noise 제거)
+- hybrid 검색(`retrieval._fuse`)이 실제로 쓰는 경로는 "str ids"(sha1 hex chunk id 문자열)
+  - 예: python dict ~1.4ms / str ids ~0.7ms / uint64 keys ~0.2ms
+
+실행:
+  docker compose run --rm lab python catalog/perf/03_rank_fusion.py
+"""
+import hashlib, time
+import numpy as np
+from rich import print
+from app.core.fusion import fuse, hex_keys
+from app.utils.console import header
+
+N_RETRIEVERS = 4
+N_CANDIDATES = 1000
+POOL = 5000
+REPEAT = 200
+ROUNDS = 5
+
+def _python_rrf(lists, weights, c=60):
+    scores = {}
+    for w, ids in zip(weights, lists):
+        for rank, cid in enumerate(ids, start=1):
+            scores[cid] = scores.get(cid, 0.0) + w / (c + rank)
+    return sorted(scores, key=scores.get, reverse=True)[:10]
+
+def _bench(fn):
+    fn()
+    best = float("inf")
+    for _ in range(ROUNDS):
+        t0 = time.perf_counter()
+        for _ in range(REPEAT):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / REPEAT * 1000)
+    return best
+
+def main():
+    header("PERF 03 — Rank fusion (Python vs NumPy)")
+    rng = np.random.default_rng(0)
+    pool = [hashlib.sha1(str(i).encode()).hexdigest() for i in range(POOL)]
+    lists = [[pool[i] for i in rng.choice(POOL, N_CANDIDATES, replace=False)] for _ in range(N_RETRIEVERS)]
+    scores = [np.sort(rng.random(N_CANDIDATES))[::-1] for _ in range(N_RETRIEVERS)]
+    weights = [0.45, 0.55, 0.5, 0.5]
+    keys = [hex_keys(ids) for ids in lists]
+
+    print(f"candidates: {N_RETRIEVERS} x {N_CANDIDATES}")
+    print({"python dict rrf (ms)": round(_bench(lambda: _python_rrf(lists, weights)), 3)})
+    print({"numpy rrf, str ids (ms)": round(_bench(lambda: fuse(lists, method="rrf", weights=weights, top_k=10)), 3)})
+    for m in ("rrf", "weighted", "zscore"):
+        ms = _bench(lambda: fuse(keys, scores, method=m, weights=weights, top_k=10))
+        print({f"numpy {m}, uint64 keys (ms)": round(ms, 3)})
+
+    a = _python_rrf(lists, weights)
+    b, _ = fuse(lists, method="rrf", weights=weights, top_k=10)
+    print("same top-10:", a == list(b))
+
+    # 회귀: 앞 16자리가 같은 서로 다른 id는 하나로 합쳐지면 안 됨(uint64 key는 앞 16자리만 씀)
+    for case in (["abcdef0123456789-a", "abcdef0123456789-b"],
+                 ["1234567890123456789", "1234567890123456000"],
+                 [pool[0][:16] + "0" * 24, pool[0][:16] + "1" * 24]):
+        got, _ = fuse([case, case[::-1]])
+        assert sorted(got.tolist()) == sorted(case), got
+    print("prefix collisions kept apart:", True)
+
+if __name__ == "__main__":
+    main()
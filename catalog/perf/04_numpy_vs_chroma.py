@@ -0,0 +1,83 @@
+"""Perf 04 — NumPy exact index vs Chroma (`VECTOR_BACKEND=numpy`)
+
+- 같은 코퍼스(임의 정규화 벡터 N개, dim 768)를 Chroma 컬렉션과 `NumpyVectorStore`에 적재
+- 측정: 질의 1건 latency(p50), 질의 32건 batch(matmul 1회) vs 1건씩, Chroma(HNSW) recall@10
+- 임베딩 모델 호출 없음(벡터를 직접 넣고 by_vector 검색)
+
+실행:
+  docker compose run --rm lab python catalog/perf/04_numpy_vs_chroma.py
+"""
+import tempfile, time
+import numpy as np
+from rich import print
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.vector_backends import NumpyVectorStore
+from app.utils.console import header
+
+N = 20000
+DIM = 768
+K = 10
+N_QUERIES = 200
+BATCH = 32
+_ADD_BATCH = 4000
+
+def _p50_ms(fn, queries):
+    times = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - t0) * 1000)
+    return round(float(np.median(times)), 3)
+
+def main():
+    header("PERF 04 — NumPy exact index vs Chroma")
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((N, DIM)).astype(np.float32)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    ids = [f"c{i}" for i in range(N)]
+    texts = [f"chunk {i}" for i in range(N)]
+    metas = [{"year": 2020 + i % 7} for i in range(N)]
+    queries = rng.standard_normal((N_QUERIES, DIM)).astype(np.float32)
+    emb = DeterministicFakeEmbedding(size=DIM)   # 텍스트 질의용 자리표시(이 벤치마크는 by_vector만 사용)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        chroma = Chroma(persist_directory=f"{tmp}/chroma", embedding_function=emb, collection_name="bench")
+        for i in range(0, N, _ADD_BATCH):
+            chroma._collection.add(ids=ids[i:i + _ADD_BATCH], embeddings=x[i:i + _ADD_BATCH].tolist(),
+                                   documents=texts[i:i + _ADD_BATCH], metadatas=metas[i:i + _ADD_BATCH])
+        t_chroma = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        npstore = NumpyVectorStore(f"{tmp}/numpy", emb)
+        npstore.add_vectors(x, texts, metadatas=metas, ids=ids)
+        npstore.persist()
+        t_numpy = time.perf_counter() - t0
+        print({"corpus": N, "dim": DIM, "load_s": {"chroma": round(t_chroma, 2), "numpy": round(t_numpy, 2)}})
+
+        qs = queries.tolist()
+        print({"p50 single query (ms)": {
+            "chroma": _p50_ms(lambda q: chroma.similarity_search_by_vector_with_relevance_scores(q, k=K), qs),
+            "numpy": _p50_ms(lambda q: npstore.similarity_search_by_vector_with_score(q, k=K), qs),
+            "numpy + filter": _p50_ms(lambda q: npstore.similarity_search_by_vector_with_score(q, k=K, filter={"year": 2024}), qs),
+        }})
+
+        t0 = time.perf_counter()
+        for q in qs[:BATCH]:
+            npstore.similarity_search_by_vector_with_score(q, k=K)
+        loop_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        npstore.similarity_search_by_vectors_with_score(qs[:BATCH], k=K)
+        batch_ms = (time.perf_counter() - t0) * 1000
+        print({f"numpy {BATCH} queries (ms)": {"one by one": round(loop_ms, 2), "batched": round(batch_ms, 2)}})
+
+        recall = []
+        for q in qs[:50]:
+            exact = {d.page_content for d, _ in npstore.similarity_search_by_vector_with_score(q, k=K)}
+            approx = {d.page_content for d, _ in chroma.similarity_search_by_vector_with_relevance_scores(q, k=K)}
+            recall.append(len(exact & approx) / K)
+        print({"chroma recall@10 vs exact": round(float(np.mean(recall)), 3)})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Perf 06 — 문서 로딩: 순차 vs process pool (`app/core/doc_loader.py`)
+
+- 합성 코퍼스: PDF N_PDF개(reportlab, 파일당 PAGES쪽) + Markdown N_MD개 + 깨진 PDF 2개
+- 순차(worker 1개, 기존 `load_documents` 방식) vs pool(`LOADER_WORKERS`, 기본 CPU 수)
+  - pool은 첫 실행(worker spawn 포함)과 재사용 실행을 따로 측정
+- 파일별 파싱 시간(p50/p95)과 실패 기록(`LoadResult.error`)을 함께 출력
+
+실행:
+  docker compose run --rm lab python catalog/perf/06_parallel_load.py
+"""
+import os, tempfile, time
+import numpy as np
+from rich import print
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from app.core.doc_loader import iter_load, loader_workers, shutdown_pool
+from app.utils.console import header
+
+N_PDF = 300
+N_MD = 300
+PAGES = 4
+LINES = 40
+
+def _make_corpus(root: str) -> list:
+    paths = []
+    for i in range(N_PDF):
+        p = os.path.join(root, f"report_{i:04d}.pdf")
+        c = canvas.Canvas(p, pagesize=A4)
+        for page in range(PAGES):
+            for j in range(LINES):
+                c.drawString(40, 800 - j * 19, f"Report {i} page {page} line {j}: audience development KPI sponsorship budget.")
+            c.showPage()
+        c.save()
+        paths.append(p)
+    for i in range(N_MD):
+        p = os.path.join(root, f"note_{i:04d}.md")
+        with open(p, "w", encoding="utf-8") as f:
+            f.write(f"# Note {i}\n\n" + "\n\n".join(f"## Section {s}\n\n관객개발 KPI와 후원 패키지 메모 {s}. " * 3 for s in range(8)))
+        paths.append(p)
+    for i in range(2):
+        p = os.path.join(root, f"broken_{i}.pdf")
+        with open(p, "wb") as f:
+            f.write(b"%PDF-1.4\n" + os.urandom(512))
+        paths.append(p)
+    return paths
+
+def _run(paths, workers):
+    t0 = time.perf_counter()
+    results = list(iter_load(paths, workers=workers))
+    return time.perf_counter() - t0, results
+
+def main():
+    header("PERF 06 — Document loading (serial vs process pool)")
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        paths = _make_corpus(tmp)
+        workers = loader_workers()
+        print({"files": len(paths), "pdf": N_PDF, "md": N_MD, "corpus build (s)": round(time.perf_counter() - t0, 2), "workers": workers})
+
+        _run(paths[:1] + paths[N_PDF:N_PDF + 1], 1)   # 현재 프로세스 loader import 예열(순차 측정 공정성)
+        t_serial, serial = _run(paths, 1)
+        t_cold, _ = _run(paths, workers)
+        t_warm, pooled = _run(paths, workers)
+        shutdown_pool()
+
+        same = [len(r.docs) for r in serial] == [len(r.docs) for r in pooled]
+        print({"load (s)": {"serial": round(t_serial, 2), "pool (cold)": round(t_cold, 2), "pool (warm)": round(t_warm, 2)},
+               "speedup (warm)": round(t_serial / t_warm, 2), "same docs": same,
+               "documents": sum(len(r.docs) for r in pooled)})
+        for ext in (".pdf", ".md"):
+            ms = [r.elapsed_ms for r in pooled if r.path.endswith(ext) and not r.error]
+            if ms:
+                print({ext: {"p50 ms/file": round(float(np.percentile(ms, 50)), 2), "p95 ms/file": round(float(np.percentile(ms, 95)), 2)}})
+        print({"failures": [r.record(os.path.basename(r.path)) for r in pooled if r.error]})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Perf 07 — Markdown loader: native(`app/core/markdown_loader.py`) vs `UnstructuredMarkdownLoader`
+
+- `data/docs/*.md` 샘플을 N_FILES개로 복제(파일마다 heading/본문에 번호를 붙여 내용이 서로 다르게)
+- 측정
+  - cold start: 새 프로세스에서 import + 파일 1개 로드까지 걸린 시간
+  - 처리량: 전체 파일 로드 시간, 파일당 ms
+  - 내용 일치: unstructured 출력 단어 중 native 출력에도 있는 비율(markdown 기호 제외)
+- unstructured 의존성(spaCy 모델 등)이 없으면 오류 수만 보고
+
+실행:
+  docker compose run --rm lab python catalog/perf/07_markdown_loader.py
+"""
+import glob, os, re, subprocess, sys, tempfile, time
+from rich import print
+from app.core import settings
+from app.core.markdown_loader import MarkdownLoader
+from app.utils.console import header
+
+N_FILES = 3000
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+_COLD = {
+    "native": "from app.core.markdown_loader import MarkdownLoader as L",
+    "unstructured": "from langchain_community.document_loaders import UnstructuredMarkdownLoader as L",
+}
+
+def _make_corpus(root: str) -> list:
+    samples = [open(p, encoding="utf-8").read() for p in sorted(glob.glob(os.path.join(settings.DOCS_DIR, "*.md")))]
+    if not samples:
+        samples = ["# 샘플\n\n## 절\n- 항목\n"]
+    paths = []
+    for i in range(N_FILES):
+        text = re.sub(r"^(#{1,6} .*)$", rf"\1 {i}", samples[i % len(samples)], flags=re.M) + f"\n\n추가 메모 {i}.\n"
+        p = os.path.join(root, f"doc_{i:05d}.md")
+        with open(p, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(p)
+    return paths
+
+def _cold_start(kind: str, path: str) -> float:
+    code = f"import time; t=time.perf_counter(); {_COLD[kind]}; L({path!r}).load(); print(time.perf_counter()-t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd(),
+                         env={**os.environ, "PYTHONPATH": os.getcwd()})
+    return round(float(out.stdout.strip().splitlines()[-1]), 3) if out.returncode == 0 else float("nan")
+
+def _load_all(loader_cls, paths):
+    docs, errors = {}, 0
+    t0 = time.perf_counter()
+    for p in paths:
+        try:
+            docs[p] = loader_cls(p).load()
+        except Exception:
+            errors += 1
+    return time.perf_counter() - t0, docs, errors
+
+def main():
+    header("PERF 07 — Markdown loader (native vs unstructured)")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _make_corpus(tmp)
+        print({"files": len(paths), "cold start (s)": {k: _cold_start(k, paths[0]) for k in _COLD}})
+
+        t_native, native, _ = _load_all(MarkdownLoader, paths)
+        from langchain_community.document_loaders import UnstructuredMarkdownLoader
+        t_unst, unst, errors = _load_all(UnstructuredMarkdownLoader, paths)
+        print({"load (s)": {"native": round(t_native, 3), "unstructured": round(t_unst, 3)},
+               "ms/file": {"native": round(t_native / len(paths) * 1000, 3),
+                           "unstructured": round(t_unst / len(paths) * 1000, 3)},
+               "unstructured errors": errors,
+               "native docs/file": round(sum(len(d) for d in native.values()) / len(paths), 2)})
+
+        covered = []
+        for p, docs in unst.items():
+            words = set(_WORD_RE.findall(" ".join(d.page_content for d in docs)))
+            mine = set(_WORD_RE.findall(" ".join(d.page_content for d in native[p])))
+            if words:
+                covered.append(len(words & mine) / len(words))
+        if covered:
+            print({"word coverage vs unstructured": round(sum(covered) / len(covered), 4)})
+        sample = max(native.values(), key=len)
+        print({"sample metadata": [{k: d.metadata[k] for k in ("heading_path", "start_index", "end_index")} for d in sample]})
+
+if __name__ == "__main__":
+    main()
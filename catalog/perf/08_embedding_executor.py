@@ -0,0 +1,83 @@
+"""Perf 08 — 임베딩 executor: 기존 순차 호출 vs batch + 병렬 (`app/core/embedding_executor.py`)
+
+- 모의 backend(`SimulatedBackend`): 요청당 고정 지연 + text당 지연, 동시 요청 SERVER_PARALLEL개까지 병렬 처리
+  (Ollama `OLLAMA_NUM_PARALLEL` / GPU 없는 호스트의 CPU 코어를 흉내), 일정 비율로 일시 오류(503)
+- 비교
+  - sequential: text마다 요청 1개(community `OllamaEmbeddings` 방식)
+  - executor  : token 예산 batch + `EMBED_MAX_CONCURRENCY` 병렬 + 재시도 + batch 크기 자동 조정
+- 출력: chunks/sec, 재시도 수, 최종 batch 크기 / `OLLAMA=1`이면 실제 Ollama embeddings로 executor만 측정
+
+실행:
+  docker compose run --rm lab python catalog/perf/08_embedding_executor.py
+"""
+import os, random, threading, time
+from rich import print
+from langchain_core.embeddings import Embeddings
+from app.core import metrics, settings
+from app.core.embedding_executor import BatchedEmbeddings, _tuner
+from app.utils.console import header
+
+N_CHUNKS = 2000
+REQUEST_MS = 15.0        # 요청당 고정 비용(HTTP + 모델 호출)
+PER_TEXT_MS = 0.6        # text당 비용(batch 안에서는 서버가 묶어 처리)
+SERVER_PARALLEL = 4
+ERROR_RATE = 0.02
+
+class _Unavailable(Exception):
+    status_code = 503
+
+class SimulatedBackend(Embeddings):
+    def __init__(self, per_text_request: bool = False, error_rate: float = ERROR_RATE):
+        self.per_text_request = per_text_request
+        self.error_rate = error_rate
+        self._slots = threading.Semaphore(SERVER_PARALLEL)
+        self._rng = random.Random(0)
+
+    def _request(self, texts):
+        with self._slots:
+            time.sleep((REQUEST_MS + PER_TEXT_MS * len(texts)) / 1000)
+            if self._rng.random() < self.error_rate:
+                raise _Unavailable("simulated 503")
+        return [[float(len(t) % 7), 1.0] for t in texts]
+
+    def embed_documents(self, texts):
+        if self.per_text_request:
+            return [self._request([t])[0] for t in texts]
+        return self._request(texts)
+
+    def embed_query(self, text):
+        return self._request([text])[0]
+
+def _chunks():
+    return [f"관객개발 KPI 메모 {i}. 후원 패키지와 티켓 판매 전략을 정리한 문단입니다. " * 4 for i in range(N_CHUNKS)]
+
+def _run(emb, texts):
+    t0 = time.perf_counter()
+    try:
+        out = emb.embed_documents(texts)
+    except Exception as e:
+        return {"error": type(e).__name__}
+    dt = time.perf_counter() - t0
+    return {"sec": round(dt, 2), "chunks/sec": round(len(out) / dt, 1)}
+
+def main():
+    header("PERF 08 — Embedding executor (sequential vs batched + parallel)")
+    texts = _chunks()
+    if os.getenv("OLLAMA") == "1":
+        from app.core.llm_factory import _ollama_embeddings
+        print({"ollama executor": _run(BatchedEmbeddings(_ollama_embeddings(), "ollama"), texts[:200])})
+        return
+    seq_n = N_CHUNKS // 10      # 순차는 느리므로 일부만, 오류 없이(기존 방식에는 재시도가 없음)
+    seq = _run(SimulatedBackend(per_text_request=True, error_rate=0.0), texts[:seq_n])
+    print({"sequential (1 request/text)": {**seq, "chunks": seq_n}})
+
+    before = metrics.snapshot().get("counters", {}).get("embed_executor.retries", 0)
+    res = _run(BatchedEmbeddings(SimulatedBackend(), "simulated"), texts)
+    retries = metrics.snapshot().get("counters", {}).get("embed_executor.retries", 0) - before
+    print({"executor": {**res, "chunks": N_CHUNKS, "retries": retries, "final batch size": _tuner("simulated").size,
+                        "concurrency": settings.EMBED_MAX_CONCURRENCY, "batch tokens": settings.EMBED_BATCH_TOKENS}})
+    if "chunks/sec" in seq and "chunks/sec" in res:
+        print({"speedup": round(res["chunks/sec"] / seq["chunks/sec"], 1)})
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-"""Splitters: RecursiveCharacterTextSplitter."""
+"""Splitters: RecursiveCharacterTextSplitter(문자 수) vs StructuredTextSplitter(heading/표/문장 + token 수)."""
 from rich import print
 from app.core import settings
 from app.core.rag_utils import load_documents
+from app.core.chunker import StructuredTextSplitter
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.utils.console import header
 
@@ -13,8 +14,13 @@ def main():
         return
     splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
     chunks = splitter.split_documents(docs)
-    print("chunks:", len(chunks))
+    print("recursive chunks:", len(chunks))
     print(chunks[0].page_content[:300])
 
+    structured = StructuredTextSplitter().split_documents(docs)
+    print("structured chunks:", len(structured))
+    print({k: structured[0].metadata.get(k) for k in ("anchor", "heading_path", "start_index", "end_index", "tokens")})
+    print(structured[0].page_content[:300])
+
 if __name__ == "__main__":
     main()
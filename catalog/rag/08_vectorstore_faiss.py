@@ -5,15 +5,19 @@
 
 주의:
 - FAISS 저장/로드는 serialize 방식으로 동작하며, 운영 환경에서는 보안/버전 관리 고려 필요
+
+서빙 경로에서는 `VECTOR_BACKEND=faiss_flat|faiss_ivf|faiss_hnsw`로 FAISS를 직접 사용
+(`app/core/vector_backends.py`, pickle 없이 `index.faiss` + `docs.json` 저장, mmap 로드)
 """
 import os
 from rich import print
 from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.chunker import build_splitter
 
 from app.core import settings
 from app.core.llm_factory import build_embeddings
 from app.core.rag_utils import load_documents
+from app.core.vector_backends import FaissVectorStore
 from app.utils.console import header
 
 FAISS_DIR = "/app/storage/faiss_catalog"
@@ -25,7 +29,7 @@ def main():
         print("[yellow]data/docs에 문서를 넣어주세요.[/yellow]")
         return
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    splitter = build_splitter()
     chunks = splitter.split_documents(docs)
 
     os.makedirs(FAISS_DIR, exist_ok=True)
@@ -40,5 +44,14 @@ def main():
         print(f"--- hit {i} ---")
         print(d.page_content[:220])
 
+    # 서빙용 backend: 메타데이터 필터(Chroma where 문법) + upsert/delete 지원
+    for kind in FaissVectorStore.KINDS:
+        store = FaissVectorStore(os.path.join(FAISS_DIR, f"backend_{kind}"), emb, kind=kind)
+        store.add_documents(chunks, ids=[f"c{i}" for i in range(len(chunks))])
+        store.persist()
+        src = chunks[0].metadata.get("source", "")
+        hits = store.similarity_search("후원 패키지 구성 요소", k=3, filter={"source": src})
+        print({"kind": kind, "count": store.count(), "filtered_hits": len(hits)})
+
 if __name__ == "__main__":
     main()
@@ -6,13 +6,16 @@
 학습 포인트:
 - BM25Retriever
 - (확장) EnsembleRetriever로 BM25 + Vector를 합칠 수 있음
+- (v17) 기본 공백 토큰화는 교착어인 한국어("관객개발을" vs "관객개발")에 약함
+  → `preprocess_func=ko_tokenizer.tokenize`(NFKC + 조사 제거 + 한글 bigram)와 비교
 """
 from rich import print
 from langchain_community.retrievers import BM25Retriever
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.chunker import build_splitter
 
 from app.core import settings
 from app.core.rag_utils import load_documents
+from app.core.ko_tokenizer import tokenize as ko_tokenize
 from app.utils.console import header
 
 def main():
@@ -22,18 +25,20 @@ def main():
         print("[yellow]data/docs에 문서를 넣어주세요.[/yellow]")
         return
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    splitter = build_splitter()
     chunks = splitter.split_documents(docs)
 
-    retriever = BM25Retriever.from_documents(chunks)
-    retriever.k = settings.TOP_K
-
     q = "관객개발 KPI"
-    hits = retriever.get_relevant_documents(q)
-    print(f"hits: {len(hits)}")
-    for i, d in enumerate(hits, 1):
-        print(f"--- {i} ---")
-        print(d.page_content[:220])
+    for name, preprocess in [("whitespace", None), ("ko_tokenizer", ko_tokenize)]:
+        kwargs = {"preprocess_func": preprocess} if preprocess else {}
+        retriever = BM25Retriever.from_documents(chunks, **kwargs)
+        retriever.k = settings.TOP_K
+
+        hits = retriever.get_relevant_documents(q)
+        print(f"[bold]{name}[/bold] hits: {len(hits)}")
+        for i, d in enumerate(hits, 1):
+            print(f"--- {i} ---")
+            print(d.page_content[:220])
 
 if __name__ == "__main__":
     main()
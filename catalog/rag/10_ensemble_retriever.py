@@ -2,13 +2,16 @@
 
 학습 포인트:
 - EnsembleRetriever로 키워드 기반(BM25)과 임베딩 기반(Vector) 결과를 결합
+- (v17) 서빙 경로는 매번 BM25를 재구축하지 않고, ingest와 함께 갱신되는
+  영속 lexical index(SQLite FTS5)를 사용: `retrieval.search(q, search_type="hybrid")`
 """
 from rich import print
 from langchain.retrievers import EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.chunker import build_splitter
 
 from app.core import settings
+from app.core import retrieval
 from app.core.rag_utils import load_documents, ingest_dir, vectorstore
 from app.utils.console import header
 
@@ -25,7 +28,7 @@ def main():
     vector_ret = vs.as_retriever(search_kwargs={"k": settings.TOP_K})
 
     # BM25
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    splitter = build_splitter()
     chunks = splitter.split_documents(docs)
     bm25 = BM25Retriever.from_documents(chunks)
     bm25.k = settings.TOP_K
@@ -39,5 +42,12 @@ def main():
         print(f"--- {i} ---")
         print(d.page_content[:220])
 
+    # 서빙 경로(영속 FTS5 index + vector, rank fusion) — 질의 시 재구축 없음
+    hits = retrieval.search(q, k=settings.TOP_K, search_type="hybrid", collection="catalog_docs")
+    print(f"[serving hybrid] hits: {len(hits)}")
+    for i, d in enumerate(hits, 1):
+        print(f"--- {i} ---")
+        print(d.page_content[:220])
+
 if __name__ == "__main__":
     main()
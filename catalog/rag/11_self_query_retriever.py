@@ -15,7 +15,7 @@ from langchain_classic.chains.query_constructor.schema import AttributeInfo
 from langchain_classic.retrievers.self_query.base import SelfQueryRetriever
 
 from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.core.chunker import build_splitter
 
 from app.core import settings
 from app.core.llm_factory import build_chat_model, build_embeddings
@@ -50,7 +50,7 @@ def main():
         d.metadata = {**(d.metadata or {}), "type": t, "year": 2026, "org": "local-arts-foundation"}
         enriched.append(d)
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP)
+    splitter = build_splitter()
     chunks = splitter.split_documents(enriched)
 
     vs = Chroma(
@@ -0,0 +1,53 @@
+#!/usr/bin/env bash
+set -euo pipefail
+BASE="${BASE:-http://localhost:8000}"
+
+echo "== health / metrics =="
+curl -s "$BASE/health" | jq .
+curl -s "$BASE/metrics" | jq .
+
+echo "== chat stream (SSE) =="
+curl -sN "$BASE/chat/stream" -H "Content-Type: application/json" -d '{"q":"후원 패키지 근거 문서 요약","mode":"rag"}'
+
+echo "== index queue =="
+curl -s -X POST "$BASE/ops/queue-reindex" -H "Content-Type: application/json" -d '{"mode":"full"}' | jq .
+curl -s "$BASE/ops/queue" | jq .stats
+
+echo "== upload (async index) =="
+curl -s -X POST "$BASE/docs/upload" -F "files=@data/docs/sample_artbiz_notes.md" | jq .
+curl -s -X POST "$BASE/docs/upload?wait=true&timeout_sec=30" -F "files=@data/docs/sample_artbiz_notes.md" | jq .
+
+echo "== hybrid search =="
+curl -s "$BASE/chat" -H "Content-Type: application/json" -d '{"q":"관객개발 KPI","mode":"rag","search_type":"hybrid"}' | jq .used_docs
+
+echo "== vector backend =="
+curl -s "$BASE/health" | jq .retrieval.stores
+
+echo "== self-query (rule parser fast path) =="
+curl -s "$BASE/rag/self-query" -H "Content-Type: application/json" -d '{"q":"2024년 보도자료 관객개발 KPI"}' | jq .parsed_query
+curl -s "$BASE/metrics" | jq '.gauges["self_query.parse.llm_skip_ratio"]'
+
+echo "== retrieval cache =="
+curl -s "$BASE/health" | jq .retrieval.cache
+curl -s "$BASE/metrics" | jq '.counters | with_entries(select(.key | startswith("retrieval_cache")))'
+
+echo "== context packer =="
+curl -s "$BASE/rag/self-query" -H "Content-Type: application/json" -d '{"q":"관객개발 KPI","k":8}' | jq .parsed_query.context
+curl -s "$BASE/metrics" | jq '.counters | with_entries(select(.key | startswith("context_packer")))'
+
+echo "== parallel loader (per-file report) =="
+JOB=$(curl -s -X POST "$BASE/ops/queue-reindex" -H "Content-Type: application/json" -d '{"mode":"full"}' | jq -r .job_id)
+sleep 3
+curl -s "$BASE/ops/jobs/$JOB" | jq '.result.files'
+curl -s "$BASE/metrics" | jq '.counters | with_entries(select(.key | startswith("loader")))'
+
+echo "== parse cache =="
+curl -s "$BASE/health" | jq .parse_cache
+
+echo "== blue/green collection rebuild =="
+curl -s "$BASE/ops/collections/catalog_docs" | jq '{active, versions}'
+JOB=$(curl -s -X POST "$BASE/ops/rebuild" -H "Content-Type: application/json" -d '{"collection":"catalog_docs"}' | jq -r .job_id)
+sleep 5
+curl -s "$BASE/ops/jobs/$JOB" | jq '.result | {version, collection, chunks, catch_up, gc}'
+# 롤백(보관 중인 이전 버전으로 pointer 교체)
+# curl -s -X POST "$BASE/ops/collections/catalog_docs/activate" -H "Content-Type: application/json" -d '{"version":1}' | jq .